@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -44,10 +45,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # первым, чтобы в метрики попадало время всей цепочки
+    "runs.middleware.MetricsMiddleware",
+    # поиск N+1, включается QUERY_BUDGET_MODE (в тестах — raise)
+    "runs.middleware.QueryBudgetMiddleware",
+    # сжатие gzip/brotli; до остальных, чтобы они видели несжатое тело
+    "runs.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    # чтение с реплики для аналитики и списков
+    "runs.middleware.ReplicaMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # профилирование по запросу: нужен request.user, поэтому после auth
+    "runs.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -114,6 +125,80 @@ STATIC_ROOT = "static"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Профилирование запросов по требованию (runs.middleware.ProfilingMiddleware)
+# по умолчанию во временном каталоге: код на Lambda (Zappa) только для чтения
+PROFILING_DIR = Path(
+    os.getenv("PROFILING_DIR", Path(tempfile.gettempdir()) / "profiles")
+)
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "50"))
+PROFILING_TOKEN_MAX_AGE = 24 * 60 * 60  # секунды
+
+# Реплика для чтения: алиас в DATABASES (если его нет — всё идёт в default)
+DATABASE_ROUTERS = ["runs.routers.ReplicaRouter"]
+REPLICA_DATABASE = os.getenv("DB_REPLICA_ALIAS", "replica")
+# после своей записи клиент столько секунд читает с основной базы
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+REPLICA_STICKY_COOKIE = "db_primary"
+
+# Фильтр точек при приёме (runs/ingest.py), 0 — проверка выключена
+POSITION_MIN_DISTANCE_M = float(os.getenv("POSITION_MIN_DISTANCE_M", "2"))
+POSITION_MIN_INTERVAL_S = float(os.getenv("POSITION_MIN_INTERVAL_S", "1"))
+POSITION_MAX_SPEED_MPS = float(os.getenv("POSITION_MAX_SPEED_MPS", "15"))
+
+# Частота приёма точек (runs/throttling.py): токенов в секунду и запас,
+# отдельно на забег и на атлета; rate 0 — без ограничения
+INGEST_THROTTLE_STORE = os.getenv(
+    "INGEST_THROTTLE_STORE", "runs.throttling.MemoryStore"
+)
+INGEST_RUN_RATE = float(os.getenv("INGEST_RUN_RATE", "5"))
+INGEST_RUN_BURST = int(os.getenv("INGEST_RUN_BURST", "20"))
+INGEST_ATHLETE_RATE = float(os.getenv("INGEST_ATHLETE_RATE", "10"))
+INGEST_ATHLETE_BURST = int(os.getenv("INGEST_ATHLETE_BURST", "40"))
+
+# Прореживание треков (simplify_tracks): возраст забега в днях и допуск в метрах
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "365"))
+RETENTION_TOLERANCE_M = float(os.getenv("RETENTION_TOLERANCE_M", "5"))
+
+# Кэш Django. Версии тайлов тепловой карты сбрасывает процесс dispatch_outbox,
+# поэтому в продакшне кэш должен быть общим для всех процессов
+# (production.py: таблица в базе); LocMem — только для разработки и тестов
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Сколько секунд хранится тайл тепловой карты (/api/heatmap/)
+HEATMAP_CACHE_SECONDS = int(os.getenv("HEATMAP_CACHE_SECONDS", "300"))
+
+# Сколько секунд хранится сравнение двух завершённых забегов
+COMPARE_CACHE_SECONDS = int(os.getenv("COMPARE_CACHE_SECONDS", "86400"))
+
+# Outbox: модули с обработчиками событий и число попыток доставки
+OUTBOX_HANDLER_MODULES = ["runs.handlers"]
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+
+# Контроль N+1: "" — выключен, "warn" — в лог, "raise" — исключение
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "")
+# сколько раз один и тот же SQL может выполниться за запрос
+QUERY_BUDGET_REPEAT_LIMIT = int(os.getenv("QUERY_BUDGET_REPEAT_LIMIT", "2"))
+
+REST_FRAMEWORK = {
+    # orjson-рендерер/парсер; без orjson работают как стандартные DRF-классы
+    "DEFAULT_RENDERER_CLASSES": [
+        "runs.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "runs.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
 COMPANY_NAME = "Runify"
 COMPANY_SLOGAN = "Меняем жизнь по одному километру за раз."
 COMPANY_CONTACTS = "Онлайн-клуб. Тренировки в любом городе."
@@ -0,0 +1,71 @@
+"""
+Профиль подключения к PostgreSQL для продакшна.
+
+По умолчанию — встроенный пул Django (psycopg 3 + psycopg-pool): на Lambda
+контейнер живёт между вызовами, и соединение из пула не платит за TCP/TLS
+handshake и авторизацию. С DB_POOL=0 — постоянные соединения
+(CONN_MAX_AGE). В обоих режимах соединение проверяется перед использованием.
+Все параметры берутся из окружения.
+"""
+
+import os
+
+
+def _flag(env, name, default):
+    return env.get(name, default).lower() in ("1", "true", "yes", "on")
+
+
+def postgres_database(env=os.environ):
+    """Словарь для DATABASES["default"]."""
+
+    options = {"connect_timeout": int(env.get("DB_CONNECT_TIMEOUT", "5"))}
+
+    # Обрыв долгих запросов на стороне сервера, 0 — без ограничения
+    statement_timeout = int(env.get("DB_STATEMENT_TIMEOUT_MS", "5000"))
+    if statement_timeout:
+        options["options"] = f"-c statement_timeout={statement_timeout}"
+
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": env.get("DB_NAME", "db_name"),
+        "USER": env.get("DB_USER", "db_user"),
+        "PASSWORD": env.get("DB_PASSWORD", "db_pass"),
+        "HOST": env.get("DB_HOST", "https://db_host_example.com"),
+        "PORT": env.get("DB_PORT", "5432"),
+        "OPTIONS": options,
+        # в режиме пула Django передаёт в него ConnectionPool.check_connection
+        "CONN_HEALTH_CHECKS": _flag(env, "DB_CONN_HEALTH_CHECKS", "1"),
+    }
+
+    if _flag(env, "DB_POOL", "1"):
+        options["pool"] = {
+            "min_size": int(env.get("DB_POOL_MIN_SIZE", "1")),
+            "max_size": int(env.get("DB_POOL_MAX_SIZE", "4")),
+            # сколько ждать свободное соединение, секунды
+            "timeout": float(env.get("DB_POOL_TIMEOUT", "10")),
+            # простаивающие соединения сверх min_size закрываются
+            "max_idle": float(env.get("DB_POOL_MAX_IDLE", "300")),
+        }
+        # пул несовместим с постоянными соединениями Django
+        database["CONN_MAX_AGE"] = 0
+    else:
+        database["CONN_MAX_AGE"] = int(env.get("DB_CONN_MAX_AGE", "60"))
+
+    return database
+
+
+def postgres_databases(env=os.environ):
+    """DATABASES: default и, если задан DB_REPLICA_HOST, реплика для чтения."""
+
+    databases = {"default": postgres_database(env)}
+    if env.get("DB_REPLICA_HOST"):
+        replica_env = {
+            **env,
+            "DB_HOST": env["DB_REPLICA_HOST"],
+            "DB_PORT": env.get("DB_REPLICA_PORT", env.get("DB_PORT", "5432")),
+        }
+        replica = postgres_database(replica_env)
+        # в тестах реплика указывает на тестовую default
+        replica["TEST"] = {"MIRROR": "default"}
+        databases[env.get("DB_REPLICA_ALIAS", "replica")] = replica
+    return databases
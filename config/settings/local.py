@@ -7,5 +7,12 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # Реплика для проверки роутинга. По умолчанию тот же файл; отдельная база —
+    # SQLITE_REPLICA_NAME=db_replica.sqlite3 и migrate --database=replica.
+    # В тестах это отдельная in-memory база.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / os.getenv("SQLITE_REPLICA_NAME", "db.sqlite3"),
+    },
 }
@@ -1,17 +1,18 @@
-import os
-
 from .base import *
+from .database import postgres_databases
 
 # Не редактируйте этот production файл, что не сломать наш продакшн сайт!
 
-DATABASES = {
+# Пул соединений, health checks, statement_timeout и реплика — см. database.py
+DATABASES = postgres_databases()
+
+# Общий для всех процессов кэш (таблица создаётся командой createcachetable)
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.environ.get("DB_NAME", "db_name"),
-        "USER": os.environ.get("DB_USER", "db_user"),
-        "PASSWORD": os.environ.get("DB_PASSWORD", "db_pass"),
-        "HOST": os.environ.get("DB_HOST", "https://db_host_example.com"),
-        "PORT": "5432",
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "django_cache"),
     }
 }
 
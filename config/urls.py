@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
-from runs.views import company_details
+from runs.views import company_details, db_stats, metrics
 from rest_framework.routers import DefaultRouter
 from runs.views import RunViewSet, UserViewSet, ChallengeViewSet, PositionViewSet
 
@@ -16,4 +16,6 @@ urlpatterns = [
     path("api/", include("runs.urls")),
     path("api/company_details/", company_details),
     path("admin/", admin.site.urls),
+    path("metrics", metrics),
+    path("metrics/db", db_stats),
 ]
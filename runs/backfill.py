@@ -0,0 +1,136 @@
+"""
+Пересчёт показателей завершённых забегов (дистанция, время, скорость).
+
+Нужен после исправления расчёта или добавления метрики: Run.save для
+каждого забега работает по одному и заново начисляет челленджи, поэтому
+здесь забеги делятся на диапазоны id, точки диапазона читаются одним
+потоковым запросом, а изменившиеся забеги пишутся через bulk_update.
+Челленджи и события outbox при пересчёте не трогаются. Прореженные
+забеги (Run.simplified_at) пропускаются: их точек уже недостаточно.
+"""
+
+import json
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Max, Min
+
+from .geo import track_distance_km
+from .models import Position, Run
+
+# Поля, которые пересчитываются
+FIELDS = ["distance", "run_time_seconds", "speed"]
+
+
+def run_metrics(rows):
+    """
+    Показатели забега по его точкам, так же как в Run.save и
+    RunViewSet.calculate_run_time. rows — (latitude, longitude, date_time,
+    speed) в порядке записи.
+    """
+
+    rows = list(rows)
+    times = [row[2] for row in rows if row[2] is not None]
+    speeds = [row[3] for row in rows if row[3] is not None]
+
+    metrics = {
+        "distance": track_distance_km((row[0], row[1]) for row in rows),
+        "run_time_seconds": None,
+        "speed": None,
+    }
+    if times:
+        metrics["run_time_seconds"] = int((max(times) - min(times)).total_seconds())
+    if speeds:
+        metrics["speed"] = round(sum(speeds) / len(speeds), 2)
+    return metrics
+
+
+def id_ranges(chunk_size):
+    """
+    Диапазоны [start, end) id завершённых забегов по chunk_size.
+    Границы кратны chunk_size, поэтому не меняются между запусками.
+    """
+
+    bounds = Run.objects.filter(status=Run.Status.FINISHED).aggregate(
+        first=Min("id"), last=Max("id")
+    )
+    if bounds["first"] is None:
+        return []
+    start = bounds["first"] // chunk_size * chunk_size
+    return [
+        (begin, begin + chunk_size)
+        for begin in range(start, bounds["last"] + 1, chunk_size)
+    ]
+
+
+def backfill_range(start, end, dry_run=False, batch_size=500):
+    """
+    Пересчитывает забеги с id из [start, end). Возвращает статистику:
+    сколько забегов и точек прочитано и сколько забегов изменилось.
+    """
+
+    runs = Run.objects.filter(
+        status=Run.Status.FINISHED,
+        simplified_at__isnull=True,
+        pk__gte=start,
+        pk__lt=end,
+    ).only("id", *FIELDS)
+    runs = {run.pk: run for run in runs}
+
+    positions = (
+        Position.objects.filter(run_id__in=list(runs))
+        .order_by("run_id", "created_at", "id")
+        .values_list("run_id", "latitude", "longitude", "date_time", "speed")
+        .iterator(chunk_size=2000)
+    )
+
+    stats = {"runs": len(runs), "positions": 0, "changed": 0}
+    changed = []
+    for run_id, rows in groupby(positions, key=itemgetter(0)):
+        rows = [row[1:] for row in rows]
+        stats["positions"] += len(rows)
+
+        run = runs[run_id]
+        metrics = run_metrics(rows)
+        if all(getattr(run, field) == value for field, value in metrics.items()):
+            continue
+        for field, value in metrics.items():
+            setattr(run, field, value)
+        changed.append(run)
+
+    stats["changed"] = len(changed)
+    if changed and not dry_run:
+        # bulk_update не вызывает Run.save: челленджи не начисляются повторно
+        with transaction.atomic():
+            Run.objects.bulk_update(changed, FIELDS, batch_size=batch_size)
+    return stats
+
+
+class Checkpoint:
+    """
+    Готовые диапазоны в JSON-файле: повторный запуск с тем же файлом
+    пропускает их. Без пути ничего не сохраняет.
+    """
+
+    def __init__(self, path, chunk_size):
+        self.path = Path(path) if path else None
+        self.chunk_size = chunk_size
+        self.done = set()
+
+        if self.path and self.path.exists():
+            data = json.loads(self.path.read_text())
+            if data["chunk_size"] != chunk_size:
+                raise ValueError(f"checkpoint создан с chunk_size={data['chunk_size']}")
+            self.done = {tuple(item) for item in data["done"]}
+
+    def mark(self, id_range):
+        self.done.add(tuple(id_range))
+        if self.path is None:
+            return
+        data = {"chunk_size": self.chunk_size, "done": sorted(self.done)}
+        # запись через временный файл: прерванный запуск не портит checkpoint
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(self.path)
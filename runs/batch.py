@@ -0,0 +1,32 @@
+"""
+Пакетные команды без statement_timeout.
+
+DB_STATEMENT_TIMEOUT_MS (5 с по умолчанию) рассчитан на запросы API.
+Команды, которые работают долго по своей природе (backfill_runs,
+dispatch_outbox с сопоставлением предметов, rebuild_leaderboards,
+match_collectibles, simplify_tracks), вызывают lift_statement_timeout():
+ограничение снимается у уже открытых соединений PostgreSQL процесса и у
+всех, которые он откроет дальше (в том числе взятых из пула).
+"""
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def _unlimited(connection):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET statement_timeout = 0")
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _unlimited(connection)
+
+
+def lift_statement_timeout():
+    connection_created.connect(
+        _on_connection_created, dispatch_uid="runs.batch.statement_timeout"
+    )
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _unlimited(connection)
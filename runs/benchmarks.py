@@ -0,0 +1,339 @@
+"""
+Бенчмарки горячих участков API.
+
+Каждый бенчмарк — функция, которая получает масштаб данных (rows) и
+возвращает словарь {метрика: секунды}; метрики с суффиксом _mb — пиковая
+память в МБ. Для бенчмарков с per_rows=True время приводится к 10k строк,
+для остальных это время одного запроса.
+Запуск: python manage.py benchmark (SQLite или PostgreSQL из настроек).
+"""
+
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+
+from .models import Challenge, Position, Run
+
+BENCHMARKS = {}
+
+
+def benchmark(name, per_rows=False):
+    """Регистрирует функцию как бенчмарк с указанным именем."""
+
+    def register(func):
+        func.per_rows = per_rows
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+def best_of(func, repeat=3):
+    """Лучшее время из нескольких запусков, в секундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def peak_memory_mb(func):
+    """Пиковое выделение памяти Python во время вызова, в МБ."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def mean_of(func, count):
+    """Среднее время одного вызова func(i) для i в range(count), в секундах."""
+    started = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return (time.perf_counter() - started) / count
+
+
+def seed_users(count, prefix="bench"):
+    """Создаёт count атлетов одной пачкой."""
+    return User.objects.bulk_create(
+        User(username=f"{prefix}_{i}", password="!", first_name="Имя", last_name="Ф")
+        for i in range(count)
+    )
+
+
+@benchmark("serialization", per_rows=True)
+def serialization_benchmark(rows):
+    """Сериализация списков забегов и пользователей: DRF против values()."""
+
+    from .fast_serializers import run_rows, user_rows
+    from .serializers import RunSerializer, UserBaseSerializer
+    from .views import UserViewSet
+
+    athletes = seed_users(rows)
+    Run.objects.bulk_create(
+        Run(athlete=athletes[i % len(athletes)], comment=f"run {i}", distance=5.0)
+        for i in range(rows)
+    )
+
+    view = UserViewSet()
+    view.request = SimpleNamespace(query_params={})
+    runs = Run.objects.select_related("athlete")
+    users = view.get_queryset()
+
+    return {
+        "runs_drf": best_of(lambda: RunSerializer(runs, many=True).data),
+        "runs_fast": best_of(lambda: run_rows.serialize(runs)),
+        "users_drf": best_of(lambda: UserBaseSerializer(users, many=True).data),
+        "users_fast": best_of(lambda: user_rows.serialize(users)),
+    }
+
+
+@benchmark("json", per_rows=True)
+def json_benchmark(rows):
+    """Рендеринг и парсинг типичных ответов: стандартный json против orjson."""
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from .renderers import FastJSONParser, FastJSONRenderer
+    from .serializers import PositionSerializer, RunSerializer
+
+    started = timezone.now()
+    athlete = User(id=1, username="bench", first_name="Имя", last_name="Ф")
+    positions = PositionSerializer(
+        [
+            Position(
+                id=i,
+                run_id=1,
+                latitude=Decimal("55.7558") + Decimal(i % 1000) / 10000,
+                longitude=Decimal("37.6173"),
+                created_at=started,
+                date_time=started + timedelta(seconds=i),
+                speed=3.12,
+                distance=i / 100,
+            )
+            for i in range(rows)
+        ],
+        many=True,
+    ).data
+    runs = RunSerializer(
+        [
+            Run(id=i, athlete=athlete, comment="забег", created_at=started)
+            for i in range(rows)
+        ],
+        many=True,
+    ).data
+
+    def parse(parser, body):
+        return lambda: parser.parse(BytesIO(body), parser_context={})
+
+    positions_body = JSONRenderer().render(positions)
+    return {
+        "render_positions_json": best_of(lambda: JSONRenderer().render(positions)),
+        "render_positions_orjson": best_of(
+            lambda: FastJSONRenderer().render(positions)
+        ),
+        "render_runs_json": best_of(lambda: JSONRenderer().render(runs)),
+        "render_runs_orjson": best_of(lambda: FastJSONRenderer().render(runs)),
+        "parse_positions_json": best_of(parse(JSONParser(), positions_body)),
+        "parse_positions_orjson": best_of(parse(FastJSONParser(), positions_body)),
+    }
+
+
+@benchmark("streaming", per_rows=True)
+def streaming_benchmark(rows):
+    """
+    Память и время отдачи /api/positions/?run= целиком, потоком,
+    в компактном формате и со сжатием gzip.
+    """
+
+    from django.test import Client
+
+    athlete = seed_users(1, prefix="stream")[0]
+    run = Run.objects.create(athlete=athlete, comment="bench")
+    started = timezone.now()
+    Position.objects.bulk_create(
+        (
+            Position(
+                run=run,
+                latitude=Decimal("55.7558"),
+                longitude=Decimal("37.6173"),
+                date_time=started + timedelta(seconds=i),
+                speed=3.1,
+                distance=i / 100,
+            )
+            for i in range(rows)
+        ),
+        batch_size=1000,
+    )
+
+    client = Client()
+    url = f"/api/positions/?run={run.id}"
+
+    def regular():
+        client.get(url).content
+
+    def streamed():
+        for _ in client.get(url + "&stream=1").streaming_content:
+            pass
+
+    def compact():
+        client.get(url + "&format=compact").content
+
+    def gzipped():
+        client.get(url, HTTP_ACCEPT_ENCODING="gzip").content
+
+    return {
+        "regular": best_of(regular),
+        "streamed": best_of(streamed),
+        "compact": best_of(compact),
+        "regular_gzip": best_of(gzipped),
+        "regular_peak_mb": peak_memory_mb(regular),
+        "streamed_peak_mb": peak_memory_mb(streamed),
+    }
+
+
+# ------------------------------------------------------------------
+#          Основные сценарии API на синтетических данных
+# ------------------------------------------------------------------
+
+# Сколько запросов делать в бенчмарках, которые меняют данные
+MAX_REQUESTS = 200
+
+
+def _client():
+    from django.test import Client
+
+    return Client()
+
+
+@benchmark("ingest")
+def ingest_benchmark(rows):
+    """POST /api/positions/ с каталогом из rows/10 коллекционных предметов."""
+
+    from .seeding import seed_dataset
+
+    seed_dataset(athletes=1, coaches=0, runs=0, positions=0, items=max(rows // 10, 1))
+    athlete = User.objects.get(username="seed_athlete_0")
+    run = Run.objects.create(athlete=athlete, comment="bench")
+    Run.objects.filter(pk=run.pk).update(status=Run.Status.IN_PROGRESS)
+
+    client = _client()
+    started = timezone.now()
+
+    def post(i):
+        response = client.post(
+            "/api/positions/",
+            {
+                "run": run.id,
+                "latitude": round(55.7558 + i / 10000, 4),
+                "longitude": 37.6173,
+                "date_time": (started + timedelta(seconds=5 * i)).strftime(
+                    "%Y-%m-%dT%H:%M:%S.%f"
+                ),
+            },
+            content_type="application/json",
+        )
+        # замеряем запись точки, а не отказ троттлинга или фильтра
+        assert response.status_code == 201, response.status_code
+
+    # троттлинг приёма точек (runs/throttling.py) в замере не участвует
+    with override_settings(INGEST_RUN_RATE=0, INGEST_ATHLETE_RATE=0):
+        return {"post_position": mean_of(post, min(rows, MAX_REQUESTS))}
+
+
+@benchmark("finish")
+def finish_benchmark(rows):
+    """POST /api/runs/<id>/stop/ для забегов с треками по rows/20 точек."""
+
+    from .seeding import seed_dataset
+
+    seed_dataset(athletes=5, coaches=1, runs=20, positions=rows, items=0)
+    runs = list(Run.objects.values_list("id", flat=True))
+    Run.objects.update(status=Run.Status.IN_PROGRESS)
+
+    client = _client()
+    return {
+        "run_stop": mean_of(
+            lambda i: client.post(f"/api/runs/{runs[i]}/stop/"), len(runs)
+        )
+    }
+
+
+@benchmark("users")
+def users_benchmark(rows):
+    """GET /api/users/ при rows/100 атлетах и rows/10 забегах."""
+
+    from .seeding import seed_dataset
+
+    seed_dataset(
+        athletes=max(rows // 100, 1), coaches=10, runs=rows // 10, positions=0, items=0
+    )
+    client = _client()
+    return {"users_list": best_of(lambda: client.get("/api/users/"))}
+
+
+@benchmark("analytics")
+def analytics_benchmark(rows):
+    """GET /api/analytics_for_coach/<id>/ для тренера всех сгенерированных атлетов."""
+
+    from .seeding import seed_dataset
+
+    seed_dataset(
+        athletes=max(rows // 100, 1), coaches=1, runs=rows // 10, positions=0, items=0
+    )
+    coach = User.objects.get(username="seed_coach_0")
+    client = _client()
+    url = f"/api/analytics_for_coach/{coach.id}/"
+    return {"analytics_for_coach": best_of(lambda: client.get(url))}
+
+
+@benchmark("challenges")
+def challenges_benchmark(rows):
+    """GET /api/challenges_summary/ при трёх челленджах у rows/10 атлетов."""
+
+    athletes = seed_users(max(rows // 10, 1), prefix="challenge")
+    Challenge.objects.bulk_create(
+        Challenge(athlete=athlete, full_name=name)
+        for athlete in athletes
+        for name in (Challenge.TEN_RUNS, Challenge.FIFTY_KM, Challenge.FAST_TWO_KM)
+    )
+    client = _client()
+    return {
+        "challenges_summary": best_of(lambda: client.get("/api/challenges_summary/"))
+    }
+
+
+@benchmark("upload")
+def upload_benchmark(rows):
+    """POST /api/upload_file/ с Excel-файлом на rows/10 предметов."""
+
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Name", "UID", "Value", "Latitude", "Longitude", "URL"])
+    for i in range(max(rows // 10, 1)):
+        sheet.append(
+            [f"Item {i}", f"bench-{i}", 10, 55.75, 37.61, "https://example.com/i.png"]
+        )
+    body = BytesIO()
+    workbook.save(body)
+
+    client = _client()
+    upload = SimpleUploadedFile("items.xlsx", body.getvalue())
+    started = time.perf_counter()
+    client.post("/api/upload_file/", {"file": upload})
+    return {"upload_file": time.perf_counter() - started}
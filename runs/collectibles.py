@@ -0,0 +1,258 @@
+"""
+Сбор коллекционных предметов задним числом.
+
+При приёме точки (PositionViewSet.perform_create) предметы ищутся только
+для неё, поэтому предметы из нового файла не находят уже пробежавших рядом
+атлетов. match_items сопоставляет предметы с историей точек через сетку:
+каждый предмет кладётся во все ячейки, которые задевает круг радиусом
+COLLECT_RADIUS_M, а каждая точка проверяется только с предметами своей
+ячейки. Точное расстояние (geodesic, как в API) считается лишь для этих пар.
+Номера ячеек по долготе берутся по модулю 360°, поэтому круг у антимеридиана
+попадает в ячейки по обе стороны; круг у полюса, которому нужно больше 180°
+долготы, кладётся в полосу широты целиком (ячейка (lat, None)).
+
+Здесь же фильтры каталога для карты: рамка (bbox) и радиус вокруг точки.
+"""
+
+import math
+from collections import defaultdict
+from itertools import groupby
+from operator import attrgetter
+
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Q
+from django.db.models.functions import Abs, Least
+
+from .geo import segment_meters
+from .models import CollectibleItem, OutboxEvent, Position
+
+# Радиус сбора предмета, метры
+COLLECT_RADIUS_M = 100
+
+# Наибольший радиус поиска предметов на карте (?near=), метры
+MAX_NEAR_RADIUS_M = 50_000
+
+# Сторона ячейки сетки в градусах (~110 м по широте)
+GRID_STEP = 0.001
+
+# Ячеек сетки по долготе вокруг Земли
+LON_CELLS = round(360 / GRID_STEP)
+
+# Метров в градусе широты
+METERS_PER_DEGREE = 111_320
+
+
+def _cell(latitude, longitude):
+    return (
+        math.floor(latitude / GRID_STEP),
+        math.floor(longitude / GRID_STEP) % LON_CELLS,
+    )
+
+
+def _bbox(latitude, longitude, radius_m):
+    """
+    (min_lat, max_lat, min_lon, max_lon) круга радиусом radius_m. Долготы
+    могут выйти за ±180 (см. _lon_range); если круг задевает полюс или
+    шире 360° по долготе — полоса широт, долготы -180..180.
+    """
+    dlat = radius_m / METERS_PER_DEGREE
+    # шире всего круг по долготе на ближней к полюсу широте
+    cos_edge = math.cos(math.radians(min(abs(latitude) + dlat, 90)))
+    if dlat >= 180 * cos_edge:
+        return latitude - dlat, latitude + dlat, -180.0, 180.0
+    dlon = dlat / cos_edge
+    return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
+
+
+def _lon_range(min_lon, max_lon):
+    """
+    Диапазон долгот из _bbox в пределах ±180: край за 180° переносится на
+    другую сторону (min_lon > max_lon — через антимеридиан, как в in_bbox).
+    """
+    if max_lon - min_lon >= 360:
+        return -180.0, 180.0
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lon, max_lon
+
+
+def build_grid(items, radius_m=COLLECT_RADIUS_M):
+    """
+    Ячейка → [(id, lat, lon)] для всех ячеек, которые задевает радиус
+    предмета; (lat_cell, None) — вся полоса широты.
+    """
+
+    grid = defaultdict(list)
+    for item in items:
+        min_lat, max_lat, min_lon, max_lon = _bbox(item[1], item[2], radius_m)
+        lat_cells = range(_cell(min_lat, 0)[0], _cell(max_lat, 0)[0] + 1)
+        if max_lon - min_lon >= 360:
+            for lat_cell in lat_cells:
+                grid[lat_cell, None].append(item)
+            continue
+        lon_from = math.floor(min_lon / GRID_STEP)
+        lon_to = math.floor(max_lon / GRID_STEP)
+        for lat_cell in lat_cells:
+            for lon_cell in range(lon_from, lon_to + 1):
+                grid[lat_cell, lon_cell % LON_CELLS].append(item)
+    return grid
+
+
+def match_chunk(items, radius_m=COLLECT_RADIUS_M):
+    """
+    Пары (item_id, athlete_id) для предметов items — [(id, lat, lon)].
+    Точки читаются одним потоковым запросом по общей рамке предметов.
+    """
+
+    grid = build_grid(items, radius_m)
+    boxes = [_bbox(lat, lon, radius_m) for _, lat, lon in items]
+    min_lon, max_lon = _lon_range(
+        min(box[2] for box in boxes), max(box[3] for box in boxes)
+    )
+    positions = (
+        in_bbox(
+            Position.objects,
+            min_lon,
+            min(box[0] for box in boxes),
+            max_lon,
+            max(box[1] for box in boxes),
+        )
+        .values_list("run__athlete_id", "latitude", "longitude")
+        .iterator(chunk_size=5000)
+    )
+
+    pairs = set()
+    for athlete_id, latitude, longitude in positions:
+        point = (float(latitude), float(longitude))
+        lat_cell, lon_cell = _cell(*point)
+        candidates = grid.get((lat_cell, lon_cell), []) + grid.get((lat_cell, None), [])
+        for item_id, item_lat, item_lon in candidates:
+            if (item_id, athlete_id) in pairs:
+                continue
+            if segment_meters(point, (item_lat, item_lon)) <= radius_m:
+                pairs.add((item_id, athlete_id))
+    return pairs
+
+
+def match_items(item_ids=None, chunk_size=500, batch_size=1000):
+    """
+    Отмечает предметы собранными всеми атлетами, чьи точки были в радиусе,
+    и пишет событие items.collected на каждого атлета с новыми предметами.
+    item_ids=None — все предметы. Возвращает число новых связей.
+    """
+
+    items = CollectibleItem.objects.order_by("latitude", "longitude")
+    if item_ids is not None:
+        items = items.filter(pk__in=item_ids)
+    items = list(items.values_list("id", "latitude", "longitude"))
+
+    # соседние по широте предметы в одном куске — рамка запроса точек меньше
+    Through = CollectibleItem.collected_by.through
+    created = 0
+    for start in range(0, len(items), chunk_size):
+        pairs = match_chunk(items[start : start + chunk_size])
+        if not pairs:
+            continue
+
+        existing = set(
+            Through.objects.filter(
+                collectibleitem_id__in={item_id for item_id, _ in pairs}
+            ).values_list("collectibleitem_id", "user_id")
+        )
+        links = [
+            Through(collectibleitem_id=item_id, user_id=athlete_id)
+            for item_id, athlete_id in sorted(pairs - existing)
+        ]
+        with transaction.atomic():
+            Through.objects.bulk_create(
+                links, batch_size=batch_size, ignore_conflicts=True
+            )
+            # для таблиц лидеров: по событию на атлета
+            for athlete_id, group in groupby(
+                sorted(links, key=attrgetter("user_id")), key=attrgetter("user_id")
+            ):
+                collected = [link.collectibleitem_id for link in group]
+                OutboxEvent.emit(
+                    OutboxEvent.ITEMS_COLLECTED, athlete_id, items=collected
+                )
+        created += len(links)
+    return created
+
+
+def parse_bbox(value):
+    """
+    "min_lon,min_lat,max_lon,max_lat" → кортеж float (порядок как в GeoJSON).
+    min_lon > max_lon — рамка через антимеридиан.
+    """
+
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox: min_lon,min_lat,max_lon,max_lat")
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox: широта от -90 до 90, min_lat <= max_lat")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError("bbox: долгота от -180 до 180")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_point(value):
+    """ "lat,lon" → (lat, lon)."""
+    try:
+        latitude, longitude = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("near: lat,lon")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("near: координаты вне диапазона")
+    return latitude, longitude
+
+
+def bbox_center(min_lon, min_lat, max_lon, max_lat):
+    """Центр рамки (lat, lon); у рамки через антимеридиан — за 180°."""
+
+    if min_lon > max_lon:
+        max_lon += 360
+    center = (min_lon + max_lon) / 2
+    return (min_lat + max_lat) / 2, center - 360 if center > 180 else center
+
+
+def in_bbox(queryset, min_lon, min_lat, max_lon, max_lat):
+    """Предметы внутри рамки; диапазоны по индексу (latitude, longitude)."""
+
+    queryset = queryset.filter(latitude__range=(min_lat, max_lat))
+    if min_lon <= max_lon:
+        return queryset.filter(longitude__range=(min_lon, max_lon))
+    return queryset.filter(Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon))
+
+
+def by_distance(queryset, latitude, longitude):
+    """
+    Сортирует по расстоянию до точки и добавляет distance_sq — квадрат
+    расстояния в градусах широты (равнопромежуточная проекция: на масштабе
+    карты ошибка — доли процента). Разница долгот берётся короткой
+    дугой, через антимеридиан тоже.
+    """
+
+    scale = math.cos(math.radians(latitude))
+    delta = Abs(F("longitude") - longitude)
+    dlon = Least(delta, 360 - delta)
+    squared = ExpressionWrapper(
+        (F("latitude") - latitude) * (F("latitude") - latitude)
+        + dlon * dlon * scale * scale,
+        output_field=FloatField(),
+    )
+    return queryset.annotate(distance_sq=squared).order_by("distance_sq", "id")
+
+
+def near(queryset, latitude, longitude, radius_m):
+    """Предметы в радиусе radius_m от точки, ближайшие первыми."""
+
+    min_lat, max_lat, min_lon, max_lon = _bbox(latitude, longitude, radius_m)
+    min_lon, max_lon = _lon_range(min_lon, max_lon)
+    queryset = in_bbox(queryset, min_lon, min_lat, max_lon, max_lat)
+    radius_deg = radius_m / METERS_PER_DEGREE
+    return by_distance(queryset, latitude, longitude).filter(
+        distance_sq__lte=radius_deg * radius_deg
+    )
@@ -0,0 +1,108 @@
+"""
+Компактное представление точек трека (?format=compact).
+
+Вместо списка объектов — столбцы. Значения переводятся в целые числа
+(координаты в 1e-4 градуса, время в миллисекунды Unix, скорость в см/с,
+дистанция в метры, см. SCALE) и кодируются разностью с предыдущим
+значением столбца: у соседних точек трека они почти совпадают, и в JSON
+остаются короткие числа. null остаётся null и базу для следующей
+разности не меняет. Скорость, дистанция и время округляются до своей
+единицы, координаты передаются точно.
+
+    {"count": 3, "scale": {...}, "columns": {"latitude": [557558, 2, -1], ...}}
+
+Значение i-й точки — сумма первых i + 1 элементов столбца, делённая на
+scale (без scale — как есть: id и run).
+"""
+
+from datetime import datetime, timezone
+
+COLUMNS = (
+    "id",
+    "run",
+    "latitude",
+    "longitude",
+    "date_time",
+    "created_at",
+    "speed",
+    "distance",
+)
+
+SCALE = {
+    "latitude": 10_000,
+    "longitude": 10_000,
+    "date_time": 1000,
+    "created_at": 1000,
+    "speed": 100,
+    "distance": 1000,  # км → м
+}
+
+
+def _scaled(scale):
+    return lambda value: round(value * scale)
+
+
+def _epoch_ms(value):
+    return round(value.timestamp() * 1000)
+
+
+_CONVERTERS = {
+    "id": int,
+    "run": int,
+    # Decimal с 4 знаками: умножение точное
+    "latitude": lambda value: int(value * SCALE["latitude"]),
+    "longitude": lambda value: int(value * SCALE["longitude"]),
+    "date_time": _epoch_ms,
+    "created_at": _epoch_ms,
+    "speed": _scaled(SCALE["speed"]),
+    "distance": _scaled(SCALE["distance"]),
+}
+
+
+def _deltas(values, convert):
+    result = []
+    append = result.append
+    last = 0
+    for value in values:
+        if value is None:
+            append(None)
+            continue
+        value = convert(value)
+        append(value - last)
+        last = value
+    return result
+
+
+def encode_track(queryset):
+    """Столбцы точек queryset в порядке забег → время."""
+
+    rows = queryset.order_by("run_id", "date_time", "id").values_list(*COLUMNS)
+    columns = list(zip(*rows)) or [()] * len(COLUMNS)
+    return {
+        "count": len(columns[0]),
+        "scale": SCALE,
+        "columns": {
+            name: _deltas(values, _CONVERTERS[name])
+            for name, values in zip(COLUMNS, columns)
+        },
+    }
+
+
+def decode_track(data):
+    """Обратно в список словарей; время — datetime в UTC (для клиентов и тестов)."""
+
+    columns = {}
+    for name, deltas in data["columns"].items():
+        scale = data["scale"].get(name)
+        values, total = [], 0
+        for delta in deltas:
+            if delta is None:
+                values.append(None)
+                continue
+            total += delta
+            if name in ("date_time", "created_at"):
+                values.append(datetime.fromtimestamp(total / scale, tz=timezone.utc))
+            else:
+                values.append(total / scale if scale else total)
+        columns[name] = values
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
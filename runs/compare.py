@@ -0,0 +1,122 @@
+"""
+Сравнение двух забегов («забег с тенью»).
+
+Треки выравниваются по накопленной дистанции (Position.distance): для
+каждой отметки через step метров время каждого забега находится линейной
+интерполяцией между соседними точками. Отметки и точки отсортированы,
+поэтому интерполяция — один проход по обоим спискам, без поиска для
+каждой отметки. Сравнение завершённых забегов кэшируется.
+"""
+
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Position, Run
+
+# Больше отметок не отдаём: шаг увеличивается
+MAX_SAMPLES = 1000
+
+
+def track_profile(rows):
+    """
+    (дистанция в метрах, секунды от старта) по точкам (distance_km, date_time).
+    Точки без времени и без продвижения по дистанции пропускаются.
+    """
+
+    profile = []
+    started = None
+    for distance_km, date_time in rows:
+        if date_time is None:
+            continue
+        if started is None:
+            started = date_time
+        meters = (distance_km or 0.0) * 1000
+        if profile and meters <= profile[-1][0]:
+            continue
+        profile.append((meters, (date_time - started).total_seconds()))
+    return profile
+
+
+def interpolate(profile, targets):
+    """
+    Время на отметках targets (по возрастанию) по профилю (метры, секунды).
+    Отметки за концом профиля не возвращаются.
+    """
+
+    times = []
+    i = 0
+    for target in targets:
+        while i + 1 < len(profile) and profile[i + 1][0] < target:
+            i += 1
+        if i + 1 >= len(profile):
+            if profile and profile[-1][0] == target:
+                times.append(profile[-1][1])
+            break
+        (x0, t0), (x1, t1) = profile[i], profile[i + 1]
+        if target <= x0:
+            times.append(t0)
+        else:
+            times.append(t0 + (t1 - t0) * (target - x0) / (x1 - x0))
+    return times
+
+
+def compare_runs(run, other, step=100):
+    """
+    Отставание run от other каждые step метров общей дистанции.
+    gap > 0 — run на этой отметке медленнее.
+    """
+
+    positions = (
+        Position.objects.filter(run_id__in=[run.pk, other.pk])
+        .order_by("run_id", "date_time", "id")
+        .values_list("run_id", "distance", "date_time")
+    )
+    profiles = {run.pk: [], other.pk: []}
+    for run_id, rows in groupby(positions, key=itemgetter(0)):
+        profiles[run_id] = track_profile(row[1:] for row in rows)
+
+    mine, theirs = profiles[run.pk], profiles[other.pk]
+    if len(mine) < 2 or len(theirs) < 2:
+        raise ValueError("У забега меньше двух точек с временем и дистанцией")
+
+    common = min(mine[-1][0], theirs[-1][0])
+    step = max(step, common / MAX_SAMPLES)
+    count = int(common // step) + 1
+    targets = [round(n * step, 1) for n in range(count)]
+
+    samples = [
+        {
+            "distance": target,
+            "time": round(time, 1),
+            "other_time": round(other_time, 1),
+            "gap": round(time - other_time, 1),
+        }
+        for target, time, other_time in zip(
+            targets, interpolate(mine, targets), interpolate(theirs, targets)
+        )
+    ]
+    return {
+        "run": run.pk,
+        "other": other.pk,
+        "step": round(step, 1),
+        "distance": round(common, 1),
+        "samples": samples,
+    }
+
+
+def cached_compare(run, other, step=100):
+    """compare_runs с кэшем для пары завершённых забегов."""
+
+    finished = run.status == other.status == Run.Status.FINISHED
+    if not finished:
+        return compare_runs(run, other, step)
+
+    key = f"compare:{run.pk}:{other.pk}:{step}"
+    data = cache.get(key)
+    if data is None:
+        data = compare_runs(run, other, step)
+        cache.set(key, data, getattr(settings, "COMPARE_CACHE_SECONDS", 86400))
+    return data
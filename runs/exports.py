@@ -0,0 +1,154 @@
+"""
+Экспорт треков забегов (GPX, CSV, NDJSON и zip-архив всех забегов атлета).
+
+Всё генерируется по частям: точки читаются из таблицы Position через
+.iterator(), трек целиком в памяти не собирается.
+"""
+
+import csv
+import io
+import zipfile
+from itertools import groupby
+from operator import itemgetter
+
+from .fast_serializers import position_rows
+from .gpx import format_time, write_gpx
+from .models import Position, Run
+from .streaming import encode_stream
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Размер кусков, которыми ответ уходит клиенту
+BUFFER_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    "gpx": "application/gpx+xml",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+CSV_HEADER = ["date_time", "latitude", "longitude", "speed", "distance"]
+
+
+def _positions(run):
+    return Position.objects.filter(run=run).order_by("date_time", "id")
+
+
+def _buffered(chunks):
+    """Склеивает мелкие куски в блоки по BUFFER_SIZE байт."""
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= BUFFER_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _gpx(run, points):
+    return write_gpx(run, points)
+
+
+def _csv(run, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+
+    for date_time, latitude, longitude, speed, distance in rows:
+        writer.writerow([format_time(date_time), latitude, longitude, speed, distance])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _ndjson(run, rows):
+    return encode_stream(rows, ndjson=True)
+
+
+EXPORTERS = {"gpx": _gpx, "csv": _csv, "ndjson": _ndjson}
+
+# Колонки Position для каждого формата (ndjson — все поля PositionSerializer)
+FIELDS = {"gpx": ("latitude", "longitude", "date_time"), "csv": CSV_HEADER}
+
+
+def _track_rows(export_format, positions):
+    """Пары (run_id, строка трека) для writer-а нужного формата."""
+
+    if export_format == "ndjson":
+        for row in position_rows.iterate(positions, chunk_size=EXPORT_CHUNK_SIZE):
+            yield row["run"], row
+        return
+
+    rows = positions.values_list("run_id", *FIELDS[export_format])
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield row[0], row[1:]
+
+
+def export_run(run, export_format):
+    """Возвращает итератор байтов трека в нужном формате."""
+    rows = (row for _, row in _track_rows(export_format, _positions(run)))
+    return _buffered(EXPORTERS[export_format](run, rows))
+
+
+def export_filename(run, export_format):
+    return f"run_{run.pk}.{export_format}"
+
+
+class _ZipStream:
+    """
+    Несикаемый поток для zipfile: всё записанное копится до pop().
+    zipfile в таком режиме пишет data descriptor после каждого файла,
+    поэтому архив можно отдавать клиенту по мере формирования.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_athlete_runs(athlete, export_format="gpx"):
+    """Zip-архив со всеми забегами атлета, по файлу на забег."""
+
+    stream = _ZipStream()
+    # Список забегов небольшой — читаем заранее, чтобы не держать два курсора
+    runs = list(Run.objects.filter(athlete=athlete).order_by("id"))
+
+    # Точки всех забегов — одним запросом, по порядку забегов
+    positions = Position.objects.filter(run__athlete=athlete).order_by(
+        "run_id", "date_time", "id"
+    )
+    tracks = groupby(_track_rows(export_format, positions), key=itemgetter(0))
+    track = next(tracks, None)
+
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for run in runs:
+            matched = track is not None and track[0] == run.pk
+            rows = (row for _, row in track[1]) if matched else ()
+
+            name = export_filename(run, export_format)
+            with archive.open(name, "w", force_zip64=True) as entry:
+                for chunk in _buffered(EXPORTERS[export_format](run, rows)):
+                    entry.write(chunk)
+                    data = stream.pop()
+                    if data:
+                        yield data
+
+            if matched:
+                track = next(tracks, None)
+
+    yield stream.pop()
@@ -0,0 +1,211 @@
+"""
+Быстрая сериализация больших списков без создания объектов моделей.
+
+Схема полей берётся из обычного DRF-сериализатора и компилируется один раз:
+для каждого поля запоминается путь для values_list() и функция-конвертер.
+Результат побайтно совпадает с serializer.data после рендеринга в JSON.
+"""
+
+from functools import cached_property
+
+from rest_framework import serializers
+from rest_framework.fields import ISO_8601
+from rest_framework.settings import api_settings
+
+from .serializers import PositionSerializer, RunSerializer, UserBaseSerializer
+
+# Виды элементов схемы
+_VALUE, _NESTED, _COMPUTED = 0, 1, 2
+
+# Поля, у которых to_representation сводится к приведению типа
+_CASTS = {
+    serializers.IntegerField.to_representation: int,
+    serializers.FloatField.to_representation: float,
+    serializers.CharField.to_representation: str,
+}
+
+
+def _identity(value):
+    return value
+
+
+def _datetime_converter(field):
+    """Конвертер даты-времени с тем же форматом и часовым поясом, что у поля."""
+
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _converter(field):
+    """Подбирает самый дешёвый конвертер, эквивалентный field.to_representation."""
+
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        # values_list() по FK уже отдаёт первичный ключ
+        return _identity if field.pk_field is None else field.pk_field.to_representation
+
+    cast = _CASTS.get(type(field).to_representation)
+    if cast is not None:
+        return cast
+
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Сериализует queryset через values_list() по схеме DRF-сериализатора.
+
+    computed — значения для SerializerMethodField:
+    {"field": (("lookup", ...), func)}, func получает значения lookup-ов.
+    """
+
+    def __init__(self, serializer_class, computed=None):
+        self.serializer_class = serializer_class
+        self.computed = computed or {}
+        self._schemas = {}
+
+    @cached_property
+    def field_names(self):
+        """Поля ответа в порядке сериализатора."""
+        return [
+            name
+            for name, field in self.serializer_class().fields.items()
+            if not field.write_only
+        ]
+
+    def _schema(self, fields=None):
+        """
+        Схема (без привязки к часовому поясу) и список lookup-ов для полей
+        верхнего уровня fields (None — все). Lookup-ы пропущенных полей не
+        попадают в values_list(), то есть и JOIN-ы под них.
+        """
+
+        key = None if fields is None else tuple(fields)
+        if key not in self._schemas:
+            self._schemas[key] = self._compile(key)
+        return self._schemas[key]
+
+    def _compile(self, fields):
+        lookups = []
+
+        def lookup_index(lookup):
+            if lookup not in lookups:
+                lookups.append(lookup)
+            return lookups.index(lookup)
+
+        def compile_fields(serializer, prefix):
+            schema = []
+            for name, field in serializer.fields.items():
+                if field.write_only:
+                    continue
+                if not prefix and fields is not None and name not in fields:
+                    continue
+
+                if not prefix and name in self.computed:
+                    sources, func = self.computed[name]
+                    indexes = tuple(lookup_index(s) for s in sources)
+                    schema.append((name, _COMPUTED, indexes, func))
+                    continue
+
+                if isinstance(field, serializers.SerializerMethodField):
+                    raise TypeError(
+                        f"Для поля {name!r} нужно описать computed-значение"
+                    )
+
+                path = prefix + "__".join(field.source_attrs)
+
+                if isinstance(field, serializers.BaseSerializer):
+                    if isinstance(field, serializers.ListSerializer):
+                        raise TypeError(f"Поле {name!r}: many=True не поддерживается")
+                    pk_index = lookup_index(path)
+                    nested = compile_fields(field, path + "__")
+                    schema.append((name, _NESTED, pk_index, nested))
+                    continue
+
+                schema.append((name, _VALUE, lookup_index(path), field))
+            return schema
+
+        schema = compile_fields(self.serializer_class(), "")
+        return schema, tuple(lookups)
+
+    @property
+    def lookups(self):
+        return self._schema()[1]
+
+    def _bind(self, schema):
+        """Привязывает конвертеры к текущим настройкам (часовой пояс и т.п.)."""
+
+        plan = []
+        for name, kind, index, payload in schema:
+            if kind == _VALUE:
+                payload = _converter(payload)
+            elif kind == _NESTED:
+                payload = self._bind(payload)
+            plan.append((name, kind, index, payload))
+        return plan
+
+    def to_representation(self, row, plan):
+        data = {}
+        for name, kind, index, payload in plan:
+            if kind == _VALUE:
+                value = row[index]
+                data[name] = None if value is None else payload(value)
+            elif kind == _NESTED:
+                data[name] = (
+                    None if row[index] is None else self.to_representation(row, payload)
+                )
+            else:
+                data[name] = payload(*(row[i] for i in index))
+        return data
+
+    def serialize(self, queryset, fields=None):
+        """
+        Возвращает список словарей, как serializer_class(qs, many=True).data.
+        fields — только эти поля верхнего уровня (см. runs/fieldsets.py).
+        """
+
+        schema, lookups = self._schema(fields)
+        plan = self._bind(schema)
+        return [
+            self.to_representation(row, plan) for row in queryset.values_list(*lookups)
+        ]
+
+    def iterate(self, queryset, chunk_size, fields=None):
+        """
+        Ленивая версия serialize(): строки читаются из БД порциями
+        через .iterator(), в памяти не держится весь список.
+        """
+
+        schema, lookups = self._schema(fields)
+        plan = self._bind(schema)
+        rows = queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+        return (self.to_representation(row, plan) for row in rows)
+
+
+def _user_type(is_staff):
+    return "coach" if is_staff else "athlete"
+
+
+run_rows = RowSerializer(RunSerializer)
+position_rows = RowSerializer(PositionSerializer)
+user_rows = RowSerializer(
+    UserBaseSerializer,
+    computed={"type": (("is_staff",), _user_type)},
+)
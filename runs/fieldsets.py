@@ -0,0 +1,88 @@
+"""
+Выбор полей ответа: ?fields=id,status — только эти поля,
+?omit=athlete_data — все, кроме этих (верхнего уровня).
+
+Поля убираются из сериализатора (SparseFieldsMixin) и из быстрого
+values()-сериализатора (RowSerializer), а view по Fieldset решает, нужны
+ли JOIN-ы и аннотации под эти поля.
+"""
+
+from rest_framework.exceptions import ValidationError
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def _names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class Fieldset:
+    """Разобранные ?fields= и ?omit=."""
+
+    def __init__(self, fields=None, omit=()):
+        self.fields = None if fields is None else tuple(fields)
+        self.omit = frozenset(omit)
+
+    @classmethod
+    def from_request(cls, request):
+        """Fieldset из параметров запроса или None, если поля не выбирались."""
+
+        params = getattr(request, "query_params", None) or {}
+        if "fields" not in params and "omit" not in params:
+            return None
+        fields = _names(params["fields"]) if "fields" in params else None
+        return cls(fields, _names(params.get("omit", "")))
+
+    def __contains__(self, name):
+        if self.fields is not None and name not in self.fields:
+            return False
+        return name not in self.omit
+
+    def select(self, available):
+        """
+        Поля из available, которые остаются в ответе, в их исходном порядке.
+        Неизвестное имя — ошибка 400.
+        """
+
+        unknown = [
+            name for name in (*(self.fields or ()), *self.omit) if name not in available
+        ]
+        if unknown:
+            raise ValidationError(
+                {"error": f"Неизвестные поля: {', '.join(sorted(set(unknown)))}"}
+            )
+        return [name for name in available if name in self]
+
+
+def selected(request, available):
+    """Поля ответа для запроса или None (все), если ?fields/?omit нет."""
+
+    fieldset = Fieldset.from_request(request)
+    return None if fieldset is None else fieldset.select(available)
+
+
+def wants(request, name):
+    """Нужно ли поле name в ответе на этот запрос."""
+
+    fieldset = Fieldset.from_request(request)
+    return fieldset is None or name in fieldset
+
+
+class SparseFieldsMixin:
+    """
+    Сериализатор оставляет только поля, выбранные в запросе из контекста.
+    Работает для чтения: при записи нужны все поля.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if getattr(request, "method", None) not in READ_METHODS:
+            return
+
+        fieldset = Fieldset.from_request(request)
+        if fieldset is not None:
+            keep = set(fieldset.select(list(self.fields)))
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
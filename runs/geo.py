@@ -0,0 +1,61 @@
+"""
+Геометрия треков: расстояния между точками и показатели отрезков.
+
+geopy импортируется при первом вызове segment_meters: модуль нужен моделям,
+а geopy — только приёму точек (~25 мс на холодном старте).
+"""
+
+from haversine import Unit, haversine
+
+
+def haversine_km(prev_point, point):
+    """Расстояние между двумя точками (lat, lon) по гаверсинусам, в километрах."""
+    return haversine(
+        (float(prev_point[0]), float(prev_point[1])),
+        (float(point[0]), float(point[1])),
+        unit=Unit.KILOMETERS,
+    )
+
+
+def track_distance_km(points):
+    """
+    Длина трека в километрах по формуле гаверсинусов.
+    points — итерируемое из пар (latitude, longitude).
+    """
+
+    total_km = 0.0
+    prev = None
+    for point in points:
+        if prev is not None:
+            total_km += haversine_km(prev, point)
+        prev = point
+    return total_km
+
+
+def segment_meters(prev_point, point):
+    """Геодезическое расстояние между двумя точками (lat, lon) в метрах."""
+    from geopy.distance import geodesic
+
+    return geodesic(
+        (float(prev_point[0]), float(prev_point[1])),
+        (float(point[0]), float(point[1])),
+    ).meters
+
+
+def segment_metrics(prev, point, prev_distance_km):
+    """
+    Скорость (м/с) и накопленная дистанция (км) для новой точки трека.
+    prev и point — кортежи (latitude, longitude, date_time).
+    Округление такое же, как при приёме точек через API.
+    """
+
+    segment_m = segment_meters(prev, point)
+
+    if point[2] and prev[2]:
+        delta = (point[2] - prev[2]).total_seconds()
+    else:
+        delta = 0
+
+    speed = segment_m / delta if delta > 0 else 0.0
+    distance_km = (prev_distance_km or 0.0) + (segment_m / 1000.0)
+    return round(speed, 2), round(distance_km, 2)
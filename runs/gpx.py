@@ -0,0 +1,99 @@
+"""Чтение и запись треков в формате GPX 1.1."""
+
+from datetime import UTC
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+GPX_NAMESPACE = "http://www.topografix.com/GPX/1/1"
+
+
+def format_time(value):
+    """Время точки в UTC с микросекундами: 2024-10-12T14:30:15.123456Z."""
+    if value is None:
+        return ""
+    return value.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def write_gpx(run, points):
+    """
+    Генерирует GPX-документ по частям.
+    points — итератор кортежей (latitude, longitude, date_time).
+    """
+
+    creator = quoteattr(getattr(settings, "COMPANY_NAME", "Company"))
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<gpx version="1.1" creator={creator} xmlns="{GPX_NAMESPACE}">\n'
+        f"<trk><name>Run #{run.pk}</name><desc>{escape(run.comment)}</desc>"
+        "<trkseg>\n"
+    ).encode()
+
+    for latitude, longitude, date_time in points:
+        time = f"<time>{format_time(date_time)}</time>" if date_time else ""
+        yield f'<trkpt lat="{latitude}" lon="{longitude}">{time}</trkpt>\n'.encode()
+
+    yield b"</trkseg></trk>\n</gpx>\n"
+
+
+def _local_name(tag):
+    """Имя тега без пространства имён: GPX 1.0 и 1.1 читаются одинаково."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_time(text):
+    if not text:
+        return None
+    value = parse_datetime(text.strip())
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value
+
+
+def read_gpx(source):
+    """
+    Потоково читает GPX (файл или путь) через iterparse.
+    Генерирует кортежи (track_index, track_name, latitude, longitude, date_time);
+    прочитанные элементы сразу удаляются из дерева.
+    Некорректный XML — ElementTree.ParseError, некорректные координаты — ValueError.
+    """
+
+    track_index = -1
+    track_name = ""
+    segment = None
+
+    for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+        tag = _local_name(elem.tag)
+
+        if event == "start":
+            if tag == "trk":
+                track_index += 1
+                track_name = ""
+            elif tag == "trkseg":
+                segment = elem
+            continue
+
+        if tag == "name" and segment is None and track_index >= 0:
+            track_name = (elem.text or "").strip()
+        elif tag == "trkpt":
+            date_time = None
+            for child in elem:
+                if _local_name(child.tag) == "time":
+                    date_time = _parse_time(child.text)
+            yield (
+                max(track_index, 0),
+                track_name,
+                float(elem.attrib["lat"]),
+                float(elem.attrib["lon"]),
+                date_time,
+            )
+            # точка — последний ребёнок сегмента, удаляем её за O(1)
+            if segment is not None and len(segment) and segment[-1] is elem:
+                del segment[-1]
+        elif tag == "trkseg":
+            segment = None
+            elem.clear()
+        elif tag == "trk":
+            elem.clear()
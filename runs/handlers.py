@@ -0,0 +1,45 @@
+"""Обработчики событий outbox приложения runs (см. runs/outbox.py)."""
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .collectibles import match_items
+from .heatmap import invalidate_athlete
+from .leaderboards import record_items, record_run
+from .models import OutboxEvent
+from .outbox import handler
+
+
+@handler(OutboxEvent.ITEMS_UPLOADED)
+def match_uploaded_items(event):
+    """Новые предметы достаются атлетам, уже пробегавшим рядом."""
+    match_items(event.payload["items"])
+
+
+@handler(OutboxEvent.RUN_FINISHED)
+def refresh_heatmap(event):
+    """Тепловые карты тренеров атлета пересчитываются с новым забегом."""
+    invalidate_athlete(event.key)
+
+
+@handler(OutboxEvent.RUN_FINISHED)
+def score_run(event):
+    """
+    Дистанция и забег — в таблицы лидеров недели и месяца, в которые
+    забег закончился. Дата та же, что у rebuild_runs: finish_time, без
+    него — created_at забега (импорт старых треков не попадает в текущую
+    неделю).
+    """
+    payload = event.payload
+    moment = payload.get("finish_time") or payload.get("created_at")
+    day = timezone.localdate(parse_datetime(moment) if moment else event.created_at)
+    record_run(event.key, payload.get("distance"), day)
+
+
+@handler(OutboxEvent.POSITION_RECORDED)
+@handler(OutboxEvent.ITEMS_COLLECTED)
+def score_items(event):
+    """Ценность новых предметов атлета — в таблицы лидеров."""
+    items = event.payload.get("collected") or event.payload.get("items")
+    if items:
+        record_items(event.key, items, timezone.localdate(event.created_at))
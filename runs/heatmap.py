@@ -0,0 +1,157 @@
+"""
+Тепловая карта точек атлетов тренера.
+
+Карта делится на тайлы: на зуме z тайл — квадрат 360 / 2**z градусов,
+внутри него CELLS × CELLS ячеек. Точки считаются по ячейкам одним
+GROUP BY в базе, результат кэшируется по тайлам, поэтому ответ зависит от
+числа тайлов в рамке, а не от числа точек. Завершение забега атлета
+сбрасывает кэш его тренеров (обработчик outbox в runs/handlers.py).
+Сброс работает, только если кэш общий для web-процессов и dispatch_outbox
+(CACHES в настройках), иначе тайлы живут до HEATMAP_CACHE_SECONDS.
+"""
+
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, FloatField
+from django.db.models.functions import Cast, Floor
+
+from .collectibles import in_bbox
+from .models import Position, Subscribe
+
+# Ячеек по стороне тайла
+CELLS = 32
+
+MAX_ZOOM = 18
+
+# Больше тайлов за запрос — 400: клиент должен приблизить карту
+MAX_TILES = 64
+
+WORLD = (-180.0, -90.0, 180.0, 90.0)
+
+
+def tile_size(zoom):
+    return 360 / 2**zoom
+
+
+def tiles_in(bbox, zoom):
+    """Тайлы (x, y), которые задевает рамка (min_lon, min_lat, max_lon, max_lat)."""
+
+    size = tile_size(zoom)
+    min_lon, min_lat, max_lon, max_lat = bbox
+
+    def index(value, offset):
+        # по широте тайлов вдвое меньше: 180 градусов против 360
+        last = math.ceil(2 * offset / size) - 1
+        return min(max(math.floor((value + offset) / size), 0), last)
+
+    xs = range(index(min_lon, 180), index(max_lon, 180) + 1)
+    if min_lon > max_lon:
+        # рамка через антимеридиан
+        xs = [*range(index(min_lon, 180), 2**zoom), *range(index(max_lon, 180) + 1)]
+    return [
+        (x, y) for x in xs for y in range(index(min_lat, 90), index(max_lat, 90) + 1)
+    ]
+
+
+def _version(coach_id):
+    return cache.get_or_set(f"heatmap:{coach_id}:version", 1, None)
+
+
+def invalidate(coach_ids):
+    """Новая версия — старые тайлы тренеров больше не читаются."""
+    for coach_id in coach_ids:
+        try:
+            cache.incr(f"heatmap:{coach_id}:version")
+        except ValueError:
+            pass  # версии нет — кэша тоже нет
+
+
+def invalidate_athlete(athlete_id):
+    coaches = Subscribe.objects.filter(athlete_id=athlete_id).values_list(
+        "coach_id", flat=True
+    )
+    invalidate(coaches)
+
+
+def count_cells(coach_id, zoom, tiles):
+    """
+    Точки по ячейкам для прямоугольника тайлов одним запросом.
+    Возвращает {тайл: [[lat, lon, count], ...]} c центрами ячеек.
+    """
+
+    size = tile_size(zoom)
+    step = size / CELLS
+    xs = [x for x, _ in tiles]
+    ys = [y for _, y in tiles]
+    bbox = (
+        min(xs) * size - 180,
+        min(ys) * size - 90,
+        (max(xs) + 1) * size - 180,
+        (max(ys) + 1) * size - 90,
+    )
+
+    athletes = Subscribe.objects.filter(coach_id=coach_id).values("athlete_id")
+    positions = in_bbox(Position.objects.filter(run__athlete_id__in=athletes), *bbox)
+    rows = (
+        positions.annotate(
+            cell_x=Floor((Cast("longitude", FloatField()) + 180) / step),
+            cell_y=Floor((Cast("latitude", FloatField()) + 90) / step),
+        )
+        .values("cell_x", "cell_y")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+    cells = defaultdict(list)
+    wanted = set(tiles)
+    for row in rows:
+        x, y = int(row["cell_x"]), int(row["cell_y"])
+        tile = (x // CELLS, y // CELLS)
+        if tile in wanted:
+            cells[tile].append(
+                [
+                    round((y + 0.5) * step - 90, 6),
+                    round((x + 0.5) * step - 180, 6),
+                    row["count"],
+                ]
+            )
+    return {tile: cells.get(tile, []) for tile in tiles}
+
+
+def heatmap(coach_id, zoom, bbox=WORLD):
+    """
+    Ячейки с числом точек во всех тайлах, которые задевает рамка. Тайлы из
+    кэша не пересчитываются, остальные считаются одним запросом и кэшируются.
+    """
+
+    tiles = tiles_in(bbox, zoom)
+    if len(tiles) > MAX_TILES:
+        raise ValueError(
+            f"Слишком большая область: {len(tiles)} тайлов, максимум {MAX_TILES}"
+        )
+
+    version = _version(coach_id)
+    keys = {
+        tile: f"heatmap:{coach_id}:{version}:{zoom}:{tile[0]}:{tile[1]}"
+        for tile in tiles
+    }
+    cached = cache.get_many(keys.values())
+    result = {tile: cached[key] for tile, key in keys.items() if key in cached}
+
+    missing = [tile for tile in tiles if tile not in result]
+    if missing:
+        computed = count_cells(coach_id, zoom, missing)
+        cache.set_many(
+            {keys[tile]: cells for tile, cells in computed.items()},
+            getattr(settings, "HEATMAP_CACHE_SECONDS", 300),
+        )
+        result.update(computed)
+
+    return {
+        "zoom": zoom,
+        "cell": tile_size(zoom) / CELLS,
+        "cells": [cell for tile in tiles for cell in result[tile]],
+    }
@@ -0,0 +1,183 @@
+"""
+Пакетный импорт завершённых забегов из GPX.
+
+Файл читается потоково, точки пишутся через bulk_create пачками, а показатели
+забега (дистанция, время, скорость, сплиты) считаются за один проход.
+Челленджи начисляются один раз на весь пакет, а не на каждый забег.
+Дребезг и выбросы GPS отбрасываются тем же фильтром, что и при приёме по API.
+"""
+
+from decimal import Decimal
+from itertools import chain, groupby
+
+from django.db import transaction
+
+from .geo import haversine_km, segment_metrics
+from .gpx import read_gpx
+from .ingest import PositionFilter
+from .metrics import registry
+from .models import Challenge, OutboxEvent, Position, Run
+
+IMPORT_BATCH_SIZE = 1000
+
+# Точность координат такая же, как у полей Position
+COORDINATE_STEP = Decimal("0.0001")
+
+
+def _coordinate(value):
+    return Decimal(str(value)).quantize(COORDINATE_STEP)
+
+
+class TrackImport:
+    """Накапливает показатели одного импортируемого трека."""
+
+    def __init__(self, run):
+        self.run = run
+        self.points = 0
+        self.dropped = []  # причины отброшенных точек
+        self._filter = PositionFilter()
+        self.distance_km = 0.0  # по гаверсинусам, как в Run.save
+        self.speed_sum = 0.0
+        self.first_time = None
+        self.last_time = None
+        self.splits = []  # секунды на каждый полный километр
+        self._split_started = None
+        self._prev = None
+        self._prev_distance = 0.0
+
+    def add(self, latitude, longitude, date_time):
+        """
+        Возвращает Position с теми же speed/distance, что дал бы приём по API,
+        или None, если точку отбросил фильтр.
+        """
+
+        point = (latitude, longitude, date_time)
+        reason = self._filter.check(self._prev, point)
+        if reason is not None:
+            self.dropped.append(reason)
+            return None
+
+        if self._prev is None:
+            speed, distance = 0.0, 0.0
+            self._split_started = date_time
+        else:
+            speed, distance = segment_metrics(self._prev, point, self._prev_distance)
+            self.distance_km += haversine_km(self._prev, point)
+            self._track_split(distance, date_time)
+
+        if date_time is not None:
+            if self.first_time is None or date_time < self.first_time:
+                self.first_time = date_time
+            if self.last_time is None or date_time > self.last_time:
+                self.last_time = date_time
+
+        self.points += 1
+        self.speed_sum += speed
+        self._prev = point
+        self._prev_distance = distance
+
+        return Position(
+            run=self.run,
+            latitude=latitude,
+            longitude=longitude,
+            date_time=date_time,
+            speed=speed,
+            distance=distance,
+        )
+
+    def _track_split(self, distance, date_time):
+        if date_time is None or self._split_started is None:
+            return
+        while distance >= len(self.splits) + 1:
+            self.splits.append(int((date_time - self._split_started).total_seconds()))
+            self._split_started = date_time
+
+    def finish(self):
+        """Записывает итоговые показатели забега одним UPDATE."""
+
+        run = self.run
+        run.distance = self.distance_km
+        run.start_time = self.first_time
+        run.finish_time = self.last_time
+        if self.first_time and self.last_time:
+            run.run_time_seconds = int(
+                (self.last_time - self.first_time).total_seconds()
+            )
+            run.speed = round(self.speed_sum / self.points, 2)
+
+        run.dropped_positions = len(self.dropped)
+
+        fields = [
+            "distance",
+            "start_time",
+            "finish_time",
+            "run_time_seconds",
+            "speed",
+            "dropped_positions",
+        ]
+        Run.objects.filter(pk=run.pk).update(
+            **{field: getattr(run, field) for field in fields}
+        )
+        for reason in self.dropped:
+            registry.increment("positions_dropped_total", reason=reason)
+
+    def as_dict(self):
+        return {
+            "id": self.run.pk,
+            "comment": self.run.comment,
+            "points": self.points,
+            "dropped": len(self.dropped),
+            "distance": self.run.distance,
+            "run_time_seconds": self.run.run_time_seconds,
+            "speed": self.run.speed,
+            "splits": self.splits,
+        }
+
+
+def _import_track(athlete, name, points, batch_size):
+    run = Run(athlete=athlete, comment=name, status=Run.Status.FINISHED)
+    # bulk_create не вызывает Run.save: дистанцию и челленджи считаем сами
+    Run.objects.bulk_create([run])
+
+    track = TrackImport(run)
+    batch = []
+    for latitude, longitude, date_time in points:
+        position = track.add(_coordinate(latitude), _coordinate(longitude), date_time)
+        if position is None:
+            continue
+        batch.append(position)
+        if len(batch) >= batch_size:
+            Position.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Position.objects.bulk_create(batch)
+
+    track.finish()
+    # Run.save не вызывался — событие завершения пишем сами
+    OutboxEvent.emit(OutboxEvent.RUN_FINISHED, athlete.id, **run.event_payload())
+    return track
+
+
+def import_gpx(athlete, sources, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Импортирует каждый <trk> из каждого источника как FINISHED-забег.
+    sources — пары (имя файла, файл или путь). Возвращает TrackImport по забегам.
+    Всё выполняется в одной транзакции: битый файл откатывает весь пакет.
+    """
+
+    imported = []
+    with transaction.atomic():
+        for filename, source in sources:
+            tracks = groupby(read_gpx(source), key=lambda point: point[0])
+            for _, points in tracks:
+                first = next(points)
+                name = first[1] or f"Импорт из {filename}"
+                rows = ((lat, lon, dt) for _, _, lat, lon, dt in chain([first], points))
+                imported.append(_import_track(athlete, name, rows, batch_size))
+
+        if imported:
+            Challenge.award_totals(athlete)
+            if any(track.run.is_fast_two_km() for track in imported):
+                Challenge.award(athlete, Challenge.FAST_TWO_KM)
+
+    return imported
@@ -0,0 +1,67 @@
+"""
+Фильтр точек трека перед записью.
+
+Телефон на светофоре присылает десятки почти одинаковых точек, а редкие
+«телепорты» GPS завышают скорость и дистанцию забега. Точка сравнивается
+с последней сохранённой точкой забега и отбрасывается, если:
+- пришла раньше чем через POSITION_MIN_INTERVAL_S секунд (too_soon);
+- сдвинулась меньше чем на POSITION_MIN_DISTANCE_M метров (duplicate);
+- требует скорости больше POSITION_MAX_SPEED_MPS (too_fast).
+Порог 0 выключает проверку. Отброшенные точки считаются в
+Run.dropped_positions и в метрике positions_dropped_total.
+"""
+
+from django.conf import settings
+from django.db.models import F
+
+from .geo import haversine_km
+from .metrics import registry
+from .models import Run
+
+TOO_SOON = "too_soon"
+DUPLICATE = "duplicate"
+TOO_FAST = "too_fast"
+
+
+class PositionFilter:
+    """Решает, записывать ли точку (lat, lon, date_time) после prev."""
+
+    def __init__(self, min_distance_m=None, min_interval_s=None, max_speed_mps=None):
+        self.min_distance_m = _setting(min_distance_m, "POSITION_MIN_DISTANCE_M", 2)
+        self.min_interval_s = _setting(min_interval_s, "POSITION_MIN_INTERVAL_S", 1)
+        self.max_speed_mps = _setting(max_speed_mps, "POSITION_MAX_SPEED_MPS", 15)
+
+    def check(self, prev, point):
+        """Причина отбросить точку или None, если её нужно сохранить."""
+
+        if prev is None:
+            return None
+
+        seconds = None
+        if prev[2] is not None and point[2] is not None:
+            seconds = (point[2] - prev[2]).total_seconds()
+            if self.min_interval_s and seconds < self.min_interval_s:
+                return TOO_SOON
+
+        meters = haversine_km(prev, point) * 1000
+        if self.min_distance_m and meters < self.min_distance_m:
+            return DUPLICATE
+        if self.max_speed_mps and seconds and meters / seconds > self.max_speed_mps:
+            return TOO_FAST
+        return None
+
+
+def _setting(value, name, default):
+    return value if value is not None else getattr(settings, name, default)
+
+
+def record_dropped(run_id, reasons):
+    """Добавляет отброшенные точки к счётчику забега и к метрикам."""
+
+    if not reasons:
+        return
+    Run.objects.filter(pk=run_id).update(
+        dropped_positions=F("dropped_positions") + len(reasons)
+    )
+    for reason in reasons:
+        registry.increment("positions_dropped_total", reason=reason)
@@ -0,0 +1,111 @@
+"""
+Таблицы лидеров за неделю и месяц.
+
+Очки копятся в LeaderboardEntry обработчиками outbox: завершённый забег
+добавляет дистанцию и +1 забег, собранные предметы — их ценность. Топ и
+место атлета читаются по индексу (kind, period, period_start, -score):
+место — число атлетов с большим счётом плюс один. Топ стоит O(log n + size),
+место — O(log n + rank): COUNT проходит по индексу все строки выше атлета,
+так что для конца большой таблицы это почти вся таблица.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import CollectibleItem, LeaderboardEntry, Run
+
+Kind = LeaderboardEntry.Kind
+Period = LeaderboardEntry.Period
+
+
+def board(kind, period, day=None):
+    """Строки таблицы kind/period за период, в который попадает day."""
+    start = LeaderboardEntry.start_of(period, day or timezone.localdate())
+    return LeaderboardEntry.objects.filter(kind=kind, period=period, period_start=start)
+
+
+def top(kind, period, day=None, size=10):
+    """Первые size атлетов; при равном счёте место общее."""
+
+    rows = (
+        board(kind, period, day)
+        .order_by("-score", "athlete_id")
+        .values_list("athlete_id", "athlete__username", "score")[:size]
+    )
+    result = []
+    for position, (athlete_id, username, score) in enumerate(rows, start=1):
+        rank = (
+            result[-1]["rank"] if result and result[-1]["score"] == score else position
+        )
+        result.append(
+            {"rank": rank, "athlete": athlete_id, "username": username, "score": score}
+        )
+    return result
+
+
+def rank_of(kind, period, athlete_id, day=None):
+    """
+    Место и счёт атлета или None, если в этом периоде у него нет очков.
+    Стоимость растёт с местом: COUNT по индексу читает всех, кто выше.
+    """
+
+    entries = board(kind, period, day)
+    score = (
+        entries.filter(athlete_id=athlete_id).values_list("score", flat=True).first()
+    )
+    if score is None:
+        return None
+    return {"rank": entries.filter(score__gt=score).count() + 1, "score": score}
+
+
+def record_run(athlete_id, distance, day):
+    LeaderboardEntry.add(athlete_id, day, distance=distance or 0, runs=1)
+
+
+def record_items(athlete_id, item_ids, day):
+    value = CollectibleItem.objects.filter(pk__in=item_ids).aggregate(
+        total=Sum("value")
+    )["total"]
+    LeaderboardEntry.add(athlete_id, day, items=value or 0)
+
+
+def rebuild_runs():
+    """
+    Пересчитывает дистанцию и число забегов по всем завершённым забегам
+    (датой считается finish_time, без него — created_at). Ценность
+    предметов не пересчитать: у связи атлет–предмет нет даты сбора.
+    """
+
+    runs = Run.objects.filter(status=Run.Status.FINISHED).annotate(
+        day=Coalesce("finish_time", "created_at")
+    )
+    entries = []
+    for period, trunc in ((Period.WEEK, TruncWeek), (Period.MONTH, TruncMonth)):
+        rows = (
+            runs.annotate(start=trunc("day"))
+            .values("athlete_id", "start")
+            .annotate(distance=Sum("distance"), count=Count("id"))
+            .order_by()
+        )
+        for row in rows:
+            start = timezone.localdate(row["start"])
+            for kind, score in (
+                (Kind.DISTANCE, row["distance"]),
+                (Kind.RUNS, row["count"]),
+            ):
+                entries.append(
+                    LeaderboardEntry(
+                        kind=kind,
+                        period=period,
+                        period_start=start,
+                        athlete_id=row["athlete_id"],
+                        score=score or 0,
+                    )
+                )
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(kind__in=[Kind.DISTANCE, Kind.RUNS]).delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from runs.batch import lift_statement_timeout
+from runs.backfill import Checkpoint, backfill_range, id_ranges
+
+
+def _init_worker():
+    # при spawn процесс стартует с нуля; при fork вызов ничего не делает
+    django.setup()
+    lift_statement_timeout()
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает дистанцию, время и скорость завершённых забегов.
+    Забеги делятся на диапазоны id по --chunk-size и обрабатываются
+    пулом процессов; готовые диапазоны сохраняются в --checkpoint, и
+    прерванный запуск продолжается с того же места.
+    """
+
+    help = "Пересчитывает показатели завершённых забегов пакетно"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Процессов; 1 — без пула"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="Забегов в диапазоне"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Строк в одном bulk_update"
+        )
+        parser.add_argument("--checkpoint", help="JSON-файл с готовыми диапазонами")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только посчитать, не записывать"
+        )
+
+    def handle(self, *args, **options):
+        lift_statement_timeout()
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers и --chunk-size должны быть больше нуля")
+
+        dry_run = options["dry_run"]
+        try:
+            # в dry-run прогресс не сохраняем: ничего не записано
+            checkpoint = Checkpoint(
+                None if dry_run else options["checkpoint"], options["chunk_size"]
+            )
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Не удалось прочитать checkpoint: {e}") from e
+
+        ranges = [
+            r for r in id_ranges(options["chunk_size"]) if r not in checkpoint.done
+        ]
+        skipped = len(checkpoint.done)
+        if skipped:
+            self.stdout.write(f"Пропущено готовых диапазонов: {skipped}")
+
+        totals = {"runs": 0, "positions": 0, "changed": 0}
+        started = time.perf_counter()
+        args = (dry_run, options["batch_size"])
+
+        for done, (id_range, stats) in enumerate(
+            self.process(ranges, options["workers"], args), start=1
+        ):
+            checkpoint.mark(id_range)
+            for key in totals:
+                totals[key] += stats[key]
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"[{done}/{len(ranges)}] id {id_range[0]}–{id_range[1] - 1}: "
+                f"изменено {stats['changed']} из {stats['runs']}, "
+                f"{totals['runs'] / elapsed:.0f} забегов/с, "
+                f"{totals['positions'] / elapsed:.0f} точек/с"
+            )
+
+        verb = "Изменились бы" if dry_run else "Изменено"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Забегов: {totals['runs']}, точек: {totals['positions']}. "
+                f"{verb}: {totals['changed']} "
+                f"за {time.perf_counter() - started:.1f} с"
+            )
+        )
+
+    def process(self, ranges, workers, args):
+        """Выдаёт (диапазон, статистика) по мере готовности диапазонов."""
+
+        if workers == 1:
+            for id_range in ranges:
+                yield id_range, backfill_range(*id_range, *args)
+            return
+
+        # соединения родителя не должны достаться дочерним процессам
+        connections.close_all()
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(backfill_range, *id_range, *args): id_range
+                for id_range in ranges
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
@@ -0,0 +1,108 @@
+import json
+import platform
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from runs.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    """
+    Запускает бенчмарки из runs/benchmarks.py.
+    Данные создаются внутри транзакции и откатываются после замера.
+    Результаты можно сохранить в JSON и сравнить с сохранённым ранее.
+    """
+
+    help = "Замеряет время горячих участков API на синтетических данных"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help=f"Какие бенчмарки запускать (по умолчанию все): {', '.join(BENCHMARKS)}",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10_000,
+            help="Объём синтетических данных",
+        )
+        parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+        parser.add_argument(
+            "--compare", help="Сравнить с результатами из JSON-файла (baseline)"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Допустимое ухудшение относительно baseline (0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        names = options["names"] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Неизвестные бенчмарки: {', '.join(unknown)}")
+
+        rows = options["rows"]
+        results = {}
+        for name in names:
+            func = BENCHMARKS[name]
+            # данные не закоммичены, поэтому реплика их не увидит — читаем из default
+            with transaction.atomic(), override_settings(REPLICA_DATABASE=None):
+                measured = func(rows)
+                transaction.set_rollback(True)
+
+            for metric, value in measured.items():
+                key = f"{name}.{metric}"
+                if metric.endswith("_mb"):
+                    results[key] = round(value, 2)
+                    self.stdout.write(f"{key}: {value:.1f} MB")
+                elif func.per_rows:
+                    results[key] = round(value * 10_000 / rows * 1000, 3)
+                    self.stdout.write(f"{key}: {results[key]:.1f} ms / 10k rows")
+                else:
+                    results[key] = round(value * 1000, 3)
+                    self.stdout.write(f"{key}: {results[key]:.1f} ms")
+
+        if options["output"]:
+            report = {
+                "meta": {
+                    "rows": rows,
+                    "database": connection.vendor,
+                    "python": platform.python_version(),
+                    "created_at": timezone.now().isoformat(),
+                },
+                "results": results,
+            }
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+
+        if options["compare"]:
+            self.compare(results, options["compare"], options["threshold"])
+
+    def compare(self, results, path, threshold):
+        """Выводит разницу с baseline и падает, если что-то стало хуже порога."""
+
+        try:
+            baseline = json.loads(Path(path).read_text())["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Не удалось прочитать baseline: {e}") from e
+
+        regressions = []
+        for key, value in results.items():
+            before = baseline.get(key)
+            if not before:
+                continue
+            change = value / before - 1
+            self.stdout.write(f"{key}: {before} → {value} ({change:+.0%})")
+            if change > threshold:
+                regressions.append(key)
+
+        if regressions:
+            raise CommandError(
+                f"Регрессия больше {threshold:.0%}: {', '.join(regressions)}"
+            )
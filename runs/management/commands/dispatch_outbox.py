@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from runs.batch import lift_statement_timeout
+from runs.outbox import autodiscover, dispatch, purge
+
+
+def parse_partition(value):
+    """ "2/4" → (2, 4)."""
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise CommandError("--partition в формате номер/всего, например 0/4")
+    if not 0 <= index < total:
+        raise CommandError("Номер партиции должен быть от 0 до всего-1")
+    return index, total
+
+
+class Command(BaseCommand):
+    """
+    Доставляет события outbox зарегистрированным обработчикам.
+    Без --loop выбирает всё доступное и завершается (для cron),
+    с --loop работает как постоянный воркер.
+    """
+
+    help = "Доставляет события outbox обработчикам"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop", action="store_true", help="Не завершаться, опрашивать outbox"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=1.0, help="Пауза при пустом outbox, с"
+        )
+        parser.add_argument(
+            "--partition",
+            type=parse_partition,
+            help="Обрабатывать только ключи key %% всего == номер (например 0/4)",
+        )
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            help="Удалить доставленные события старше N дней",
+        )
+
+    def handle(self, *args, **options):
+        lift_statement_timeout()
+        autodiscover()
+
+        total_delivered = total_failed = 0
+        while True:
+            delivered, failed = dispatch(options["batch_size"], options["partition"])
+            total_delivered += delivered
+            total_failed += failed
+
+            if delivered:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(f"Доставлено: {total_delivered}, с ошибкой: {total_failed}")
+
+        if options["purge_days"] is not None:
+            deleted = purge(options["purge_days"])
+            self.stdout.write(f"Удалено старых событий: {deleted}")
@@ -0,0 +1,51 @@
+from pathlib import Path
+from xml.etree.ElementTree import ParseError
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from runs.imports import import_gpx
+
+
+class Command(BaseCommand):
+    """Импорт завершённых забегов атлета из GPX-файлов или каталогов с ними."""
+
+    help = "Импортирует забеги атлета из GPX-файлов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("athlete_id", type=int)
+        parser.add_argument("paths", nargs="+", help="GPX-файлы или каталоги")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько точек вставлять за один bulk_create",
+        )
+
+    def handle(self, *args, **options):
+        athlete = User.objects.filter(pk=options["athlete_id"]).first()
+        if athlete is None:
+            raise CommandError("Атлет не найден")
+        if athlete.is_staff:
+            raise CommandError("Пользователь не атлет")
+
+        files = []
+        for path in map(Path, options["paths"]):
+            files.extend(sorted(path.glob("*.gpx")) if path.is_dir() else [path])
+
+        try:
+            imported = import_gpx(
+                athlete,
+                [(path.name, str(path)) for path in files],
+                batch_size=options["batch_size"],
+            )
+        except (OSError, ParseError, KeyError, ValueError) as exc:
+            raise CommandError(f"Импорт отменён: {exc}")
+
+        for track in imported:
+            info = track.as_dict()
+            self.stdout.write(
+                f"Run #{info['id']}: {info['points']} точек, "
+                f"{info['distance']:.2f} км, {info['run_time_seconds']} с"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Импортировано забегов: {len(imported)}"))
@@ -0,0 +1,76 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Холодный старт: WSGI-приложение с middleware и urlconf со всеми views
+SCRIPT = (
+    "from config.wsgi import application\n"
+    "from django.urls import resolve\n"
+    "resolve({path!r})\n"
+    "{imports}"
+)
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class Command(BaseCommand):
+    """
+    Отчёт о времени импорта при холодном старте (python -X importtime).
+    Процесс запускается отдельно, поэтому уже загруженные модули не мешают.
+    """
+
+    help = "Показывает, какие модули дольше всего импортируются при старте"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/api/company_details/",
+            help="URL, который резолвится после старта",
+        )
+        parser.add_argument(
+            "--module",
+            action="append",
+            default=[],
+            help="Дополнительно импортировать модуль (можно несколько раз)",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Сколько строк выводить"
+        )
+
+    def handle(self, *args, **options):
+        imports = "".join(f"import {module}\n" for module in options["module"])
+        script = SCRIPT.format(path=options["path"], imports=imports)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True,
+            text=True,
+            env=os.environ.copy(),
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        modules = []
+        for line in result.stderr.splitlines():
+            match = LINE.match(line)
+            if match:
+                own, cumulative, _, name = match.groups()
+                modules.append((name, int(own), int(cumulative)))
+
+        total = sum(own for _, own, _ in modules)
+        self.stdout.write(f"Всего: {len(modules)} модулей, {total / 1000:.1f} ms")
+
+        limit = options["limit"]
+        self.stdout.write("\nМодули (cumulative, ms):")
+        for name, _, cumulative in sorted(modules, key=lambda m: -m[2])[:limit]:
+            self.stdout.write(f"{cumulative / 1000:>9.1f}  {name}")
+
+        packages = Counter()
+        for name, own, _ in modules:
+            packages[name.split(".")[0]] += own
+        self.stdout.write("\nПакеты (self, ms):")
+        for package, own in packages.most_common(limit):
+            self.stdout.write(f"{own / 1000:>9.1f}  {package}")
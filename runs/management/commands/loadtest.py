@@ -0,0 +1,139 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+# Режим → переменные окружения для config/settings/database.py
+MODES = {
+    "none": {"DB_POOL": "0", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "0", "DB_CONN_MAX_AGE": "60"},
+    "pool": {"DB_POOL": "1"},
+}
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест одного эндпоинта через WSGI-обработчик в процессе.
+    В отличие от тестового клиента, после каждого запроса срабатывает
+    request_finished, поэтому соединения с БД закрываются или возвращаются
+    в пул так же, как в продакшне. Без --mode прогоняет все режимы
+    в отдельных процессах (имеет смысл с config.settings.production и
+    локальным PostgreSQL в DB_*).
+    """
+
+    help = "Сравнивает задержку запросов без пула, с постоянными соединениями и с пулом"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/users/")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--warmup", type=int, default=5, help="Запросы до начала замера"
+        )
+        parser.add_argument("--mode", choices=list(MODES), help="Один режим")
+        parser.add_argument(
+            "--json", action="store_true", help="Вывести результат одной строкой JSON"
+        )
+
+    def handle(self, *args, **options):
+        if options["mode"] is None:
+            results = [self.run_mode(mode, options) for mode in MODES]
+        else:
+            results = [self.measure(options)]
+            if options["json"]:
+                self.stdout.write(json.dumps(results[0]))
+                return
+
+        self.stdout.write(
+            f"{'mode':<11}{'rps':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}"
+            f"{'errors':>8}{'conns':>7}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<11}{result['rps']:>8.0f}{result['mean_ms']:>9.2f}"
+                f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['max_ms']:>9.2f}{result['errors']:>8}"
+                f"{result['connections']:>7}"
+            )
+
+    def run_mode(self, mode, options):
+        """Запускает замер в отдельном процессе с настройками БД режима."""
+
+        command = [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "loadtest",
+            "--mode",
+            mode,
+            "--json",
+            "--path",
+            options["path"],
+            "--requests",
+            str(options["requests"]),
+            "--concurrency",
+            str(options["concurrency"]),
+            "--warmup",
+            str(options["warmup"]),
+        ]
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            env={**os.environ, **MODES[mode]},
+        )
+        if result.returncode:
+            raise CommandError(f"{mode}: {result.stderr.strip()}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def measure(self, options):
+        handler = WSGIHandler()
+        environ = RequestFactory().get(options["path"]).environ
+
+        def request(_):
+            status = []
+            started = time.perf_counter()
+            response = handler(dict(environ), lambda s, headers: status.append(s))
+            for _chunk in response:
+                pass
+            # close() шлёт request_finished: соединение закрывается или уходит в пул
+            response.close()
+            return time.perf_counter() - started, int(status[0].split()[0])
+
+        created = []
+        connection_created.connect(lambda **kwargs: created.append(1), weak=False)
+
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            list(executor.map(request, range(options["warmup"])))
+            created.clear()
+            started = time.perf_counter()
+            samples = list(executor.map(request, range(options["requests"])))
+            elapsed = time.perf_counter() - started
+
+        timings = sorted(seconds * 1000 for seconds, _ in samples)
+        percentiles = statistics.quantiles(timings, n=100)
+
+        # с пулом connection_created шлётся на каждую выдачу из пула
+        pool = getattr(connection, "pool", None)
+        connections = pool.get_stats()["connections_num"] if pool else len(created)
+
+        return {
+            "mode": options["mode"] or connection.vendor,
+            "requests": len(samples),
+            "rps": len(samples) / elapsed,
+            "mean_ms": statistics.fmean(timings),
+            "p50_ms": percentiles[49],
+            "p95_ms": percentiles[94],
+            "max_ms": timings[-1],
+            "errors": sum(status >= 400 for _, status in samples),
+            "connections": connections,
+        }
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from runs.batch import lift_statement_timeout
+from runs.collectibles import match_items
+
+
+class Command(BaseCommand):
+    """
+    Сопоставляет предметы с уже записанными точками забегов.
+    После загрузки файла это делает обработчик outbox; команда нужна
+    для разовой сверки всех предметов или конкретных id.
+    """
+
+    help = "Отмечает предметы собранными атлетами, пробегавшими рядом"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "item_ids", nargs="*", type=int, help="id предметов (по умолчанию все)"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="Предметов за один проход"
+        )
+
+    def handle(self, *args, **options):
+        lift_statement_timeout()
+        started = time.perf_counter()
+        created = match_items(
+            options["item_ids"] or None, chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Новых собранных предметов: {created} "
+                f"за {time.perf_counter() - started:.1f} с"
+            )
+        )
@@ -0,0 +1,67 @@
+import pstats
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from runs.profiling import list_profiles, make_token, profiling_dir
+
+
+class Command(BaseCommand):
+    """
+    Список и сводка профилей, сохранённых ProfilingMiddleware.
+    Без аргументов — список; с id — топ функций и повторяющихся SQL.
+    """
+
+    help = "Показывает сохранённые профили запросов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("profile_id", nargs="?", help="id профиля для сводки")
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Сколько строк выводить"
+        )
+        parser.add_argument(
+            "--sort",
+            default="cumulative",
+            help="Сортировка pstats: cumulative, tottime, calls...",
+        )
+        parser.add_argument(
+            "--token",
+            action="store_true",
+            help="Вывести подписанный токен для заголовка X-Profile",
+        )
+
+    def handle(self, *args, **options):
+        if options["token"]:
+            self.stdout.write(make_token())
+            return
+
+        profiles = list_profiles()
+        if not options["profile_id"]:
+            for meta in profiles[: options["limit"]]:
+                self.stdout.write(
+                    f"{meta['id']}  {meta['method']} {meta['path']}  "
+                    f"{meta['status']}  {meta['seconds'] * 1000:.1f} ms  "
+                    f"SQL: {len(meta['queries'])}"
+                )
+            return
+
+        meta = next((m for m in profiles if m["id"] == options["profile_id"]), None)
+        if meta is None:
+            raise CommandError("Профиль не найден")
+
+        self.stdout.write(
+            f"{meta['method']} {meta['path']} → {meta['status']}, "
+            f"{meta['seconds'] * 1000:.1f} ms"
+        )
+
+        stats = pstats.Stats(
+            str(profiling_dir() / f"{meta['id']}.prof"), stream=self.stdout
+        )
+        stats.sort_stats(options["sort"]).print_stats(options["limit"])
+
+        queries = meta["queries"]
+        sql_seconds = sum(query["seconds"] for query in queries)
+        self.stdout.write(f"SQL: {len(queries)} запросов, {sql_seconds * 1000:.1f} ms")
+        repeated = Counter(query["sql"] for query in queries)
+        for sql, count in repeated.most_common(options["limit"]):
+            self.stdout.write(f"{count:>5} × {sql}")
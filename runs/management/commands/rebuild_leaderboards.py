@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from runs.batch import lift_statement_timeout
+from runs.leaderboards import rebuild_runs
+
+
+class Command(BaseCommand):
+    """
+    Пересобирает таблицы дистанции и числа забегов из завершённых забегов.
+    Нужна после правки старых забегов или потерянных событий; таблицу
+    ценности предметов не трогает (дата сбора не хранится).
+    """
+
+    help = "Пересчитывает таблицы лидеров по дистанции и забегам"
+
+    def handle(self, *args, **options):
+        lift_statement_timeout()
+        count = rebuild_runs()
+        self.stdout.write(self.style.SUCCESS(f"Строк таблиц лидеров: {count}"))
@@ -0,0 +1,47 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from runs.seeding import SEED_BATCH_SIZE, seed_dataset
+
+
+class Command(BaseCommand):
+    """Заполняет базу синтетическими атлетами, забегами, треками и предметами."""
+
+    help = "Создаёт синтетический набор данных заданного масштаба"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--athletes", type=int, default=1000)
+        parser.add_argument("--coaches", type=int, default=50)
+        parser.add_argument("--runs", type=int, default=20_000)
+        parser.add_argument(
+            "--positions", type=int, default=1_000_000, help="Всего точек"
+        )
+        parser.add_argument("--items", type=int, default=10_000)
+        parser.add_argument(
+            "--prefix",
+            default=None,
+            help="Префикс username/uid (по умолчанию случайный)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            created = seed_dataset(
+                athletes=options["athletes"],
+                coaches=options["coaches"],
+                runs=options["runs"],
+                positions=options["positions"],
+                items=options["items"],
+                prefix=options["prefix"] or f"seed{uuid.uuid4().hex[:6]}",
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+
+        summary = ", ".join(f"{name}: {count}" for name, count in created.items())
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Создано — {summary} ({elapsed:.1f} с)"))
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from runs.batch import lift_statement_timeout
+from runs.retention import old_runs, simplify_runs
+
+
+class Command(BaseCommand):
+    """
+    Прореживает точки завершённых забегов старше --days дней.
+    Каждая пачка забегов обрабатывается своей транзакцией, поэтому
+    прерванный запуск можно просто повторить.
+    """
+
+    help = "Оставляет у старых забегов упрощённый трек вместо всех точек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.RETENTION_DAYS)
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=settings.RETENTION_TOLERANCE_M,
+            help="Допустимое отклонение упрощённой линии, метры",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100, help="Забегов в одной транзакции"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только посчитать, не удалять"
+        )
+
+    def handle(self, *args, **options):
+        lift_statement_timeout()
+        if options["tolerance"] <= 0 or options["batch_size"] < 1:
+            raise CommandError("--tolerance и --batch-size должны быть больше нуля")
+
+        run_ids = list(old_runs(options["days"]).values_list("id", flat=True))
+        batch_size = options["batch_size"]
+
+        total = removed = 0
+        for start in range(0, len(run_ids), batch_size):
+            batch = run_ids[start : start + batch_size]
+            points, deleted = simplify_runs(
+                batch, options["tolerance"], dry_run=options["dry_run"]
+            )
+            total += points
+            removed += deleted
+            self.stdout.write(
+                f"Забеги {batch[0]}–{batch[-1]}: удалено {deleted} из {points} точек"
+            )
+
+        verb = "Было бы удалено" if options["dry_run"] else "Удалено"
+        share = removed / total if total else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Забегов: {len(run_ids)}. {verb} точек: {removed} из {total} ({share:.0%})"
+            )
+        )
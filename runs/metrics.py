@@ -0,0 +1,226 @@
+"""
+Метрики API в памяти процесса и их выгрузка в текстовом формате Prometheus.
+
+Память ограничена: гистограммы имеют фиксированные бакеты, а число серий —
+MAX_SERIES (всё сверх лимита попадает в серию "__other__").
+Каждый процесс-воркер ведёт свои метрики, их суммирует Prometheus.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы бакетов гистограмм, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MAX_SERIES = 500
+
+OVERFLOW_LABEL = "__other__"
+
+
+class Histogram:
+    """Гистограмма с фиксированными бакетами (не кумулятивными внутри)."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestStats:
+    """Агрегаты по одному маршруту и HTTP-методу."""
+
+    __slots__ = ("latency", "statuses", "queries", "db_seconds")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses = {}
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _render_histogram(lines, name, labels, histogram):
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+class MetricsRegistry:
+    """Потокобезопасное хранилище метрик процесса."""
+
+    def __init__(self, max_series=MAX_SERIES):
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._timers = {}
+        self._counters = {}
+
+    def _series(self, storage, key, factory):
+        """Серия по ключу; при превышении лимита — общая серия OVERFLOW_LABEL."""
+        stats = storage.get(key)
+        if stats is None:
+            if len(storage) >= self.max_series:
+                key = (OVERFLOW_LABEL,) * len(key)
+                stats = storage.get(key)
+            if stats is None:
+                stats = storage[key] = factory()
+        return stats
+
+    def observe_request(self, view, method, status, seconds, queries, db_seconds):
+        with self._lock:
+            stats = self._series(self._requests, (view, method), RequestStats)
+            stats.latency.observe(seconds)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.queries += queries
+            stats.db_seconds += db_seconds
+
+    def observe_timer(self, step, seconds):
+        with self._lock:
+            self._series(self._timers, (step,), Histogram).observe(seconds)
+
+    def increment(self, name, amount=1, **labels):
+        """Счётчик произвольного события, например отклонённых запросов."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key in self._counters or len(self._counters) < self.max_series:
+                self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._timers.clear()
+            self._counters.clear()
+
+    def render(self):
+        """Текст для /metrics в формате Prometheus 0.0.4."""
+
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Количество запросов по маршрутам.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (view, method), stats in sorted(self._requests.items()):
+                for status, count in sorted(stats.statuses.items()):
+                    labels = _labels(view=view, method=method, status=status)
+                    lines.append(f"http_requests_total{{{labels}}} {count}")
+
+            lines += [
+                "# HELP http_request_duration_seconds Время обработки запроса.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (view, method), stats in sorted(self._requests.items()):
+                _render_histogram(
+                    lines,
+                    "http_request_duration_seconds",
+                    _labels(view=view, method=method),
+                    stats.latency,
+                )
+
+            lines += [
+                "# HELP db_queries_total SQL-запросы, выполненные в запросах API.",
+                "# TYPE db_queries_total counter",
+            ]
+            for (view, method), stats in sorted(self._requests.items()):
+                labels = _labels(view=view, method=method)
+                lines.append(f"db_queries_total{{{labels}}} {stats.queries}")
+
+            lines += [
+                "# HELP db_query_duration_seconds_total Суммарное время SQL-запросов.",
+                "# TYPE db_query_duration_seconds_total counter",
+            ]
+            for (view, method), stats in sorted(self._requests.items()):
+                labels = _labels(view=view, method=method)
+                lines.append(
+                    f"db_query_duration_seconds_total{{{labels}}} {stats.db_seconds}"
+                )
+
+            lines += [
+                "# HELP step_duration_seconds Время шагов доменной логики.",
+                "# TYPE step_duration_seconds histogram",
+            ]
+            for (step,), histogram in sorted(self._timers.items()):
+                _render_histogram(
+                    lines, "step_duration_seconds", _labels(step=step), histogram
+                )
+
+            seen = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                labels = f"{{{_labels(**dict(labels))}}}" if labels else ""
+                lines.append(f"{name}{labels} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def timer(step):
+    """Замеряет время блока кода: with timer("run.distance"): ..."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe_timer(step, time.perf_counter() - started)
+
+
+class QueryCounter:
+    """execute_wrapper, который считает SQL-запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def database_stats():
+    """
+    Состояние подключений по алиасам БД: настройки и, если включён пул,
+    счётчики psycopg_pool (размер, свободные, ожидающие запросы и т.д.).
+    """
+
+    from django.db import connections
+
+    stats = {}
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        pool = getattr(connection, "pool", None)
+        stats[connection.alias] = {
+            "vendor": connection.vendor,
+            "pooled": pool is not None,
+            "conn_max_age": settings_dict["CONN_MAX_AGE"],
+            "health_checks": settings_dict["CONN_HEALTH_CHECKS"],
+            "connected": connection.connection is not None,
+            "pool": pool.get_stats() if pool is not None else None,
+        }
+    return stats
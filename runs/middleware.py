@@ -0,0 +1,272 @@
+"""Middleware API бегового трекера."""
+
+import cProfile
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from .metrics import QueryCounter, registry
+from .profiling import HEADER, QUERY_PARAM, SQLCapture, is_valid_token, save_profile
+from .querybudget import QueryBudget
+from .routers import replica_alias, use_replica, wants_replica
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def view_label(request):
+    """Имя маршрута для метрик: имя URL или путь к view, но не сырой путь."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    """
+    Считает по каждому маршруту число запросов, гистограмму времени ответа,
+    количество и время SQL-запросов. Для потоковых ответов время и запросы
+    учитываются до начала отдачи тела.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        registry.observe_request(
+            view_label(request),
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            counter.count,
+            counter.seconds,
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Запускает запрос под cProfile по заголовку X-Profile с подписанным токеном
+    или по ?_profile=1 от суперпользователя (is_staff здесь — тренер, ему
+    профили не положены). Ставится после
+    AuthenticationMiddleware. Без этих признаков стоит пару проверок строк.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        capture = SQLCapture()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(capture))
+            response = profiler.runcall(self.get_response, request)
+
+        seconds = time.perf_counter() - started
+        profile_id = save_profile(
+            profiler, request, response, view_label(request), seconds, capture.queries
+        )
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    def should_profile(self, request):
+        token = request.META.get(HEADER)
+        if token is not None:
+            return is_valid_token(token)
+
+        if QUERY_PARAM not in request.META.get("QUERY_STRING", ""):
+            return False
+        user = getattr(request, "user", None)
+        return (
+            request.GET.get(QUERY_PARAM) == "1"
+            and user is not None
+            and user.is_superuser
+        )
+
+
+class QueryBudgetMiddleware:
+    """
+    Ищет N+1 в каждом запросе: QUERY_BUDGET_MODE = "warn" пишет в лог,
+    "raise" бросает QueryBudgetExceeded (режим для тестов).
+    При пустом режиме отключается целиком.
+    """
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, "QUERY_BUDGET_MODE", "")
+        if self.mode not in ("warn", "raise"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        budget = QueryBudget(label=f"{request.method} {request.path}")
+        with budget.recording():
+            response = self.get_response(request)
+
+        errors = budget.errors()
+        if errors:
+            if self.mode == "raise":
+                budget.check()
+            for error in errors:
+                logger.warning(error)
+        return response
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaMiddleware:
+    """
+    Включает чтение с реплики для read-only view (см. runs/routers.py) и
+    ставит cookie после записи, чтобы клиент какое-то время читал свои
+    изменения с основной базы. Тело потокового ответа читается уже после
+    выхода из middleware, то есть с основной базы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            request.replica_stack = stack
+            response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and settings.REPLICA_STICKY_COOKIE not in request.COOKIES
+            and replica_alias() is not None
+            and wants_replica(view_func, request.method)
+        ):
+            request.replica_stack.enter_context(use_replica())
+
+
+def choose_encoding(accept_encoding, available):
+    """
+    Кодирование из available (в порядке предпочтения сервера), которое
+    клиент принимает с наибольшим q по заголовку Accept-Encoding; None —
+    отдавать без сжатия.
+    """
+
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in sequence:
+        # flush после каждой порции: поток не должен копиться на сервере
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов по Accept-Encoding клиента: brotli, если установлен
+    пакет brotli, иначе gzip (как django GZipMiddleware, с защитой от
+    BREACH случайными байтами). Потоковые ответы сжимаются по порциям.
+    Короткие и уже сжатые ответы отдаются как есть.
+    """
+
+    min_length = 200
+    # для сжатия на лету: на JSON почти как максимальное качество, но в разы быстрее
+    brotli_quality = 5
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.encodings = ("br", "gzip") if brotli else ("gzip",)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), self.encodings
+        )
+        if encoding is None or (response.streaming and response.is_async):
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_sequence(
+                encoding, response.streaming_content
+            )
+            del response.headers["Content-Length"]
+        else:
+            content = self.compress(encoding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def compress(self, encoding, content):
+        if encoding == "br":
+            return brotli.compress(content, quality=self.brotli_quality)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_sequence(self, encoding, sequence):
+        if encoding == "br":
+            return _brotli_sequence(sequence, self.brotli_quality)
+        return compress_sequence(sequence, max_random_bytes=self.max_random_bytes)
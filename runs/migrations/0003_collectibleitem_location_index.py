@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("runs", "0002_outboxevent"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="collectibleitem",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="runs_collec_latitud_6307ff_idx"
+            ),
+        ),
+    ]
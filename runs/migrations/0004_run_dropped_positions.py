@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("runs", "0003_collectibleitem_location_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="run",
+            name="dropped_positions",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
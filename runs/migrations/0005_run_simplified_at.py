@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("runs", "0004_run_dropped_positions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="run",
+            name="simplified_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
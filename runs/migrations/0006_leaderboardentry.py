@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("runs", "0005_run_simplified_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("distance", "Дистанция, км"),
+                            ("runs", "Завершённые забеги"),
+                            ("items", "Ценность собранных предметов"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("week", "Неделя"), ("month", "Месяц")], max_length=8
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                ("score", models.FloatField(default=0)),
+                (
+                    "athlete",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "period", "period_start", "-score"],
+                        name="leaderboard_score_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "period", "period_start", "athlete"),
+                        name="leaderboard_entry_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("runs", "0006_leaderboardentry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="position",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="runs_positi_latitud_7c09fa_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
-from haversine import haversine, Unit
+from datetime import timedelta
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .geo import track_distance_km
+from .metrics import timer
 
 """Модели базы данных для бегового трекера."""
 
@@ -26,6 +31,10 @@ class Run(models.Model):
     distance = models.FloatField(default=0)  # километры
     speed = models.FloatField(null=True, blank=True)
     run_time_seconds = models.IntegerField(null=True, blank=True)
+    # точки, отброшенные фильтром при приёме (runs/ingest.py)
+    dropped_positions = models.PositiveIntegerField(default=0)
+    # трек прорежен (runs/retention.py): показатели выше по точкам не пересчитать
+    simplified_at = models.DateTimeField(null=True, blank=True)
 
     def get_duration_seconds(self):
         """Возвращает длительность забега в секундах."""
@@ -37,6 +46,7 @@ class Run(models.Model):
         """
         Обрабатывает переход забега в статус FINISHED:
         рассчитывает дистанцию и начисляет выполненные челленджи.
+        Переходы статуса записываются в outbox в той же транзакции.
         """
 
         # 1. Получаем прошлый статус
@@ -51,79 +61,60 @@ class Run(models.Model):
         )
 
         # 2. Если будет переход в finished — заранее считаем distance
-        if is_finished_transition:
-            positions = list(
-                self.positions.order_by("created_at").values_list(
-                    "latitude", "longitude"
-                )
-            )
-
-            total_km = 0.0
-            if len(positions) >= 2:
-                for i in range(len(positions) - 1):
-                    p1 = (float(positions[i][0]), float(positions[i][1]))
-                    p2 = (float(positions[i + 1][0]), float(positions[i + 1][1]))
-                    total_km += haversine(p1, p2, unit=Unit.KILOMETERS)
-
-            self.distance = total_km  # важно: сохраняем в километрах
-
-        # 3. Сохраняем объект (один раз!)
-        super().save(*args, **kwargs)
-
-        # 4. Если это был переход в finished — начисляем челленджи
-        if is_finished_transition:
-
-            # --- ЧЕЛЛЕНДЖ 10 забегов ---
-            finished_count = Run.objects.filter(
-                athlete=self.athlete,
-                status=self.Status.FINISHED,
-            ).count()
-
-            if (
-                finished_count == 10
-                and not Challenge.objects.filter(
-                    athlete=self.athlete, full_name="Сделай 10 Забегов!"
-                ).exists()
-            ):
-                Challenge.objects.create(
-                    athlete=self.athlete, full_name="Сделай 10 Забегов!"
-                )
-
-            # --- ЧЕЛЛЕНДЖ 50 км ---
-            total_distance = (
-                Run.objects.filter(
-                    athlete=self.athlete,
-                    status=self.Status.FINISHED,
-                ).aggregate(total=models.Sum("distance"))["total"]
-                or 0
+        # (у ещё не сохранённого забега точек нет)
+        if is_finished_transition and self.pk:
+            positions = self.positions.order_by("created_at").values_list(
+                "latitude", "longitude"
             )
-
-            if (
-                total_distance >= 50
-                and not Challenge.objects.filter(
-                    athlete=self.athlete, full_name="Пробеги 50 километров!"
-                ).exists()
-            ):
-                Challenge.objects.create(
-                    athlete=self.athlete, full_name="Пробеги 50 километров!"
-                )
-
-        # --- ЧЕЛЛЕНДЖ 2 км за 10 минут ---
-        duration = self.run_time_seconds
-
-        if (
-            self.status
-            == self.Status.FINISHED  # челлендж возможен только для завершённого забега
-            and duration is not None  # время уже записано
+            with timer("run.distance"):
+                self.distance = track_distance_km(positions)  # важно: в километрах
+
+        # 3. Сохраняем объект (один раз!) вместе с событием перехода статуса
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            topic = {
+                self.Status.IN_PROGRESS: OutboxEvent.RUN_STARTED,
+                self.Status.FINISHED: OutboxEvent.RUN_FINISHED,
+            }.get(self.status)
+            if topic and old_status != self.status:
+                OutboxEvent.emit(topic, self.athlete_id, **self.event_payload())
+
+            # 4. Челленджи начисляются только завершённым забегам
+            if self.status != self.Status.FINISHED:
+                return
+
+            with timer("run.challenges"):
+                # при переходе в finished — челленджи по сумме забегов
+                if is_finished_transition:
+                    Challenge.award_totals(self.athlete)
+
+                # --- ЧЕЛЛЕНДЖ 2 км за 10 минут ---
+                # время забега проставляется до save() (см. RunViewSet.stop)
+                if self.is_fast_two_km():
+                    Challenge.award(self.athlete, Challenge.FAST_TWO_KM)
+
+    def event_payload(self):
+        """Данные забега для событий outbox."""
+        return {
+            "run": self.pk,
+            "athlete": self.athlete_id,
+            "status": self.status,
+            "distance": self.distance,
+            "run_time_seconds": self.run_time_seconds,
+            "speed": self.speed,
+            "created_at": self.created_at,
+            "finish_time": self.finish_time,
+        }
+
+    def is_fast_two_km(self):
+        """Завершённый забег от 2 км не дольше 10 минут."""
+        return (
+            self.status == self.Status.FINISHED
+            and self.run_time_seconds is not None  # время уже записано
             and self.distance >= 2  # километры
-            and duration <= 600  # 10 минут
-        ):
-            if not Challenge.objects.filter(
-                athlete=self.athlete, full_name="2 километра за 10 минут!"
-            ).exists():
-                Challenge.objects.create(
-                    athlete=self.athlete, full_name="2 километра за 10 минут!"
-                )
+            and self.run_time_seconds <= 600  # 10 минут
+        )
 
     def __str__(self):
         return f"Run #{self.pk} ({self.get_status_display()})"
@@ -156,9 +147,35 @@ class Challenge(models.Model):
         User, on_delete=models.CASCADE, related_name="challenges"
     )
 
+    TEN_RUNS = "Сделай 10 Забегов!"
+    FIFTY_KM = "Пробеги 50 километров!"
+    FAST_TWO_KM = "2 километра за 10 минут!"
+
     # Название челленджа — "Сделай 10 Забегов!"
     full_name = models.CharField(max_length=255)
 
+    @classmethod
+    def award(cls, athlete, full_name):
+        """Начисляет челлендж, если у атлета его ещё нет."""
+        if not cls.objects.filter(athlete=athlete, full_name=full_name).exists():
+            cls.objects.create(athlete=athlete, full_name=full_name)
+
+    @classmethod
+    def award_totals(cls, athlete):
+        """
+        Челленджи по сумме завершённых забегов: 10 забегов и 50 км.
+        Считаются одним запросом, поэтому подходят и для пакетного импорта.
+        """
+        totals = Run.objects.filter(
+            athlete=athlete, status=Run.Status.FINISHED
+        ).aggregate(count=models.Count("id"), distance=models.Sum("distance"))
+
+        if totals["count"] >= 10:
+            cls.award(athlete, cls.TEN_RUNS)
+
+        if (totals["distance"] or 0) >= 50:
+            cls.award(athlete, cls.FIFTY_KM)
+
     def __str__(self):
         # Строковое представление — удобно видеть в админке
         return f"{self.full_name} ({self.athlete.username})"
@@ -200,6 +217,11 @@ class Position(models.Model):
 
     date_time = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        # сверка предметов (match_collectibles) и тепловая карта выбирают
+        # точки по рамке: диапазон широты, внутри него — долготы
+        indexes = [models.Index(fields=["latitude", "longitude"])]
+
     def __str__(self):
         # Удобное строковое представление для админки и отладки
         return f"Run {self.run_id}: {self.latitude}, {self.longitude}"
@@ -219,6 +241,10 @@ class CollectibleItem(models.Model):
         User, related_name="items", blank=True  # user.items → предметы пользователя
     )
 
+    class Meta:
+        # выборка по рамке карты: диапазон широты, внутри него — долготы
+        indexes = [models.Index(fields=["latitude", "longitude"])]
+
     def __str__(self):
         return f"{self.name} ({self.uid})"
 
@@ -244,3 +270,124 @@ class Subscribe(models.Model):
 
     def __str__(self):
         return f"{self.athlete.username} → {self.coach.username}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Доменное событие (transactional outbox): пишется в той же транзакции,
+    что и изменение, и доставляется обработчикам командой dispatch_outbox.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает доставки"
+        DONE = "done", "Доставлено"
+        DEAD = "dead", "Не доставлено"
+
+    RUN_STARTED = "run.started"
+    RUN_FINISHED = "run.finished"
+    POSITION_RECORDED = "position.recorded"
+    COACH_RATED = "coach.rated"
+    ITEMS_UPLOADED = "items.uploaded"
+    ITEMS_COLLECTED = "items.collected"
+
+    topic = models.CharField(max_length=64)
+    # id атлета: события одного ключа доставляются строго по порядку
+    key = models.BigIntegerField(default=0)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    retry_at = models.DateTimeField(null=True, blank=True)  # после ошибки
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "id"])]
+
+    @classmethod
+    def emit(cls, topic, key, **payload):
+        """
+        Записывает событие. Вызывать внутри транзакции, в которой меняются
+        данные: тогда событие появится тогда и только тогда, когда изменение
+        закоммичено.
+        """
+        return cls.objects.create(topic=topic, key=key or 0, payload=payload)
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Очки атлета в таблице лидеров за неделю или месяц. Обновляются
+    инкрементально обработчиками outbox (runs/handlers.py), а не GROUP BY
+    на каждый запрос; индекс по score отдаёт топ и место атлета.
+    """
+
+    class Kind(models.TextChoices):
+        DISTANCE = "distance", "Дистанция, км"
+        RUNS = "runs", "Завершённые забеги"
+        ITEMS = "items", "Ценность собранных предметов"
+
+    class Period(models.TextChoices):
+        WEEK = "week", "Неделя"
+        MONTH = "month", "Месяц"
+
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    period = models.CharField(max_length=8, choices=Period.choices)
+    period_start = models.DateField()  # понедельник недели или 1-е число
+    athlete = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="leaderboard_entries"
+    )
+    score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "period", "period_start", "athlete"],
+                name="leaderboard_entry_unique",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["kind", "period", "period_start", "-score"],
+                name="leaderboard_score_idx",
+            )
+        ]
+
+    @classmethod
+    def start_of(cls, period, day):
+        """Начало периода, в который попадает день."""
+        if period == cls.Period.WEEK:
+            return day - timedelta(days=day.weekday())
+        return day.replace(day=1)
+
+    @classmethod
+    def add(cls, athlete_id, day, **scores):
+        """
+        Прибавляет очки (kind=сумма) во всех периодах, куда попадает день.
+        Вызывать в транзакции: UPDATE, а для новой строки — INSERT.
+        """
+        for kind, amount in scores.items():
+            if not amount:
+                continue
+            for period in cls.Period:
+                start = cls.start_of(period, day)
+                entry = cls.objects.filter(
+                    kind=kind, period=period, period_start=start, athlete_id=athlete_id
+                )
+                if not entry.update(score=models.F("score") + amount):
+                    cls.objects.create(
+                        kind=kind,
+                        period=period,
+                        period_start=start,
+                        athlete_id=athlete_id,
+                        score=amount,
+                    )
+
+    def __str__(self):
+        return f"{self.kind}/{self.period} {self.period_start}: {self.athlete_id} = {self.score}"
@@ -0,0 +1,166 @@
+"""
+Доставка событий outbox (OutboxEvent) обработчикам внутри процесса.
+
+Обработчик регистрируется декоратором @handler("run.finished") в модуле
+из OUTBOX_HANDLER_MODULES и получает OutboxEvent. Гарантии:
+- at-least-once: событие помечается доставленным только после успеха всех
+  обработчиков, в той же транзакции, что и их изменения в БД;
+- порядок по ключу (атлету): после ошибки событие повторяется с растущей
+  паузой, а остальные события этого ключа ждут;
+- после OUTBOX_MAX_ATTEMPTS неудач событие уходит в DEAD и порядок больше
+  не блокирует.
+Перед доставкой диспетчер блокирует строку события (SELECT ... FOR UPDATE
+SKIP LOCKED) до конца транзакции с обработчиками, поэтому параллельные
+диспетчеры не доставляют одно событие дважды. Чтобы они не мешали друг
+другу, их делят по ключу (partition).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .metrics import registry
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = defaultdict(list)
+
+
+def handler(topic):
+    """Регистрирует обработчик событий с указанным topic."""
+
+    def register(func):
+        HANDLERS[topic].append(func)
+        return func
+
+    return register
+
+
+def autodiscover():
+    """Импортирует модули с обработчиками из OUTBOX_HANDLER_MODULES."""
+    for module in getattr(settings, "OUTBOX_HANDLER_MODULES", ()):
+        import_module(module)
+
+
+def max_attempts():
+    return getattr(settings, "OUTBOX_MAX_ATTEMPTS", 10)
+
+
+def pending(partition=None):
+    """Ожидающие события по порядку; partition = (номер, всего)."""
+
+    events = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+    if partition is not None:
+        index, total = partition
+        events = events.alias(part=Mod("key", total)).filter(part=index)
+    return events.order_by("id")
+
+
+def claim(event_id):
+    """
+    Блокирует ожидающее событие до конца транзакции. None — событие уже
+    доставлено или его держит другой диспетчер.
+    """
+    return (
+        OutboxEvent.objects.select_for_update(skip_locked=True)
+        .filter(pk=event_id, status=OutboxEvent.Status.PENDING)
+        .first()
+    )
+
+
+def deliver(event):
+    """
+    Вызывает обработчики события и помечает его доставленным. Вызывать
+    внутри транзакции, в которой событие заблокировано claim().
+    """
+
+    with transaction.atomic():
+        for func in HANDLERS.get(event.topic, ()):
+            func(event)
+        event.status = OutboxEvent.Status.DONE
+        event.processed_at = timezone.now()
+        event.save(update_fields=["status", "processed_at"])
+
+
+def retry_delay(attempts):
+    """Пауза перед повтором: 2, 4, 8... секунд, не больше 5 минут."""
+    return timedelta(seconds=min(2**attempts, 300))
+
+
+def fail(event, error):
+    event.attempts += 1
+    event.last_error = f"{type(error).__name__}: {error}"
+    event.retry_at = timezone.now() + retry_delay(event.attempts)
+    if event.attempts >= max_attempts():
+        event.status = OutboxEvent.Status.DEAD
+    event.save(update_fields=["attempts", "last_error", "retry_at", "status"])
+
+
+def dispatch(batch_size=100, partition=None):
+    """
+    Доставляет до batch_size событий. Возвращает (доставлено, с ошибкой).
+    Ключ с неудачным, отложенным или занятым другим диспетчером событием
+    пропускается до конца прохода.
+    """
+
+    delivered = failed = 0
+    blocked = set()
+    last_id = 0
+    now = timezone.now()
+
+    while delivered + failed < batch_size:
+        page = list(pending(partition).filter(id__gt=last_id)[:batch_size])
+        if not page:
+            break
+
+        for event in page:
+            last_id = event.id
+            if event.key in blocked:
+                continue
+            if event.retry_at and event.retry_at > now:
+                blocked.add(event.key)
+                continue
+
+            # ошибка обработчика откатывает только savepoint deliver(),
+            # fail() пишется под той же блокировкой
+            with transaction.atomic():
+                claimed = claim(event.id)
+                if claimed is None or (claimed.retry_at and claimed.retry_at > now):
+                    blocked.add(event.key)
+                    continue
+                try:
+                    deliver(claimed)
+                except Exception as e:
+                    failed += 1
+                    blocked.add(event.key)
+                    fail(claimed, e)
+                    logger.exception("Outbox event %s failed", event.pk)
+                    registry.increment(
+                        "outbox_events_total", topic=event.topic, result="error"
+                    )
+                else:
+                    delivered += 1
+                    registry.increment(
+                        "outbox_events_total", topic=event.topic, result="done"
+                    )
+
+            if delivered + failed >= batch_size:
+                break
+
+    return delivered, failed
+
+
+def purge(days):
+    """Удаляет доставленные события старше days дней."""
+    border = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEvent.objects.filter(
+        status=OutboxEvent.Status.DONE, processed_at__lt=border
+    ).delete()
+    return deleted
@@ -7,3 +7,10 @@ class CustomPageNumberPagination(PageNumberPagination):
     """Пагинация с возможностью указать размер страницы через параметр size."""
 
     page_size_query_param = "size"
+
+
+class ViewportPagination(CustomPageNumberPagination):
+    """Страницы предметов на карте: по умолчанию 100, не больше 500."""
+
+    page_size = 100
+    max_page_size = 500
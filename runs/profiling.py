@@ -0,0 +1,102 @@
+"""
+Профилирование отдельных запросов по требованию.
+
+Запрос профилируется, если у него есть заголовок X-Profile с подписанным
+токеном (см. make_token) или суперпользователь передал ?_profile=1.
+Профиль cProfile и захваченные SQL-запросы сохраняются в PROFILING_DIR,
+хранятся последние PROFILING_MAX_FILES профилей.
+"""
+
+import json
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+SALT = "runs.profiling"
+HEADER = "HTTP_X_PROFILE"
+QUERY_PARAM = "_profile"
+TOKEN_VALUE = "profile"
+
+
+def make_token():
+    """Подписанный токен для заголовка X-Profile."""
+    return signing.TimestampSigner(salt=SALT).sign(TOKEN_VALUE)
+
+
+def is_valid_token(token):
+    max_age = getattr(settings, "PROFILING_TOKEN_MAX_AGE", 24 * 60 * 60)
+    try:
+        value = signing.TimestampSigner(salt=SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return value == TOKEN_VALUE
+
+
+def profiling_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+class SQLCapture:
+    """execute_wrapper, который запоминает текст и время каждого SQL-запроса."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {"sql": sql, "seconds": time.perf_counter() - started, "many": many}
+            )
+
+
+def save_profile(profiler, request, response, view, seconds, queries):
+    """Сохраняет <id>.prof и <id>.json, удаляет самые старые профили."""
+
+    directory = profiling_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{request.method}_{view}")
+    profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{slug}"
+
+    profiler.dump_stats(directory / f"{profile_id}.prof")
+    meta = {
+        "id": profile_id,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "view": view,
+        "status": response.status_code,
+        "seconds": seconds,
+        "queries": queries,
+    }
+    (directory / f"{profile_id}.json").write_text(
+        json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+    rotate(directory)
+    return profile_id
+
+
+def rotate(directory):
+    max_files = getattr(settings, "PROFILING_MAX_FILES", 50)
+    for meta in list_profiles(directory)[max_files:]:
+        for suffix in (".prof", ".json"):
+            (directory / f"{meta['id']}{suffix}").unlink(missing_ok=True)
+
+
+def list_profiles(directory=None):
+    """Метаданные сохранённых профилей, новые первыми."""
+
+    directory = directory or profiling_dir()
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        profiles.append(json.loads(path.read_text(encoding="utf-8")))
+    return profiles
@@ -0,0 +1,86 @@
+"""
+Контроль числа SQL-запросов на один запрос к API.
+
+QueryBudget записывает запросы ко всем базам и падает, если их больше
+бюджета или если один и тот же SQL (с разными параметрами) повторился
+больше QUERY_BUDGET_REPEAT_LIMIT раз — типичный признак N+1.
+В тестах включается режимом QUERY_BUDGET_MODE (см. QueryBudgetMiddleware)
+и фикстурой query_budget из runs/tests/conftest.py.
+"""
+
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .profiling import SQLCapture
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Превышен бюджет запросов или найден повторяющийся запрос (N+1)."""
+
+
+def repeat_limit():
+    return getattr(settings, "QUERY_BUDGET_REPEAT_LIMIT", 2)
+
+
+def repeated_statements(queries, limit=None):
+    """{sql: сколько раз} для запросов, повторившихся больше limit раз."""
+
+    limit = repeat_limit() if limit is None else limit
+    counts = Counter(query["sql"] for query in queries)
+    return {sql: count for sql, count in counts.items() if count > limit}
+
+
+class QueryBudget:
+    """
+    Контекстный менеджер: with QueryBudget(5): client.get(...)
+    max_queries=None — проверять только повторы.
+    """
+
+    def __init__(self, max_queries=None, limit=None, label="запрос"):
+        self.max_queries = max_queries
+        self.limit = limit
+        self.label = label
+        self.capture = SQLCapture()
+        self._recording = None
+
+    @property
+    def queries(self):
+        return self.capture.queries
+
+    @contextmanager
+    def recording(self):
+        """Только записывает запросы, без проверки."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.capture))
+            yield self
+
+    def __enter__(self):
+        self._recording = self.recording()
+        return self._recording.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        self._recording.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def errors(self):
+        errors = []
+        if self.max_queries is not None and len(self.queries) > self.max_queries:
+            errors.append(
+                f"{self.label}: {len(self.queries)} SQL-запросов "
+                f"при бюджете {self.max_queries}"
+            )
+        for sql, count in repeated_statements(self.queries, self.limit).items():
+            errors.append(f"{self.label}: N+1, {count} × {sql}")
+        return errors
+
+    def check(self):
+        errors = self.errors()
+        if errors:
+            listing = "\n".join(query["sql"] for query in self.queries)
+            raise QueryBudgetExceeded("\n".join(errors) + "\n\n" + listing)
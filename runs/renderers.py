@@ -0,0 +1,142 @@
+"""
+JSON-рендерер и парсер API на orjson.
+
+Формат ответа совпадает с DRF JSONRenderer: даты, Decimal и прочие
+нестандартные типы кодируются тем же rest_framework JSONEncoder.
+Если orjson не установлен или нужен режим, который он не поддерживает
+(отступы, ensure_ascii), используется стандартная реализация DRF.
+"""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - запасной путь без orjson
+    orjson = None
+
+# Даты отдаём в default(), чтобы формат совпадал с DRF (Z вместо +00:00)
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+_encode_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson.
+
+    Отличия от json.dumps только в записи экспоненты у очень малых/больших
+    float (1e-7 вместо 1e-07) и в NaN/Infinity, которые становятся null.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encode_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Не-строковые ключи, int > 64 бит и т.п. — оставляем это json
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и DRF, экранируем U+2028/U+2029 для совместимости с JavaScript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+_renderer = FastJSONRenderer()
+
+
+def dumps(data):
+    """Кодирует данные в JSON-байты в том же формате, что FastJSONRenderer."""
+    return _renderer.render(data)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON: по одному объекту на строку.
+    Списки обычно отдаются потоком (см. runs/streaming.py), а этот рендерер
+    нужен для согласования Accept и для обычных ответов (ошибки, detail).
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, list):
+            return b"".join(dumps(item) + b"\n" for item in data)
+        return dumps(data) + b"\n"
+
+
+class CompactRenderer(FastJSONRenderer):
+    """
+    Столбцовый формат точек (?format=compact, см. runs/compact.py).
+    Данные готовит view, рендерер отвечает за согласование формата.
+    """
+
+    media_type = "application/vnd.runify.compact+json"
+    format = "compact"
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на orjson; orjson, как и strict-режим DRF, не принимает NaN."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = get_encoding(parser_context or {})
+        try:
+            body = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Рендереры форматов экспорта. Сами файлы отдаются потоком из view,
+    здесь остаётся только согласование формата (?format=, Accept)
+    и вывод ошибок, которые отдаются как JSON.
+    """
+
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps(data)
+
+
+class GPXRenderer(ExportRenderer):
+    media_type = "application/gpx+xml"
+    format = "gpx"
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class ZipRenderer(ExportRenderer):
+    media_type = "application/zip"
+    format = "zip"
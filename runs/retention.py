@@ -0,0 +1,103 @@
+"""
+Прореживание треков старых забегов.
+
+Старые забеги смотрят только линией на карте, поэтому от их точек
+остаётся упрощённый трек (Дуглас — Пекер): удаляется точка, если линия без
+неё отходит от исходной не больше чем на tolerance метров. Первая и
+последняя точки остаются всегда, накопленная Position.distance у
+оставшихся точек не меняется. Дистанция, время и скорость забега уже
+записаны в Run и не пересчитываются: такой забег помечается
+simplified_at, и backfill_runs его пропускает.
+"""
+
+import math
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .collectibles import METERS_PER_DEGREE
+from .models import Position, Run
+
+
+def _perpendicular(point, start, end):
+    """Расстояние от point до отрезка start–end на плоскости, в тех же единицах."""
+
+    (x, y), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return math.hypot(x - x1, y - y1)
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+def simplify(points, tolerance_m):
+    """
+    Индексы точек (lat, lon), которые остаются после упрощения.
+    Координаты переводятся в метры около первой точки (на длине одного
+    забега искажение проекции пренебрежимо).
+    """
+
+    if len(points) < 3:
+        return list(range(len(points)))
+
+    scale = math.cos(math.radians(float(points[0][0])))
+    xy = [
+        (float(lon) * scale * METERS_PER_DEGREE, float(lat) * METERS_PER_DEGREE)
+        for lat, lon in points
+    ]
+
+    keep = {0, len(xy) - 1}
+    stack = [(0, len(xy) - 1)]
+    while stack:
+        first, last = stack.pop()
+        worst, index = 0.0, None
+        for i in range(first + 1, last):
+            distance = _perpendicular(xy[i], xy[first], xy[last])
+            if distance > worst:
+                worst, index = distance, i
+        if index is not None and worst > tolerance_m:
+            keep.add(index)
+            stack.append((first, index))
+            stack.append((index, last))
+    return sorted(keep)
+
+
+def old_runs(days):
+    """Завершённые и ещё не прореженные забеги старше days дней."""
+
+    border = timezone.now() - timedelta(days=days)
+    return Run.objects.filter(
+        status=Run.Status.FINISHED, created_at__lt=border, simplified_at__isnull=True
+    ).order_by("id")
+
+
+def simplify_runs(run_ids, tolerance_m, dry_run=False):
+    """
+    Прореживает треки забегов run_ids одной транзакцией.
+    Возвращает (точек было, точек удалено).
+    """
+
+    positions = (
+        Position.objects.filter(run_id__in=run_ids)
+        .order_by("run_id", "date_time", "id")
+        .values_list("run_id", "id", "latitude", "longitude")
+        .iterator(chunk_size=5000)
+    )
+
+    total = 0
+    removed = []
+    for _, rows in groupby(positions, key=itemgetter(0)):
+        rows = list(rows)
+        total += len(rows)
+        kept = set(simplify([(row[2], row[3]) for row in rows], tolerance_m))
+        removed.extend(row[1] for i, row in enumerate(rows) if i not in kept)
+
+    if not dry_run:
+        with transaction.atomic():
+            for start in range(0, len(removed), 1000):
+                Position.objects.filter(pk__in=removed[start : start + 1000]).delete()
+            Run.objects.filter(pk__in=run_ids).update(simplified_at=timezone.now())
+    return total, len(removed)
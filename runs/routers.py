@@ -0,0 +1,70 @@
+"""
+Чтение с реплики для аналитики и списков.
+
+Запрос читает с реплики (settings.REPLICA_DATABASE), только если view
+помечен как read-only (@replica_reads или replica_actions у ViewSet),
+метод безопасный и у клиента нет cookie недавней записи: после своей
+записи клиент REPLICA_STICKY_SECONDS секунд читает с основной базы
+(read-your-writes). Если алиаса реплики нет в DATABASES, всё идёт в default.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# app_label модели таблицы DatabaseCache
+CACHE_APP_LABEL = "django_cache"
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_alias():
+    """Алиас реплики или None, если реплика не настроена."""
+    alias = getattr(settings, "REPLICA_DATABASE", None)
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def use_replica():
+    """with use_replica(): ... — чтения внутри блока идут на реплику."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_reads(view):
+    """Помечает функциональный view как read-only (ставится над @api_view)."""
+    view.replica_reads = True
+    return view
+
+
+def wants_replica(view_func, method):
+    """Можно ли обработать запрос к view_func на реплике."""
+
+    if getattr(view_func, "replica_reads", False):
+        return True
+    # ViewSet: as_view() сохраняет класс и соответствие методов действиям
+    view_class = getattr(view_func, "cls", None)
+    actions = getattr(view_func, "actions", None) or {}
+    return actions.get(method.lower()) in getattr(view_class, "replica_actions", ())
+
+
+class ReplicaRouter:
+    """Чтения внутри use_replica() — на реплику, всё остальное — в default."""
+
+    def db_for_read(self, model, **hints):
+        # кэш в базе (DatabaseCache) читаем с основной: на реплике сброс
+        # версий тепловой карты виден с задержкой
+        if _use_replica.get() and model._meta.app_label != CACHE_APP_LABEL:
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплика — копия default, объекты из обеих баз совместимы
+        return True
@@ -0,0 +1,168 @@
+"""
+Генератор синтетических данных для бенчмарков и ручной проверки.
+
+Создаёт тренеров, атлетов с подписками и оценками, забеги с треками
+(случайное блуждание вокруг центра города) и коллекционные предметы.
+Всё пишется через bulk_create, поэтому Run.save и приём точек не вызываются.
+"""
+
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .geo import haversine_km
+from .models import Challenge, CollectibleItem, Position, Run, Subscribe
+
+CENTER = (55.7558, 37.6173)  # Москва
+
+# Шаг трека: ~3 м/с, точка раз в 5 секунд
+POINT_INTERVAL = timedelta(seconds=5)
+STEP_DEGREES = 0.00014
+
+SEED_BATCH_SIZE = 5000
+
+
+def _track(rng, run, start, count):
+    """Точки одного забега и итоговые показатели (дистанция, время, скорость)."""
+
+    latitude = CENTER[0] + rng.uniform(-0.1, 0.1)
+    longitude = CENTER[1] + rng.uniform(-0.2, 0.2)
+    heading = rng.uniform(0, 2 * math.pi)
+
+    positions = []
+    distance = 0.0
+    speed_sum = 0.0
+    prev = None
+    for i in range(count):
+        date_time = start + POINT_INTERVAL * i
+        point = (round(latitude, 4), round(longitude, 4))
+        speed = 0.0
+        if prev is not None:
+            segment_km = haversine_km(prev, point)
+            distance += segment_km
+            speed = round(segment_km * 1000 / POINT_INTERVAL.total_seconds(), 2)
+        speed_sum += speed
+        positions.append(
+            Position(
+                run=run,
+                latitude=point[0],
+                longitude=point[1],
+                date_time=date_time,
+                speed=speed,
+                distance=round(distance, 2),
+            )
+        )
+        prev = point
+        heading += rng.uniform(-0.3, 0.3)
+        latitude += STEP_DEGREES * math.cos(heading)
+        longitude += STEP_DEGREES * math.sin(heading) * 1.8
+
+    run_time = int((POINT_INTERVAL * max(count - 1, 0)).total_seconds())
+    speed = round(speed_sum / count, 2) if count else None
+    return positions, distance, run_time, speed
+
+
+def seed_dataset(
+    athletes=100,
+    coaches=10,
+    runs=1000,
+    positions=100_000,
+    items=1000,
+    prefix="seed",
+    seed=42,
+    batch_size=SEED_BATCH_SIZE,
+):
+    """
+    Создаёт набор данных заданного масштаба и возвращает словарь с количеством
+    созданных объектов. prefix делает username и uid уникальными.
+    """
+
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    coach_users = User.objects.bulk_create(
+        User(username=f"{prefix}_coach_{i}", password="!", is_staff=True)
+        for i in range(coaches)
+    )
+    athlete_users = User.objects.bulk_create(
+        User(
+            username=f"{prefix}_athlete_{i}",
+            password="!",
+            first_name=f"Атлет{i}",
+            last_name="Тестовый",
+        )
+        for i in range(athletes)
+    )
+
+    if coach_users:
+        Subscribe.objects.bulk_create(
+            Subscribe(
+                athlete=athlete,
+                coach=rng.choice(coach_users),
+                rating=rng.choice([None, 1, 2, 3, 4, 5]),
+            )
+            for athlete in athlete_users
+        )
+
+    run_objects = []
+    for i in range(runs if athlete_users else 0):
+        finished = rng.random() < 0.9
+        created = now - timedelta(days=rng.uniform(0, 365))
+        run_objects.append(
+            Run(
+                athlete=athlete_users[i % len(athlete_users)],
+                comment=f"Забег {i}",
+                status=Run.Status.FINISHED if finished else Run.Status.IN_PROGRESS,
+                start_time=created,
+            )
+        )
+    Run.objects.bulk_create(run_objects, batch_size=batch_size)
+
+    per_run = positions // len(run_objects) if run_objects else 0
+    batch = []
+    for run in run_objects:
+        track, distance, run_time, speed = _track(rng, run, run.start_time, per_run)
+        batch.extend(track)
+        if run.status == Run.Status.FINISHED:
+            run.distance = distance
+            run.run_time_seconds = run_time
+            run.speed = speed
+            run.finish_time = run.start_time + timedelta(seconds=run_time)
+        if len(batch) >= batch_size:
+            Position.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+    Position.objects.bulk_create(batch, batch_size=batch_size)
+    Run.objects.bulk_update(
+        run_objects,
+        ["distance", "run_time_seconds", "speed", "finish_time"],
+        batch_size=batch_size,
+    )
+
+    for athlete in athlete_users:
+        Challenge.award_totals(athlete)
+
+    CollectibleItem.objects.bulk_create(
+        (
+            CollectibleItem(
+                name=f"Предмет {i}",
+                uid=f"{prefix}-{i}",
+                latitude=CENTER[0] + rng.uniform(-0.15, 0.15),
+                longitude=CENTER[1] + rng.uniform(-0.25, 0.25),
+                picture=f"https://example.com/items/{i}.png",
+                value=rng.randint(1, 100),
+            )
+            for i in range(items)
+        ),
+        batch_size=batch_size,
+    )
+
+    return {
+        "coaches": len(coach_users),
+        "athletes": len(athlete_users),
+        "runs": len(run_objects),
+        "positions": per_run * len(run_objects),
+        "items": items,
+    }
@@ -1,6 +1,10 @@
+import math
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
 
+from .collectibles import METERS_PER_DEGREE
+from .fieldsets import SparseFieldsMixin
 from .models import (
     Run,
     AthleteInfo,
@@ -10,14 +14,17 @@ from .models import (
     Subscribe,
 )
 
-"""Сериализаторы DRF для API бегового трекера."""
+"""
+Сериализаторы DRF для API бегового трекера.
+Сериализаторы моделей понимают ?fields= и ?omit= (см. runs/fieldsets.py).
+"""
 
 # ============================================================
 #                    ВСПОМОГАТЕЛЬНЫЕ СЕРИАЛИЗАТОРЫ
 # ============================================================
 
 
-class AthleteSerializer(serializers.ModelSerializer):
+class AthleteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Краткая информация об атлете."""
 
     class Meta:
@@ -25,7 +32,7 @@ class AthleteSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "first_name", "last_name"]
 
 
-class RunSerializer(serializers.ModelSerializer):
+class RunSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Забег + вложенная информация об атлете."""
 
     athlete_data = AthleteSerializer(source="athlete", read_only=True)
@@ -42,7 +49,9 @@ class RunSerializer(serializers.ModelSerializer):
             "run_time_seconds",
             "distance",
             "speed",
+            "dropped_positions",
         ]
+        read_only_fields = ["dropped_positions"]
 
 
 # ============================================================
@@ -50,7 +59,7 @@ class RunSerializer(serializers.ModelSerializer):
 # ============================================================
 
 
-class UserBaseSerializer(serializers.ModelSerializer):
+class UserBaseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Базовый сериализатор для списка пользователей.
     /api/users/
@@ -97,8 +106,11 @@ class AthleteDetailSerializer(UserBaseSerializer):
         fields = UserBaseSerializer.Meta.fields + ["coach", "items"]
 
     def get_coach(self, user: User):
-        sub = Subscribe.objects.filter(athlete=user).first()
-        return sub.coach.id if sub else None
+        return (
+            Subscribe.objects.filter(athlete=user)
+            .values_list("coach_id", flat=True)
+            .first()
+        )
 
     def get_items(self, user: User):
         return CollectibleItemSerializer(user.items.all(), many=True).data
@@ -132,7 +144,7 @@ class SubscribeSerializer(serializers.Serializer):
     athlete = serializers.IntegerField()
 
 
-class AthleteInfoSerializer(serializers.ModelSerializer):
+class AthleteInfoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Информация об атлете: цели, вес."""
 
     user_id = serializers.IntegerField(read_only=True)
@@ -147,7 +159,7 @@ class AthleteInfoSerializer(serializers.ModelSerializer):
         return value
 
 
-class ChallengeSerializer(serializers.ModelSerializer):
+class ChallengeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор выполненных челленджей."""
 
     class Meta:
@@ -155,7 +167,7 @@ class ChallengeSerializer(serializers.ModelSerializer):
         fields = ["id", "full_name", "athlete"]
 
 
-class PositionSerializer(serializers.ModelSerializer):
+class PositionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Позиция атлета во время забега."""
 
     date_time = serializers.DateTimeField(
@@ -195,7 +207,7 @@ class PositionSerializer(serializers.ModelSerializer):
         return value
 
 
-class CollectibleItemSerializer(serializers.ModelSerializer):
+class CollectibleItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор коллекционных предметов."""
 
     class Meta:
@@ -213,6 +225,27 @@ class CollectibleItemSerializer(serializers.ModelSerializer):
         return value
 
 
+class CollectibleItemDistanceSerializer(CollectibleItemSerializer):
+    """Предмет с расстоянием до точки запроса (?near=), в метрах."""
+
+    distance = serializers.SerializerMethodField()
+
+    class Meta(CollectibleItemSerializer.Meta):
+        fields = CollectibleItemSerializer.Meta.fields + ["distance"]
+
+    def get_distance(self, obj):
+        return round(math.sqrt(obj.distance_sq) * METERS_PER_DEGREE, 1)
+
+
+class CollectibleItemImportSerializer(CollectibleItemSerializer):
+    """
+    Строка Excel-файла с предметами. Уникальность uid проверяет
+    UploadCollectibleFile одним запросом на весь файл.
+    """
+
+    uid = serializers.CharField(max_length=255)
+
+
 class RateCoachSerializer(serializers.Serializer):
     """Сериализатор оценки тренера атлетом."""
 
@@ -223,3 +256,25 @@ class RateCoachSerializer(serializers.Serializer):
         if value < 1 or value > 5:
             raise serializers.ValidationError("Rating must be between 1 and 5")
         return value
+
+
+# сколько атлетов принимают bulk-эндпойнты тренера за один запрос
+BULK_ROSTER_LIMIT = 1000
+
+
+class BulkSubscribeSerializer(serializers.Serializer):
+    """Список атлетов для подписки на тренера одним запросом."""
+
+    athletes = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=BULK_ROSTER_LIMIT,
+    )
+
+
+class BulkRateCoachSerializer(serializers.Serializer):
+    """Оценки тренера от нескольких атлетов."""
+
+    ratings = RateCoachSerializer(
+        many=True, allow_empty=False, max_length=BULK_ROSTER_LIMIT
+    )
@@ -0,0 +1,69 @@
+"""Потоковая отдача больших списков без материализации queryset в памяти."""
+
+from django.http import StreamingHttpResponse
+
+from .fieldsets import selected
+from .renderers import NDJSONRenderer, dumps
+
+
+def encode_stream(rows, ndjson=False, batch_size=500):
+    """
+    Кодирует строки в JSON-массив или NDJSON.
+    Строки склеиваются пачками, чтобы не писать в сокет по одной.
+    """
+
+    separator = b"\n" if ndjson else b","
+    if not ndjson:
+        yield b"["
+
+    batch = []
+    first = True
+    for row in rows:
+        batch.append(dumps(row))
+        if len(batch) >= batch_size:
+            yield _join_batch(batch, separator, first, ndjson)
+            batch = []
+            first = False
+
+    if batch:
+        yield _join_batch(batch, separator, first, ndjson)
+
+    if not ndjson:
+        yield b"]"
+
+
+def _join_batch(batch, separator, first, ndjson):
+    data = separator.join(batch)
+    if ndjson:
+        return data + separator
+    return data if first else separator + data
+
+
+class StreamingListMixin:
+    """
+    Потоковый режим для list():
+    ?stream=1 — JSON-массив, Accept: application/x-ndjson — NDJSON.
+    Память не зависит от размера выборки: queryset читается через .iterator().
+    """
+
+    stream_chunk_size = 2000
+
+    def get_renderers(self):
+        return super().get_renderers() + [NDJSONRenderer()]
+
+    def wants_stream(self, request):
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return True
+        return request.query_params.get("stream") in ("1", "true")
+
+    def stream_response(self, request, queryset, row_serializer):
+        ndjson = request.accepted_renderer.format == NDJSONRenderer.format
+        rows = row_serializer.iterate(
+            queryset,
+            chunk_size=self.stream_chunk_size,
+            fields=selected(request, row_serializer.field_names),
+        )
+        return StreamingHttpResponse(
+            encode_stream(rows, ndjson=ndjson),
+            content_type=(NDJSONRenderer.media_type if ndjson else "application/json"),
+        )
@@ -0,0 +1,31 @@
+import pytest
+
+from runs.querybudget import QueryBudget
+from runs.throttling import get_store
+
+
+@pytest.fixture(autouse=True)
+def query_budget_mode(settings):
+    """Во всех тестах запрос к API с N+1 падает с QueryBudgetExceeded."""
+    settings.QUERY_BUDGET_MODE = "raise"
+
+
+@pytest.fixture(autouse=True)
+def primary_only(settings):
+    """
+    В тестах реплика — отдельная пустая база, поэтому по умолчанию все
+    чтения идут в default. Тесты роутинга включают её сами.
+    """
+    settings.REPLICA_DATABASE = None
+
+
+@pytest.fixture(autouse=True)
+def ingest_buckets():
+    """Вёдра троттлинга не переживают тест: id забегов повторяются."""
+    get_store.cache_clear()
+
+
+@pytest.fixture
+def query_budget():
+    """with query_budget(5): client.get(...) — не больше 5 SQL-запросов и без N+1."""
+    return QueryBudget
@@ -0,0 +1,94 @@
+import json
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from runs.imports import import_gpx
+from runs.models import Challenge, OutboxEvent, Run
+
+POINT = (
+    '<trkpt lat="{lat}" lon="37.6173"><time>2024-10-12T14:{m:02d}:00Z</time></trkpt>'
+)
+
+
+@pytest.fixture
+def runs():
+    """Три импортированных забега с испорченными показателями."""
+    athlete = User.objects.create(username="athlete")
+    tracks = "".join(
+        f"<trk><name>Забег {n}</name><trkseg>"
+        + "".join(POINT.format(lat=55 + i / 1000, m=i) for i in range(5 + n))
+        + "</trkseg></trk>"
+        for n in range(3)
+    )
+    gpx = f'<gpx xmlns="http://www.topografix.com/GPX/1/1">{tracks}</gpx>'
+    import_gpx(athlete, [("runs.gpx", BytesIO(gpx.encode()))])
+
+    expected = {
+        run.pk: (run.distance, run.run_time_seconds, run.speed)
+        for run in Run.objects.all()
+    }
+    Run.objects.update(distance=0, run_time_seconds=None, speed=None)
+    return expected
+
+
+def metrics():
+    return {
+        run.pk: (run.distance, run.run_time_seconds, run.speed)
+        for run in Run.objects.all()
+    }
+
+
+@pytest.mark.django_db
+def test_backfill_restores_metrics_without_side_effects(runs, capsys):
+    challenges = Challenge.objects.count()
+    events = OutboxEvent.objects.count()
+
+    call_command("backfill_runs", "--workers", "1", "--chunk-size", "2")
+
+    assert metrics() == runs
+    assert Challenge.objects.count() == challenges
+    assert OutboxEvent.objects.count() == events
+    assert "Изменено: 3" in capsys.readouterr().out
+
+    # повторный запуск ничего не меняет
+    call_command("backfill_runs", "--workers", "1")
+    assert "Изменено: 0" in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_backfill_dry_run_does_not_write(runs, capsys, tmp_path):
+    checkpoint = tmp_path / "backfill.json"
+
+    call_command(
+        "backfill_runs", "--workers", "1", "--dry-run", "--checkpoint", checkpoint
+    )
+
+    assert "Изменились бы: 3" in capsys.readouterr().out
+    assert set(metrics().values()) == {(0, None, None)}
+    assert not checkpoint.exists()
+
+
+@pytest.mark.django_db
+def test_backfill_resumes_from_checkpoint(runs, capsys, tmp_path):
+    first = min(runs)
+    checkpoint = tmp_path / "backfill.json"
+    checkpoint.write_text(json.dumps({"chunk_size": 1, "done": [[first, first + 1]]}))
+
+    call_command(
+        "backfill_runs",
+        "--workers",
+        "1",
+        "--chunk-size",
+        "1",
+        "--checkpoint",
+        checkpoint,
+    )
+
+    restored = metrics()
+    assert restored[first] == (0, None, None)
+    assert all(restored[pk] == runs[pk] for pk in runs if pk != first)
+    assert len(json.loads(checkpoint.read_text())["done"]) == 3
+    assert "Пропущено готовых диапазонов: 1" in capsys.readouterr().out
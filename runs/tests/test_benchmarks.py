@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from runs.models import CollectibleItem, Position, Run, Subscribe
+from runs.seeding import seed_dataset
+
+
+@pytest.mark.django_db
+def test_seed_dataset_creates_requested_volume():
+    created = seed_dataset(
+        athletes=4, coaches=2, runs=10, positions=200, items=5, prefix="t"
+    )
+
+    assert created == {
+        "coaches": 2,
+        "athletes": 4,
+        "runs": 10,
+        "positions": 200,
+        "items": 5,
+    }
+    assert Subscribe.objects.count() == 4
+    assert Position.objects.count() == 200
+    assert CollectibleItem.objects.count() == 5
+    finished = Run.objects.filter(status=Run.Status.FINISHED)
+    assert all(run.distance > 0 and run.run_time_seconds for run in finished)
+
+
+@pytest.mark.django_db
+def test_benchmark_writes_json_and_rolls_back(tmp_path):
+    output = tmp_path / "results.json"
+
+    call_command("benchmark", "challenges", "--rows", "20", "--output", str(output))
+
+    report = json.loads(output.read_text())
+    assert report["meta"]["rows"] == 20
+    assert report["results"]["challenges.challenges_summary"] > 0
+    assert not Run.objects.exists()
+
+
+@pytest.mark.django_db
+def test_benchmark_compare_fails_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(
+        json.dumps({"results": {"challenges.challenges_summary": 0.000001}})
+    )
+
+    with pytest.raises(CommandError, match="Регрессия"):
+        call_command(
+            "benchmark", "challenges", "--rows", "20", "--compare", str(baseline)
+        )
+
+
+@pytest.mark.django_db
+def test_ingest_benchmark_is_not_throttled(tmp_path):
+    output = tmp_path / "results.json"
+
+    # больше, чем INGEST_RUN_BURST: без отключения троттлинга были бы 429
+    call_command("benchmark", "ingest", "--rows", "40", "--output", str(output))
+
+    assert json.loads(output.read_text())["results"]["ingest.post_position"] > 0
@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import call_command
+
+# Отдельный процесс: в процессе тестов тяжёлые модули уже загружены
+COLD_REQUEST = """
+import json, sys
+import django
+django.setup()
+from django.test import Client
+response = Client().get("/api/company_details/")
+print(json.dumps({"status": response.status_code, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_cold(script):
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "config.settings.local"}
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env=env,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_company_details_does_not_import_heavy_dependencies():
+    result = run_cold(COLD_REQUEST)
+
+    assert result["status"] == 200
+    loaded = {module.split(".")[0] for module in result["modules"]}
+    assert "runs.views" in result["modules"]
+    assert "openpyxl" not in loaded
+    assert "geopy" not in loaded
+
+
+def test_importtime_report(capsys):
+    call_command("importtime", "--limit", "5", "--module", "openpyxl")
+
+    output = capsys.readouterr().out
+    assert output.startswith("Всего:")
+    assert "config.wsgi" in output
+    assert "openpyxl" in output
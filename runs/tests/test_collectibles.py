@@ -0,0 +1,214 @@
+import random
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from openpyxl import Workbook
+
+from runs import outbox
+from runs.collectibles import (
+    COLLECT_RADIUS_M,
+    bbox_center,
+    build_grid,
+    match_chunk,
+    match_items,
+)
+from runs.geo import segment_meters
+from runs.models import CollectibleItem, OutboxEvent, Position, Run
+
+
+def item(uid, latitude, longitude):
+    return CollectibleItem.objects.create(
+        name=uid,
+        uid=uid,
+        latitude=latitude,
+        longitude=longitude,
+        picture="https://example.com/i.png",
+        value=1,
+    )
+
+
+def track(username, *points):
+    athlete = User.objects.create(username=username)
+    run = Run.objects.create(athlete=athlete)
+    Position.objects.bulk_create(
+        Position(run=run, latitude=lat, longitude=lon) for lat, lon in points
+    )
+    return athlete
+
+
+@pytest.mark.django_db
+def test_match_items_awards_past_runs_once():
+    near = track("near", ("55.7500", "37.6100"), ("55.7510", "37.6100"))
+    far = track("far", ("55.7600", "37.6100"))
+    coin = item("coin", 55.7514, 37.6100)  # ~45 м от второй точки near
+    coin.collected_by.add(far)  # собран раньше вживую — останется как есть
+
+    assert match_items() == 1
+    assert set(coin.collected_by.all()) == {near, far}
+    assert match_items([coin.id]) == 0
+
+
+@pytest.mark.django_db
+def test_match_items_in_several_chunks():
+    athlete = track("athlete", ("55.7500", "37.6100"))
+    coins = [item(f"coin{n}", 55.7500 + n / 10_000, 37.61) for n in range(3)]
+
+    # первый кусок уже создаёт связи — следующие не должны сбиться
+    assert match_items(chunk_size=1) == 3
+    assert set(athlete.items.all()) == set(coins)
+    assert OutboxEvent.objects.filter(topic=OutboxEvent.ITEMS_COLLECTED).count() == 3
+
+
+@pytest.mark.django_db
+def test_grid_join_matches_brute_force():
+    rnd = random.Random(7)
+    # высокая широта: градус долготы короче, ячейки задевают больше соседей
+    points = [(68 + rnd.random() / 50, 33 + rnd.random() / 50) for _ in range(200)]
+    items = [(n, 68 + rnd.random() / 50, 33 + rnd.random() / 50) for n in range(40)]
+    athletes = [
+        track(f"a{n}", (f"{lat:.4f}", f"{lon:.4f}"))
+        for n, (lat, lon) in enumerate(points)
+    ]
+
+    expected = {
+        (item_id, athlete.id)
+        for item_id, item_lat, item_lon in items
+        for athlete, (lat, lon) in zip(athletes, points)
+        if segment_meters((round(lat, 4), round(lon, 4)), (item_lat, item_lon))
+        <= COLLECT_RADIUS_M
+    }
+
+    assert expected
+    assert match_chunk(items) == expected
+
+
+@pytest.mark.django_db
+def test_upload_matches_items_through_outbox(client):
+    athlete = track("athlete", ("55.7000", "37.6000"))
+    book = Workbook()
+    book.active.append(["Name", "UID", "Value", "Latitude", "Longitude", "URL"])
+    book.active.append(
+        ["Монета", "coin", 5, 55.7003, 37.6, "https://example.com/c.png"]
+    )
+    body = BytesIO()
+    book.save(body)
+
+    response = client.post(
+        "/api/upload_file/",
+        {"file": SimpleUploadedFile("items.xlsx", body.getvalue())},
+    )
+    assert response.status_code == 200
+    assert not athlete.items.exists()  # запрос не ждёт сопоставления
+
+    outbox.autodiscover()
+    # items.uploaded и порождённое им items.collected
+    assert outbox.dispatch() == (2, 0)
+    assert list(athlete.items.values_list("uid", flat=True)) == ["coin"]
+
+
+@pytest.mark.django_db
+def test_match_chunk_across_antimeridian():
+    east = track("east", ("0.0000", "-179.9998"))
+    track("far", ("0.0000", "-179.9980"))
+    coin = item("coin", 0, 179.9998)  # ~45 м через 180°
+
+    assert match_chunk([(coin.id, 0, 179.9998)]) == {(coin.id, east.id)}
+
+
+@pytest.mark.django_db
+def test_match_chunk_near_pole():
+    # у полюса круг шире 180° по долготе — берётся полоса широты
+    across = track("across", ("89.9996", "120.0000"))  # ~87 м через полюс
+    track("far", ("89.9900", "0.0000"))
+    coin = item("coin", 89.9995, 0)
+    items = [(coin.id, 89.9995, 0.0)]
+
+    assert len(build_grid(items)) <= 3
+    assert match_chunk(items) == {(coin.id, across.id)}
+
+
+@pytest.mark.django_db
+def test_match_collectibles_command(capsys):
+    track("athlete", ("10.0000", "10.0000"))
+    item("a", 10.0005, 10.0)
+    item("b", 10.1, 10.0)
+
+    call_command("match_collectibles")
+
+    assert "Новых собранных предметов: 1" in capsys.readouterr().out
+
+
+@pytest.fixture
+def catalog():
+    """Предметы на разном расстоянии к северу от (55.75, 37.61)."""
+    return [item(f"i{n}", 55.75 + n * 0.001, 37.61) for n in (3, 0, 1, 20)]
+
+
+@pytest.mark.django_db
+def test_collectible_items_near_sorted_and_paginated(client, catalog):
+    response = client.get("/api/collectible_item/?near=55.75,37.61&radius=500&size=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3  # i20 дальше 2 км
+    assert [row["uid"] for row in data["results"]] == ["i0", "i1"]
+    assert data["results"][1]["distance"] == pytest.approx(111.3, abs=0.5)
+    assert data["next"]
+
+
+@pytest.mark.django_db
+def test_collectible_items_bbox(client, catalog):
+    response = client.get("/api/collectible_item/?bbox=37.6,55.7505,37.62,55.76")
+
+    assert [row["uid"] for row in response.json()["results"]] == ["i3", "i1"]
+    assert "distance" not in response.json()["results"][0]
+    # без фильтра — весь каталог списком, как раньше
+    assert len(client.get("/api/collectible_item/").json()) == 4
+
+
+def test_bbox_center_across_antimeridian():
+    assert bbox_center(170, -10, -170, 10) == (0, 180)
+    assert bbox_center(175, 0, -165, 10) == (5, -175)
+    assert bbox_center(-10, 0, 10, 10) == (5, 0)
+
+
+@pytest.mark.django_db
+def test_collectible_items_across_antimeridian(client):
+    for uid, longitude in [("west", -179.99), ("east", 179.98), ("far", 170)]:
+        item(uid, 0, longitude)
+
+    response = client.get("/api/collectible_item/?bbox=175,-1,-175,1")
+    assert [row["uid"] for row in response.json()["results"]] == ["west", "east"]
+
+    # круг у 180° переходит на другую сторону
+    response = client.get("/api/collectible_item/?near=0,179.995&radius=5000")
+    results = response.json()["results"]
+    assert [row["uid"] for row in results] == ["west", "east"]
+    assert results[0]["distance"] == pytest.approx(1669.6, abs=1)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query",
+    ["bbox=1,2,3", "bbox=0,10,1,5", "near=91,0", "near=55,37&radius=0"],
+)
+def test_collectible_items_invalid_filters(client, query):
+    response = client.get(f"/api/collectible_item/?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+@pytest.mark.django_db
+def test_position_bbox_filter_uses_index():
+    plan = Position.objects.filter(
+        latitude__gte=55.74,
+        latitude__lte=55.76,
+        longitude__gte=37.6,
+        longitude__lte=37.62,
+    ).explain()
+
+    assert "runs_positi_latitud_7c09fa_idx" in plan
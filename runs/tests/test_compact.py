@@ -0,0 +1,98 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+
+from runs.compact import decode_track
+from runs.middleware import choose_encoding
+from runs.models import Position, Run
+
+START = datetime(2024, 10, 12, 14, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def run():
+    athlete = User.objects.create(username="athlete")
+    run = Run.objects.create(athlete=athlete)
+    Position.objects.bulk_create(
+        Position(
+            run=run,
+            latitude=Decimal("55.7558") + Decimal(n) / 10_000,
+            longitude=Decimal("-37.6173"),
+            date_time=START + timedelta(seconds=5 * n) if n != 1 else None,
+            speed=2.5,
+            distance=n * 0.0111,
+        )
+        # последняя точка создана раньше, но по времени — в конце
+        for n in (2, 0, 1)
+    )
+    return run
+
+
+@pytest.mark.django_db
+def test_compact_track_round_trip(client, run):
+    response = client.get(f"/api/positions/?run={run.id}&format=compact")
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("application/vnd.runify.compact+json")
+    data = response.json()
+    assert data["count"] == 3
+    # точки по времени, null (точка без времени) разность не сбивает
+    assert data["columns"]["latitude"] == [557559, -1, 2]
+    assert data["columns"]["longitude"] == [-376173, 0, 0]
+    assert data["columns"]["date_time"] == [None, START.timestamp() * 1000, 10_000]
+
+    points = decode_track(data)
+    assert [p["latitude"] for p in points] == [55.7559, 55.7558, 55.756]
+    assert [p["date_time"] for p in points] == [
+        None,
+        START,
+        START + timedelta(seconds=10),
+    ]
+    assert [p["distance"] for p in points] == [0.011, 0, 0.022]
+    assert {p["run"] for p in points} == {run.id}
+
+    full = client.get(f"/api/positions/?run={run.id}").json()
+    assert sorted(p["id"] for p in points) == sorted(p["id"] for p in full)
+
+
+@pytest.mark.django_db
+def test_compact_format_is_list_only(client, run):
+    position = run.positions.first()
+    response = client.get(f"/api/positions/{position.id}/?format=compact")
+    assert response.status_code == 404
+
+    empty = client.get("/api/positions/?run=0&format=compact").json()
+    assert empty["count"] == 0 and empty["columns"]["id"] == []
+
+
+def test_choose_encoding_respects_quality():
+    available = ("br", "gzip")
+    assert choose_encoding("gzip, deflate, br", available) == "br"
+    assert choose_encoding("br;q=0.5, gzip", available) == "gzip"
+    assert choose_encoding("gzip;q=0, identity", available) is None
+    assert choose_encoding("*", ("gzip",)) == "gzip"
+    assert choose_encoding("", available) is None
+
+
+@pytest.mark.django_db
+def test_responses_are_gzipped_when_accepted(client, run):
+    url = f"/api/positions/?run={run.id}"
+    plain = client.get(url)
+    assert not plain.has_header("Content-Encoding")
+    assert "Accept-Encoding" in plain["Vary"]
+
+    packed = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert packed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed.content) == plain.content
+
+    streamed = client.get(url + "&stream=1", HTTP_ACCEPT_ENCODING="gzip")
+    body = gzip.decompress(b"".join(streamed.streaming_content))
+    assert json.loads(body) == plain.json()
+
+    # короткие ответы не сжимаются
+    small = client.get("/api/positions/?run=0", HTTP_ACCEPT_ENCODING="gzip")
+    assert not small.has_header("Content-Encoding")
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from runs.compare import interpolate, track_profile
+from runs.models import Position, Run
+
+START = datetime(2024, 10, 12, 8, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def make_run(athlete, seconds_per_km, km=1.0, status=Run.Status.FINISHED):
+    """Равномерный забег: точка каждые 250 м."""
+    run = Run.objects.create(athlete=athlete)
+    points = int(km * 4) + 1
+    Position.objects.bulk_create(
+        Position(
+            run=run,
+            latitude="55.7500",
+            longitude="37.6100",
+            distance=n * 0.25,
+            date_time=START + timedelta(seconds=n * seconds_per_km / 4),
+        )
+        for n in range(points)
+    )
+    Run.objects.filter(pk=run.pk).update(status=status)
+    run.refresh_from_db()
+    return run
+
+
+def test_interpolate_between_points():
+    profile = track_profile(
+        [(0.0, START), (0.1, START + timedelta(seconds=30)), (0.1, None)]
+        + [(0.3, START + timedelta(seconds=90))]
+    )
+
+    assert profile == [(0.0, 0.0), (100.0, 30.0), (300.0, 90.0)]
+    assert interpolate(profile, [0, 50, 200, 300, 400]) == [0.0, 15.0, 60.0, 90.0]
+
+
+@pytest.mark.django_db
+def test_compare_runs_by_distance(client):
+    athlete = User.objects.create(username="athlete")
+    today = make_run(athlete, seconds_per_km=300)
+    best = make_run(athlete, seconds_per_km=240, km=2)
+
+    response = client.get(f"/api/runs/{today.id}/compare/{best.id}/?step=500")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["distance"] == 1000.0  # общая часть — длина короткого забега
+    assert [sample["distance"] for sample in data["samples"]] == [0, 500, 1000]
+    assert [sample["gap"] for sample in data["samples"]] == [0.0, 30.0, 60.0]
+
+
+@pytest.mark.django_db
+def test_compare_is_cached_for_finished_runs(client, django_assert_num_queries):
+    athlete = User.objects.create(username="athlete")
+    today = make_run(athlete, seconds_per_km=300)
+    best = make_run(athlete, seconds_per_km=240)
+    url = f"/api/runs/{today.id}/compare/{best.id}/"
+
+    first = client.get(url).json()
+    with django_assert_num_queries(2):  # только сами забеги
+        assert client.get(url).json() == first
+
+    live = make_run(athlete, seconds_per_km=300, status=Run.Status.IN_PROGRESS)
+    with django_assert_num_queries(3):
+        client.get(f"/api/runs/{live.id}/compare/{best.id}/")
+
+
+@pytest.mark.django_db
+def test_compare_errors(client):
+    athlete = User.objects.create(username="athlete")
+    run = make_run(athlete, seconds_per_km=300)
+    empty = Run.objects.create(athlete=athlete)
+
+    assert client.get(f"/api/runs/{run.id}/compare/{empty.id}/").status_code == 400
+    assert client.get(f"/api/runs/{run.id}/compare/{run.id}/?step=1").status_code == 400
+    assert client.get(f"/api/runs/{run.id}/compare/999999/").status_code == 404
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+from django.db.backends.signals import connection_created
+
+from config.settings.database import postgres_database
+from runs.batch import lift_statement_timeout
+
+
+def test_production_database_uses_pool_by_default():
+    database = postgres_database({"DB_NAME": "runs", "DB_POOL_MAX_SIZE": "8"})
+
+    assert database["NAME"] == "runs"
+    assert database["CONN_MAX_AGE"] == 0
+    assert database["CONN_HEALTH_CHECKS"] is True
+    assert database["OPTIONS"]["pool"]["max_size"] == 8
+    assert database["OPTIONS"]["options"] == "-c statement_timeout=5000"
+
+
+def test_production_database_persistent_connections_without_pool():
+    database = postgres_database(
+        {"DB_POOL": "0", "DB_CONN_MAX_AGE": "120", "DB_STATEMENT_TIMEOUT_MS": "0"}
+    )
+
+    assert "pool" not in database["OPTIONS"]
+    assert "options" not in database["OPTIONS"]
+    assert database["CONN_MAX_AGE"] == 120
+
+
+def test_batch_commands_lift_statement_timeout_on_postgres():
+    executed = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql):
+            executed.append(sql)
+
+    lift_statement_timeout()
+    for vendor in ("postgresql", "sqlite"):
+        connection = SimpleNamespace(vendor=vendor, cursor=Cursor)
+        connection_created.send(sender=None, connection=connection)
+    # SQLite и открытые соединения теста не затрагиваются
+    assert executed == ["SET statement_timeout = 0"]
+
+
+@pytest.mark.django_db
+def test_db_stats_view(client):
+    response = client.get("/metrics/db")
+
+    assert response.status_code == 200
+    default = response.json()["default"]
+    assert default["vendor"] == "sqlite"
+    assert default["pooled"] is False
+    assert default["pool"] is None
+
+
+@pytest.mark.django_db
+def test_loadtest_single_mode(capsys):
+    call_command(
+        "loadtest",
+        "--mode",
+        "none",
+        "--requests",
+        "20",
+        "--path",
+        "/api/company_details/",
+    )
+
+    output = capsys.readouterr().out
+    assert output.splitlines()[1].split()[0] == "none"
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+from django.contrib.auth.models import User
+
+from runs.gpx import GPX_NAMESPACE
+from runs.models import Position, Run
+
+
+@pytest.fixture
+def athlete_runs():
+    athlete = User.objects.create_user(username="export1", password="pass")
+    runs = []
+    for n in range(2):
+        run = Run.objects.create(athlete=athlete, comment=f"забег <{n}>")
+        Position.objects.bulk_create(
+            Position(
+                run=run,
+                latitude=55.75 + i / 1000,
+                longitude=37.61,
+                date_time=f"2024-10-12T14:30:{i:02d}.5Z",
+                speed=2.0,
+                distance=i / 10,
+            )
+            for i in range(5)
+        )
+        runs.append(run)
+    return athlete, runs
+
+
+def content(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_export_run_gpx(client, athlete_runs):
+    _, (run, _) = athlete_runs
+
+    response = client.get(f"/api/runs/{run.id}/export/?format=gpx")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/gpx+xml"
+    root = ElementTree.fromstring(content(response))
+    points = root.findall(f".//{{{GPX_NAMESPACE}}}trkpt")
+    assert len(points) == 5
+    assert points[0].get("lat") == "55.7500"
+    assert points[0].find(f"{{{GPX_NAMESPACE}}}time").text == (
+        "2024-10-12T14:30:00.500000Z"
+    )
+
+
+@pytest.mark.django_db
+def test_export_run_csv_and_ndjson(client, athlete_runs):
+    _, (run, _) = athlete_runs
+
+    csv_response = client.get(f"/api/runs/{run.id}/export/?format=csv")
+    rows = list(csv.reader(io.StringIO(content(csv_response).decode())))
+    assert rows[0] == ["date_time", "latitude", "longitude", "speed", "distance"]
+    assert len(rows) == 6
+
+    ndjson_response = client.get(f"/api/runs/{run.id}/export/?format=ndjson")
+    lines = content(ndjson_response).splitlines()
+    assert [json.loads(line)["distance"] for line in lines] == [0, 0.1, 0.2, 0.3, 0.4]
+
+
+@pytest.mark.django_db
+def test_export_unknown_format_returns_404(client, athlete_runs):
+    _, (run, _) = athlete_runs
+
+    response = client.get(f"/api/runs/{run.id}/export/?format=kml")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_export_athlete_runs_zip(client, athlete_runs):
+    athlete, runs = athlete_runs
+
+    response = client.get(f"/api/users/{athlete.id}/export/")
+
+    assert response["Content-Type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(content(response)))
+    assert archive.namelist() == [f"run_{run.id}.gpx" for run in runs]
+    root = ElementTree.fromstring(archive.read(f"run_{runs[1].id}.gpx"))
+    assert root.find(f".//{{{GPX_NAMESPACE}}}desc").text == "забег <1>"
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from runs.fast_serializers import run_rows, user_rows
+from runs.models import Run, Subscribe
+from runs.serializers import RunSerializer, UserBaseSerializer
+from runs.views import UserViewSet
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.fixture
+def runs_data():
+    athlete = User.objects.create_user(
+        username="fast1", password="pass", first_name="Анна", last_name="Ли"
+    )
+    coach = User.objects.create_user(username="coach1", password="pass", is_staff=True)
+    Subscribe.objects.create(athlete=athlete, coach=coach, rating=4)
+
+    Run.objects.create(athlete=athlete, comment="init")
+    finished = Run.objects.create(athlete=athlete, comment="finished")
+    Run.objects.filter(pk=finished.pk).update(
+        status=Run.Status.FINISHED, run_time_seconds=615, speed=3.25
+    )
+    return athlete, coach
+
+
+@pytest.mark.django_db
+def test_run_rows_match_drf_serializer(runs_data):
+    qs = Run.objects.select_related("athlete").order_by("id")
+
+    assert render(run_rows.serialize(qs)) == render(RunSerializer(qs, many=True).data)
+
+
+@pytest.mark.django_db
+def test_run_rows_respect_current_timezone(runs_data):
+    qs = Run.objects.select_related("athlete").order_by("id")
+
+    with timezone.override("Europe/Moscow"):
+        fast = render(run_rows.serialize(qs))
+        slow = render(RunSerializer(qs, many=True).data)
+
+    assert fast == slow
+    assert b"+03:00" in fast
+
+
+@pytest.mark.django_db
+def test_user_rows_match_drf_serializer(runs_data):
+    view = UserViewSet()
+    view.request = SimpleNamespace(query_params={})
+    qs = view.get_queryset().order_by("id")
+
+    assert render(user_rows.serialize(qs)) == render(
+        UserBaseSerializer(qs, many=True).data
+    )
+
+
+@pytest.mark.django_db
+def test_runs_list_endpoint_uses_same_format(client, runs_data):
+    response = client.get("/api/runs/?ordering=created_at")
+
+    qs = Run.objects.select_related("athlete").order_by("created_at")
+    assert response.content == render(RunSerializer(qs, many=True).data)
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from runs.models import Run, Subscribe
+
+
+@pytest.fixture
+def athlete():
+    athlete = User.objects.create(username="athlete", first_name="Анна")
+    coach = User.objects.create(username="coach", is_staff=True)
+    Subscribe.objects.create(athlete=athlete, coach=coach, rating=5)
+    Run.objects.create(athlete=athlete, comment="утро")
+    return athlete
+
+
+def get(client, url):
+    """JSON ответа и весь SQL запроса (для потока — вместе с чтением тела)."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+        assert response.status_code == 200, url
+        if response.streaming:
+            data = json.loads(b"".join(response.streaming_content))
+        else:
+            data = response.json()
+    return data, " ".join(q["sql"] for q in queries)
+
+
+@pytest.mark.django_db
+def test_runs_fields_skip_athlete_join(client, athlete):
+    for url in [
+        "/api/runs/?fields=id,status",
+        "/api/runs/?omit=athlete_data,created_at,comment,run_time_seconds,"
+        "distance,speed,dropped_positions,athlete",
+        "/api/runs/?fields=id,status&stream=1",
+        "/api/runs/?fields=id,status&size=10&ordering=created_at",
+    ]:
+        rows, sql = get(client, url)
+        rows = rows["results"] if "results" in rows else rows
+        assert rows == [{"id": athlete.run_set.get().id, "status": "init"}], url
+        assert "auth_user" not in sql, url
+
+    rows, _ = get(client, "/api/runs/?omit=comment")
+    assert rows[0]["athlete_data"]["username"] == "athlete"
+    assert "comment" not in rows[0]
+
+
+@pytest.mark.django_db
+def test_users_fields_skip_annotations_and_lists(client, athlete):
+    rows, sql = get(client, "/api/users/?fields=id,username,type")
+    assert rows[0] == {
+        "id": athlete.id,
+        "username": "athlete",
+        "type": "athlete",
+    }
+    assert "GROUP BY" not in sql and "JOIN" not in sql
+
+    rows, sql = get(client, "/api/users/?omit=rating")
+    assert "runs_finished" in rows[0] and "runs_subscribe" not in sql
+
+    # детальный профиль без items и coach не выполняет их запросы
+    with CaptureQueriesContext(connection) as full:
+        client.get(f"/api/users/{athlete.id}/")
+    profile, sql = get(client, f"/api/users/{athlete.id}/?omit=items,coach")
+    assert set(profile) == {
+        "id",
+        "username",
+        "first_name",
+        "last_name",
+        "type",
+        "date_joined",
+        "runs_finished",
+        "rating",
+    }
+    assert len(full) - sql.count("SELECT") == 2
+
+
+@pytest.mark.django_db
+def test_fieldsets_validate_and_ignore_writes(client, athlete):
+    response = client.get("/api/runs/?fields=id,pace")
+    assert response.status_code == 400
+    assert response.json() == {"error": "Неизвестные поля: pace"}
+    assert client.get(f"/api/users/{athlete.id}/?fields=athletes").status_code == 400
+
+    # при записи выбор полей не действует
+    response = client.post(
+        "/api/runs/?fields=id",
+        {"athlete": athlete.id, "comment": "вечер"},
+        content_type="application/json",
+    )
+    assert response.status_code == 201
+    assert response.json()["comment"] == "вечер"
@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from runs.models import Challenge, Position, Run
+
+POINT = (
+    '<trkpt lat="{lat}" lon="37.6173"><time>2024-10-12T14:{m:02d}:00Z</time></trkpt>'
+)
+
+
+def gpx(*tracks):
+    """tracks — список (имя, количество точек); шаг ~111 м и одна минута."""
+    body = "".join(
+        f"<trk><name>{name}</name><trkseg>"
+        + "".join(POINT.format(lat=55 + i / 1000, m=i) for i in range(points))
+        + "</trkseg></trk>"
+        for name, points in tracks
+    )
+    return (
+        '<?xml version="1.0"?>'
+        f'<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">{body}</gpx>'
+    ).encode()
+
+
+@pytest.fixture
+def athlete():
+    return User.objects.create_user(username="import1", password="pass")
+
+
+@pytest.mark.django_db
+def test_import_gpx_creates_finished_runs(client, athlete):
+    upload = SimpleUploadedFile("tracks.gpx", gpx(("Утро", 21), ("Вечер", 3)))
+
+    response = client.post(
+        "/api/runs/import_gpx/", {"athlete": athlete.id, "file": upload}
+    )
+
+    assert response.status_code == 201
+    morning, evening = response.json()["runs"]
+    assert morning["points"] == 21
+    assert morning["run_time_seconds"] == 1200
+    assert len(morning["splits"]) == 2
+
+    run = Run.objects.get(pk=morning["id"])
+    assert run.status == Run.Status.FINISHED
+    assert run.comment == "Утро"
+    assert run.distance == pytest.approx(2.22, abs=0.01)
+    assert run.positions.count() == 21
+    last = run.positions.order_by("-date_time").first()
+    # накопленная дистанция точки округляется на каждом шаге, как при приёме по API
+    assert last.distance == pytest.approx(2.2)
+    assert Position.objects.filter(run_id=evening["id"]).count() == 3
+
+
+@pytest.mark.django_db
+def test_import_gpx_awards_challenges_once_per_batch(athlete, tmp_path):
+    for n in range(10):
+        (tmp_path / f"{n}.gpx").write_bytes(gpx((f"Забег {n}", 2)))
+
+    call_command("import_gpx", athlete.id, str(tmp_path))
+
+    assert Run.objects.filter(athlete=athlete).count() == 10
+    assert list(
+        Challenge.objects.filter(athlete=athlete).values_list("full_name", flat=True)
+    ) == [Challenge.TEN_RUNS]
+
+
+@pytest.mark.django_db
+def test_import_gpx_rejects_broken_file(client, athlete):
+    upload = SimpleUploadedFile("broken.gpx", b"<gpx><trk>")
+
+    response = client.post(
+        "/api/runs/import_gpx/", {"athlete": athlete.id, "file": upload}
+    )
+
+    assert response.status_code == 400
+    assert not Run.objects.exists()
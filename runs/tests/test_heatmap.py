@@ -0,0 +1,88 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from runs import outbox
+from runs.heatmap import CELLS, tile_size, tiles_in
+from runs.models import Position, Run, Subscribe
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def coach():
+    coach = User.objects.create(username="coach", is_staff=True)
+    athlete = User.objects.create(username="athlete")
+    stranger = User.objects.create(username="stranger")
+    Subscribe.objects.create(coach=coach, athlete=athlete)
+
+    for user, points in [
+        (athlete, [("55.7507", "37.6110"), ("55.7512", "37.6112"), ("56.5", "37.7")]),
+        (stranger, [("55.7507", "37.6110")]),
+    ]:
+        run = Run.objects.create(athlete=user)
+        Position.objects.bulk_create(
+            Position(run=run, latitude=lat, longitude=lon) for lat, lon in points
+        )
+    return coach
+
+
+def test_tiles_in_bbox():
+    assert tiles_in((-180, -90, 180, 90), 0) == [(0, 0)]
+    assert tiles_in((-180, -90, 180, 90), 1) == [(0, 0), (1, 0)]
+    # через антимеридиан
+    assert tiles_in((170, 0, -170, 10), 2) == [(3, 1), (0, 1)]
+    assert tile_size(2) / CELLS == pytest.approx(2.8125)
+
+
+@pytest.mark.django_db
+def test_heatmap_counts_coach_athletes_by_cell(client, coach):
+    response = client.get(
+        f"/api/heatmap/?coach={coach.id}&zoom=12&bbox=37.6,55.74,37.62,55.76"
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["zoom"] == 12
+    assert [cell[2] for cell in data["cells"]] == [
+        2
+    ]  # точка в 56.5 вне рамки, stranger не подписан
+    latitude, longitude, _ = data["cells"][0]
+    assert abs(latitude - 55.7507) < data["cell"]
+    assert abs(longitude - 37.6110) < data["cell"]
+
+
+@pytest.mark.django_db
+def test_heatmap_tiles_are_cached_until_run_finishes(
+    client, coach, django_assert_num_queries
+):
+    url = f"/api/heatmap/?coach={coach.id}&zoom=12&bbox=37.6,55.74,37.62,55.76"
+    client.get(url)
+
+    athlete = coach.subscribers.get().athlete
+    run = Run.objects.create(athlete=athlete, status=Run.Status.IN_PROGRESS)
+    Position.objects.create(run=run, latitude="55.7507", longitude="37.6110")
+
+    with django_assert_num_queries(1):  # только проверка тренера
+        assert client.get(url).json()["cells"][0][2] == 2
+
+    run.status = Run.Status.FINISHED
+    run.save()
+    outbox.autodiscover()
+    outbox.dispatch()
+
+    assert client.get(url).json()["cells"][0][2] == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query", ["", "coach={coach}&zoom=30", "coach={coach}&zoom=14&bbox=-10,-10,10,10"]
+)
+def test_heatmap_invalid_params(client, coach, query):
+    response = client.get("/api/heatmap/?" + query.format(coach=coach.id))
+
+    assert response.status_code == 400
+    assert "error" in response.json()
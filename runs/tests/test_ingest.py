@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+
+from runs.imports import TrackImport
+from runs.ingest import DUPLICATE, TOO_FAST, TOO_SOON, PositionFilter
+from runs.metrics import registry
+from runs.models import Position, Run
+
+START = datetime(2024, 10, 12, 14, 30, tzinfo=timezone.utc)
+
+
+def at(seconds, latitude="55.7500", longitude="37.6100"):
+    return Decimal(latitude), Decimal(longitude), START + timedelta(seconds=seconds)
+
+
+def test_position_filter_reasons():
+    check = PositionFilter(min_distance_m=2, min_interval_s=1, max_speed_mps=15).check
+
+    assert check(None, at(0)) is None
+    assert check(at(0), at(0.5, "55.7510")) == TOO_SOON
+    assert check(at(0), at(10, "55.7500", "37.6100")) == DUPLICATE  # светофор
+    assert check(at(0), at(10, "55.7600")) == TOO_FAST  # 1,1 км за 10 с
+    assert check(at(0), at(10, "55.7510")) is None  # 111 м за 10 с
+    # нулевой порог выключает проверку
+    assert PositionFilter(0, 0, 0).check(at(0), at(0)) is None
+
+
+@pytest.mark.django_db
+def test_api_drops_jitter_and_counts_per_run(client):
+    registry.reset()
+    athlete = User.objects.create(username="athlete")
+    run = Run.objects.create(athlete=athlete, status=Run.Status.IN_PROGRESS)
+
+    statuses = []
+    for second, latitude in [(0, 55.75), (5, 55.75), (10, 55.76), (20, 55.7505)]:
+        response = client.post(
+            "/api/positions/",
+            {
+                "run": run.id,
+                "latitude": latitude,
+                "longitude": 37.61,
+                "date_time": f"2024-10-12T14:30:{second:02d}.000000",
+            },
+        )
+        statuses.append(response.status_code)
+
+    assert statuses == [201, 200, 200, 201]
+    assert response.json()["distance"] == pytest.approx(0.06, abs=0.01)
+    assert Position.objects.filter(run=run).count() == 2
+    assert client.get(f"/api/runs/{run.id}/").json()["dropped_positions"] == 2
+    text = registry.render()
+    assert 'positions_dropped_total{reason="duplicate"} 1' in text
+    assert 'positions_dropped_total{reason="too_fast"} 1' in text
+
+
+@pytest.mark.django_db
+def test_gpx_import_uses_same_filter():
+    athlete = User.objects.create(username="athlete")
+    run = Run.objects.create(athlete=athlete, status=Run.Status.FINISHED)
+    track = TrackImport(run)
+
+    added = [
+        track.add(*point)
+        for point in (at(0), at(1), at(30, "55.7510"), at(31, "55.8000"))
+    ]
+    track.finish()
+
+    assert [position is not None for position in added] == [True, False, True, False]
+    run.refresh_from_db()
+    assert run.dropped_positions == 2
+    assert track.as_dict()["dropped"] == 2
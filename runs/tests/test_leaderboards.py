@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from runs import outbox
+from runs.leaderboards import rank_of, top
+from runs.models import CollectibleItem, LeaderboardEntry, Run
+
+
+@pytest.fixture
+def athletes():
+    return [User.objects.create(username=name) for name in ("ann", "bob", "eve")]
+
+
+def finish(athlete, distance):
+    return Run.objects.create(
+        athlete=athlete, status=Run.Status.FINISHED, distance=distance
+    )
+
+
+def test_period_start():
+    day = date(2024, 10, 17)  # четверг
+    assert LeaderboardEntry.start_of("week", day) == date(2024, 10, 14)
+    assert LeaderboardEntry.start_of("month", day) == date(2024, 10, 1)
+
+
+@pytest.mark.django_db
+def test_finished_runs_update_boards_with_shared_rank(client, athletes):
+    ann, bob, eve = athletes
+    for athlete, distance in [(ann, 5), (ann, 3), (bob, 8), (eve, 2)]:
+        finish(athlete, distance)
+    outbox.autodiscover()
+    outbox.dispatch()
+
+    board = top("distance", "week", size=3)
+    assert [(row["username"], row["rank"]) for row in board] == [
+        ("ann", 1),
+        ("bob", 1),
+        ("eve", 3),
+    ]
+    assert rank_of("distance", "month", eve.id) == {"rank": 3, "score": 2}
+    assert rank_of("runs", "week", ann.id) == {"rank": 1, "score": 2}
+
+    response = client.get(f"/api/leaderboards/runs/?period=month&athlete={bob.id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["period_start"] == str(timezone.localdate().replace(day=1))
+    assert [row["score"] for row in data["top"]] == [2, 1, 1]
+    assert data["me"] == {"rank": 2, "score": 1}
+
+    # пересборка из забегов даёт те же строки
+    LeaderboardEntry.objects.all().delete()
+    call_command("rebuild_leaderboards")
+    assert rank_of("runs", "week", ann.id) == {"rank": 1, "score": 2}
+    assert LeaderboardEntry.objects.count() == 12
+
+
+@pytest.mark.django_db
+def test_old_run_scored_in_week_it_finished(athletes):
+    ann = athletes[0]
+    finished = timezone.now() - timedelta(days=90)
+    Run.objects.create(
+        athlete=ann, status=Run.Status.FINISHED, distance=7, finish_time=finished
+    )
+    outbox.autodiscover()
+    outbox.dispatch()
+
+    day = timezone.localdate(finished)
+    assert rank_of("distance", "week", ann.id, day=day) == {"rank": 1, "score": 7}
+    assert rank_of("runs", "month", ann.id, day=day) == {"rank": 1, "score": 1}
+    assert rank_of("distance", "week", ann.id) is None
+
+
+@pytest.mark.django_db
+def test_collected_items_counted_once(client, athletes):
+    ann = athletes[0]
+    CollectibleItem.objects.create(
+        name="Монета",
+        uid="coin",
+        latitude=55.7501,
+        longitude=37.61,
+        picture="https://example.com/c.png",
+        value=5,
+    )
+    run = Run.objects.create(athlete=ann, status=Run.Status.IN_PROGRESS)
+
+    # обе точки рядом с монетой, но собрать её можно один раз
+    for second, latitude in [(0, 55.75), (10, 55.7502)]:
+        response = client.post(
+            "/api/positions/",
+            {
+                "run": run.id,
+                "latitude": latitude,
+                "longitude": 37.61,
+                "date_time": f"2024-10-12T14:30:{second:02d}.000000",
+            },
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+    outbox.autodiscover()
+    outbox.dispatch()
+
+    assert rank_of("items", "week", ann.id) == {"rank": 1, "score": 5}
+
+
+@pytest.mark.django_db
+def test_leaderboard_rejects_bad_params(client):
+    for url in [
+        "/api/leaderboards/speed/",
+        "/api/leaderboards/distance/?period=year",
+        "/api/leaderboards/distance/?date=вчера",
+        "/api/leaderboards/distance/?size=1000",
+        "/api/leaderboards/distance/?athlete=me",
+    ]:
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert "error" in response.json()
@@ -0,0 +1,66 @@
+import pytest
+from django.contrib.auth.models import User
+
+from runs.metrics import OVERFLOW_LABEL, MetricsRegistry, registry
+from runs.models import Run
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_requests_and_queries(client):
+    client.get("/api/runs/")
+    client.get("/api/runs/")
+    client.get("/api/runs/999/")
+
+    text = client.get("/metrics").content.decode()
+
+    assert 'http_requests_total{view="runs-list",method="GET",status="200"} 2' in text
+    assert 'http_requests_total{view="runs-detail",method="GET",status="404"} 1' in text
+    assert (
+        'http_request_duration_seconds_count{view="runs-list",method="GET"} 2' in text
+    )
+    assert 'db_queries_total{view="runs-list",method="GET"} 2' in text
+
+
+@pytest.mark.django_db
+def test_domain_step_timers(client):
+    athlete = User.objects.create_user(username="metrics1", password="pass")
+    run = Run.objects.create(athlete=athlete, comment="run")
+    client.post(f"/api/runs/{run.id}/start/")
+    for second in (10, 20):
+        client.post(
+            "/api/positions/",
+            {
+                "run": run.id,
+                # точки в одном месте отбросит фильтр дребезга
+                "latitude": round(55.7558 + second / 100_000, 4),
+                "longitude": 37.6173,
+                "date_time": f"2024-10-12T14:30:{second}.000000",
+            },
+        )
+    client.post(f"/api/runs/{run.id}/stop/")
+
+    text = registry.render()
+
+    assert 'step_duration_seconds_count{step="position.distance"} 1' in text
+    assert 'step_duration_seconds_count{step="position.collectibles"} 2' in text
+    assert 'step_duration_seconds_count{step="run.distance"} 1' in text
+    assert 'step_duration_seconds_count{step="run.challenges"} 1' in text
+
+
+def test_registry_memory_is_bounded():
+    metrics = MetricsRegistry(max_series=2)
+
+    for n in range(10):
+        metrics.observe_request(f"view-{n}", "GET", 200, 0.01, 1, 0.001)
+
+    text = metrics.render()
+    assert f'view="{OVERFLOW_LABEL}"' in text
+    assert 'view="view-5"' not in text
+    assert len(metrics._requests) == 3
@@ -0,0 +1,129 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from runs import outbox
+from runs.models import OutboxEvent, Run, Subscribe
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Чистый реестр обработчиков на время теста."""
+    # обработчики приложения регистрируются в настоящем реестре
+    outbox.autodiscover()
+    registry = {}
+    monkeypatch.setattr(outbox, "HANDLERS", registry)
+    return registry
+
+
+@pytest.mark.django_db
+def test_run_flow_writes_events(client):
+    athlete = User.objects.create(username="athlete")
+    run = Run.objects.create(athlete=athlete)
+
+    client.post(f"/api/runs/{run.id}/start/")
+    client.post(
+        "/api/positions/",
+        {
+            "run": run.id,
+            "latitude": 55.75,
+            "longitude": 37.61,
+            "date_time": "2024-10-12T14:30:00.000000",
+        },
+    )
+    client.post(f"/api/runs/{run.id}/stop/")
+
+    events = list(OutboxEvent.objects.order_by("id"))
+    assert [event.topic for event in events] == [
+        OutboxEvent.RUN_STARTED,
+        OutboxEvent.POSITION_RECORDED,
+        OutboxEvent.RUN_FINISHED,
+    ]
+    assert {event.key for event in events} == {athlete.id}
+    assert events[2].payload["status"] == Run.Status.FINISHED
+
+
+@pytest.mark.django_db
+def test_rate_coach_writes_event(client):
+    coach = User.objects.create(username="coach", is_staff=True)
+    athlete = User.objects.create(username="athlete")
+    Subscribe.objects.create(coach=coach, athlete=athlete)
+
+    client.post(f"/api/rate_coach/{coach.id}/", {"athlete": athlete.id, "rating": 4})
+
+    event = OutboxEvent.objects.get()
+    assert event.topic == OutboxEvent.COACH_RATED
+    assert event.payload == {
+        "coach": coach.id,
+        "athlete": athlete.id,
+        "rating": 4,
+        "previous": None,
+    }
+
+
+@pytest.mark.django_db
+def test_dispatch_delivers_and_keeps_order_per_key(handlers, settings):
+    settings.OUTBOX_MAX_ATTEMPTS = 2
+    seen = []
+
+    def consume(event):
+        if event.payload.get("broken"):
+            raise ValueError("broken")
+        seen.append(event.pk)
+
+    handlers["test"] = [consume]
+    broken = OutboxEvent.emit("test", 1, broken=True)
+    waiting = OutboxEvent.emit("test", 1)
+    other = OutboxEvent.emit("test", 2)
+
+    assert outbox.dispatch() == (1, 1)
+    assert seen == [other.pk]
+    broken.refresh_from_db()
+    assert broken.attempts == 1
+    assert broken.last_error == "ValueError: broken"
+
+    # вторая неудача — событие мёртвое и больше не держит очередь ключа
+    broken.retry_at = None
+    broken.save()
+    assert outbox.dispatch() == (0, 1)
+    broken.refresh_from_db()
+    assert broken.status == OutboxEvent.Status.DEAD
+
+    assert outbox.dispatch() == (1, 0)
+    assert seen == [other.pk, waiting.pk]
+
+
+@pytest.mark.django_db
+def test_dispatch_skips_events_claimed_by_other_dispatcher(handlers):
+    seen = []
+    first = OutboxEvent.emit("test", 1)
+    second = OutboxEvent.emit("test", 1)
+    third = OutboxEvent.emit("test", 2)
+
+    def consume(event):
+        seen.append(event.pk)
+        if event.pk == first.pk:
+            # пока идёт проход, другой диспетчер доставил второе событие
+            OutboxEvent.objects.filter(pk=second.pk).update(
+                status=OutboxEvent.Status.DONE
+            )
+
+    handlers["test"] = [consume]
+
+    assert outbox.dispatch() == (2, 0)
+    assert seen == [first.pk, third.pk]
+    assert outbox.claim(second.pk) is None
+
+
+@pytest.mark.django_db
+def test_dispatch_outbox_command_partition(handlers, capsys):
+    seen = []
+    handlers["test"] = [lambda event: seen.append(event.key)]
+    for key in range(4):
+        OutboxEvent.emit("test", key)
+
+    call_command("dispatch_outbox", "--partition", "1/2")
+
+    assert seen == [1, 3]
+    assert "Доставлено: 2, с ошибкой: 0" in capsys.readouterr().out
+    assert OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING).count() == 2
@@ -0,0 +1,65 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from runs.profiling import list_profiles, make_token
+
+
+@pytest.fixture(autouse=True)
+def profiling_dir(settings, tmp_path):
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_MAX_FILES = 2
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_requests_are_not_profiled_by_default(client, profiling_dir):
+    response = client.get("/api/runs/?_profile=1")
+
+    assert "X-Profile-Id" not in response
+    assert list_profiles() == []
+
+
+@pytest.mark.django_db
+def test_signed_header_saves_profile_and_sql(client, profiling_dir):
+    response = client.get("/api/runs/", HTTP_X_PROFILE=make_token())
+
+    profile_id = response["X-Profile-Id"]
+    assert (profiling_dir / f"{profile_id}.prof").exists()
+    (meta,) = list_profiles()
+    assert meta["view"] == "runs-list"
+    assert meta["queries"][0]["sql"].startswith("SELECT")
+
+
+@pytest.mark.django_db
+def test_forged_header_is_ignored(client):
+    response = client.get("/api/runs/", HTTP_X_PROFILE="profile:forged")
+
+    assert "X-Profile-Id" not in response
+
+
+@pytest.mark.django_db
+def test_coach_query_param_is_ignored(client, profiling_dir):
+    coach = User.objects.create_user(username="coach1", password="pass", is_staff=True)
+    client.force_login(coach)
+
+    response = client.get("/api/runs/?_profile=1")
+
+    assert "X-Profile-Id" not in response
+    assert list_profiles() == []
+
+
+@pytest.mark.django_db
+def test_superuser_query_param_and_rotation(client):
+    admin = User.objects.create_superuser(username="admin1", password="pass")
+    client.force_login(admin)
+
+    ids = [client.get("/api/runs/?_profile=1")["X-Profile-Id"] for _ in range(3)]
+
+    assert [meta["id"] for meta in list_profiles()] == ids[:0:-1]
+
+    out = StringIO()
+    call_command("profiles", ids[-1], "--limit", "5", stdout=out)
+    assert "SQL: 1 запросов" in out.getvalue()
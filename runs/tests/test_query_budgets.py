@@ -0,0 +1,340 @@
+"""
+Бюджет SQL-запросов для каждого маршрута API.
+
+Данных в фикстуре по несколько штук каждого вида, чтобы N+1 проявлялся
+повторами. Новый маршрут без записи в BUDGETS роняет
+test_every_route_has_budget.
+"""
+
+import json
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import URLResolver, get_resolver
+from django.urls.resolvers import ResolverMatch
+from openpyxl import Workbook
+
+from runs.models import Challenge, CollectibleItem, Position, Run, Subscribe
+from runs.querybudget import QueryBudgetExceeded
+
+
+@pytest.fixture
+def data():
+    coach = User.objects.create(username="coach", is_staff=True)
+    other_coach = User.objects.create(username="coach2", is_staff=True)
+    athletes = [User.objects.create(username=f"athlete{n}") for n in range(3)]
+    items = CollectibleItem.objects.bulk_create(
+        CollectibleItem(
+            name=f"Предмет {n}",
+            uid=f"item-{n}",
+            latitude=55.75,
+            longitude=37.61,
+            picture="https://example.com/i.png",
+            value=10,
+        )
+        for n in range(3)
+    )
+    runs = []
+    for athlete in athletes:
+        Subscribe.objects.create(athlete=athlete, coach=coach, rating=4)
+        athlete.items.add(*items)
+        Challenge.objects.create(athlete=athlete, full_name=Challenge.TEN_RUNS)
+        for n in range(3):
+            run = Run.objects.create(athlete=athlete, comment=f"Забег {n}")
+            Position.objects.bulk_create(
+                Position(
+                    run=run,
+                    latitude=55.75 + i / 1000,
+                    longitude=37.61,
+                    date_time=f"2024-10-12T14:30:{i:02d}.0Z",
+                    speed=2.0,
+                    distance=i / 10,
+                )
+                for i in range(3)
+            )
+            runs.append(run)
+
+    Run.objects.filter(pk__in=[runs[0].pk, runs[1].pk]).update(
+        status=Run.Status.FINISHED, distance=1
+    )
+    Run.objects.filter(pk=runs[2].pk).update(status=Run.Status.IN_PROGRESS)
+    return SimpleNamespace(
+        coach=coach,
+        other_coach=other_coach,
+        athlete=athletes[0],
+        athletes=athletes,
+        finished=runs[0],
+        in_progress=runs[2],
+        new=runs[3],
+        position=runs[0].positions.first(),
+        challenge=Challenge.objects.first(),
+    )
+
+
+def workbook(rows):
+    book = Workbook()
+    book.active.append(["Name", "UID", "Value", "Latitude", "Longitude", "URL"])
+    for row in rows:
+        book.active.append(row)
+    body = BytesIO()
+    book.save(body)
+    return SimpleUploadedFile("items.xlsx", body.getvalue())
+
+
+GPX = (
+    b'<?xml version="1.0"?><gpx xmlns="http://www.topografix.com/GPX/1/1">'
+    b"<trk><trkseg>"
+    b'<trkpt lat="55.75" lon="37.61"><time>2024-10-12T14:00:00Z</time></trkpt>'
+    b'<trkpt lat="55.76" lon="37.61"><time>2024-10-12T14:05:00Z</time></trkpt>'
+    b"</trkseg></trk></gpx>"
+)
+
+
+def users_routes(name):
+    return [
+        (f"{name}-list", "get", lambda d: "/api/users/", None, 1),
+        (f"{name}-detail", "get", lambda d: f"/api/users/{d.athlete.id}/", None, 3),
+        (f"{name}-detail", "get", lambda d: f"/api/users/{d.coach.id}/", None, 3),
+        (
+            f"{name}-export",
+            "get",
+            lambda d: f"/api/users/{d.athlete.id}/export/?tracks=csv",
+            None,
+            3,
+        ),
+    ]
+
+
+# (маршрут, метод, url, тело, бюджет запросов)
+BUDGETS = [
+    ("api-root", "get", lambda d: "/api/", None, 0),
+    ("runs-list", "get", lambda d: "/api/runs/", None, 1),
+    ("runs-list", "get", lambda d: "/api/runs/?size=5&ordering=created_at", None, 2),
+    (
+        "runs-list",
+        "post",
+        lambda d: "/api/runs/",
+        lambda d: {"athlete": d.athlete.id, "comment": "новый"},
+        4,
+    ),
+    ("runs-detail", "get", lambda d: f"/api/runs/{d.finished.id}/", None, 1),
+    ("runs-start", "post", lambda d: f"/api/runs/{d.new.id}/start/", None, 6),
+    ("runs-stop", "post", lambda d: f"/api/runs/{d.in_progress.id}/stop/", None, 9),
+    (
+        "runs-compare",
+        "get",
+        lambda d: f"/api/runs/{d.in_progress.id}/compare/{d.finished.id}/",
+        None,
+        3,
+    ),
+    (
+        "runs-export",
+        "get",
+        lambda d: f"/api/runs/{d.finished.id}/export/?format=gpx",
+        None,
+        2,
+    ),
+    (
+        "runs-import-gpx",
+        "post",
+        lambda d: "/api/runs/import_gpx/",
+        lambda d: {"athlete": d.athlete.id, "file": SimpleUploadedFile("t.gpx", GPX)},
+        8,
+    ),
+    *users_routes("users"),
+    *users_routes("user"),
+    ("challenges-list", "get", lambda d: "/api/challenges/", None, 1),
+    (
+        "challenges-detail",
+        "get",
+        lambda d: f"/api/challenges/{d.challenge.id}/",
+        None,
+        1,
+    ),
+    ("positions-list", "get", lambda d: "/api/positions/", None, 1),
+    (
+        "positions-list",
+        "get",
+        lambda d: f"/api/positions/?run={d.finished.id}&format=compact",
+        None,
+        1,
+    ),
+    (
+        "positions-list",
+        "post",
+        lambda d: "/api/positions/",
+        lambda d: {
+            "run": d.in_progress.id,
+            "latitude": 55.7501,
+            "longitude": 37.61,
+            "date_time": "2024-10-12T14:31:00.000000",
+        },
+        10,
+    ),
+    (
+        "positions-detail",
+        "get",
+        lambda d: f"/api/positions/{d.position.id}/",
+        None,
+        1,
+    ),
+    (
+        "runs.views.AthleteInfoView",
+        "get",
+        lambda d: f"/api/athlete_info/{d.athlete.id}/",
+        None,
+        5,
+    ),
+    (
+        "runs.views.heatmap_view",
+        "get",
+        lambda d: f"/api/heatmap/?coach={d.coach.id}&zoom=12&bbox=37.5,55.7,37.7,55.8",
+        None,
+        2,
+    ),
+    (
+        "runs.views.leaderboard",
+        "get",
+        lambda d: f"/api/leaderboards/distance/?period=month&athlete={d.athlete.id}",
+        None,
+        3,
+    ),
+    (
+        "runs.views.CollectibleItemView",
+        "get",
+        lambda d: "/api/collectible_item/",
+        None,
+        1,
+    ),
+    (
+        "runs.views.CollectibleItemView",
+        "get",
+        lambda d: "/api/collectible_item/?bbox=37.6,55.7,37.7,55.8",
+        None,
+        2,
+    ),
+    (
+        "runs.views.CollectibleItemView",
+        "get",
+        lambda d: "/api/collectible_item/?near=55.75,37.61&radius=500",
+        None,
+        2,
+    ),
+    (
+        "runs.views.UploadCollectibleFile",
+        "post",
+        lambda d: "/api/upload_file/",
+        lambda d: {
+            "file": workbook(
+                [
+                    [
+                        f"Новый {n}",
+                        f"new-{n}",
+                        5,
+                        55.7,
+                        37.6,
+                        "https://example.com/n.png",
+                    ]
+                    for n in range(3)
+                ]
+                + [["Дубль", "item-0", 5, 55.7, 37.6, "https://example.com/n.png"]]
+            )
+        },
+        5,
+    ),
+    (
+        "runs.views.subscribe_to_coach",
+        "post",
+        lambda d: f"/api/subscribe_to_coach/{d.other_coach.id}/",
+        lambda d: {"athlete": d.athlete.id},
+        4,
+    ),
+    (
+        "runs.views.bulk_subscribe_to_coach",
+        "post",
+        lambda d: f"/api/subscribe_to_coach/{d.other_coach.id}/bulk/",
+        lambda d: {"athletes": [a.id for a in d.athletes]},
+        3,
+    ),
+    (
+        "runs.views.bulk_rate_coach",
+        "post",
+        lambda d: f"/api/rate_coach/{d.coach.id}/bulk/",
+        lambda d: json.dumps(
+            {"ratings": [{"athlete": a.id, "rating": 5} for a in d.athletes]}
+        ),
+        6,
+    ),
+    (
+        "runs.views.challenges_summary",
+        "get",
+        lambda d: "/api/challenges_summary/",
+        None,
+        1,
+    ),
+    (
+        "runs.views.rate_coach",
+        "post",
+        lambda d: f"/api/rate_coach/{d.coach.id}/",
+        lambda d: {"athlete": d.athlete.id, "rating": 5},
+        7,
+    ),
+    (
+        "runs.views.analytics_for_coach",
+        "get",
+        lambda d: f"/api/analytics_for_coach/{d.coach.id}/",
+        None,
+        4,
+    ),
+    ("runs.views.company_details", "get", lambda d: "/api/company_details/", None, 0),
+    ("runs.views.metrics", "get", lambda d: "/metrics", None, 0),
+    ("runs.views.db_stats", "get", lambda d: "/metrics/db", None, 0),
+]
+
+
+def api_routes(patterns=None):
+    """Имена (как в метриках) всех маршрутов, кроме админки."""
+    labels = set()
+    for pattern in patterns or get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name != "admin":
+                labels |= api_routes(pattern.url_patterns)
+            continue
+        labels.add(ResolverMatch(pattern.callback, (), {}, pattern.name).view_name)
+    return labels
+
+
+def test_every_route_has_budget():
+    assert api_routes() == {route for route, *_ in BUDGETS}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "route, method, url, body, budget",
+    BUDGETS,
+    ids=[f"{route}-{method}-{n}" for n, (route, method, *_) in enumerate(BUDGETS)],
+)
+def test_route_query_budget(
+    client, data, query_budget, route, method, url, body, budget
+):
+    kwargs = {"data": body(data)} if body else {}
+    if isinstance(kwargs.get("data"), str):
+        kwargs["content_type"] = "application/json"
+
+    with query_budget(budget, label=route):
+        response = getattr(client, method)(url(data), **kwargs)
+        if response.streaming:
+            b"".join(response.streaming_content)
+
+    assert response.status_code < 400, response.content
+
+
+@pytest.mark.django_db
+def test_repeated_statement_is_reported_as_n_plus_one(query_budget, data):
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        with query_budget():
+            for run in Run.objects.all():
+                run.athlete.username
@@ -0,0 +1,69 @@
+import datetime
+from decimal import Decimal
+from io import BytesIO
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from runs.models import Run
+from runs.renderers import FastJSONParser, FastJSONRenderer
+
+PAYLOAD = {
+    "latitude": Decimal("55.7558"),
+    "longitude": Decimal("-37.6173"),
+    "utc": datetime.datetime(2024, 10, 12, 14, 30, 15, 123456, tzinfo=datetime.UTC),
+    "moscow": datetime.datetime(2024, 10, 12, 17, 30, tzinfo=ZoneInfo("Europe/Moscow")),
+    "naive": datetime.datetime(2024, 10, 12, 14, 30, 15),
+    "date": datetime.date(2024, 10, 12),
+    "duration": datetime.timedelta(minutes=10),
+    "text": "Забег по парку",
+    "items": [{"id": 1, "speed": 3.25, "distance": None, "ok": True}],
+    1: "не строковый ключ",
+}
+
+
+def test_renderer_matches_drf_json_renderer():
+    assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+
+def test_renderer_respects_indent():
+    fast = FastJSONRenderer().render(PAYLOAD, "application/json; indent=4")
+    assert fast == JSONRenderer().render(PAYLOAD, "application/json; indent=4")
+
+
+def test_parser_matches_drf_json_parser():
+    body = JSONRenderer().render({k: v for k, v in PAYLOAD.items() if k != 1})
+
+    fast = FastJSONParser().parse(BytesIO(body))
+    assert fast == JSONParser().parse(BytesIO(body))
+
+
+def test_parser_rejects_invalid_json():
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(BytesIO(b'{"latitude": NaN}'))
+
+
+@pytest.mark.django_db
+def test_position_date_time_round_trip(client):
+    athlete = User.objects.create_user(username="json1", password="pass")
+    run = Run.objects.create(
+        athlete=athlete, comment="run", status=Run.Status.IN_PROGRESS
+    )
+
+    payload = {
+        "run": run.id,
+        "latitude": 55.7558,
+        "longitude": 37.6173,
+        "date_time": "2024-10-12T14:30:15.123456",
+    }
+    response = client.post("/api/positions/", payload, content_type="application/json")
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["date_time"] == "2024-10-12T14:30:15.123456"
+    assert data["latitude"] == "55.7558"
+    assert data["created_at"].endswith("Z")
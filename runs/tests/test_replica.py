@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache.backends.db import DatabaseCache
+
+from runs.models import Challenge, Subscribe
+from runs.routers import ReplicaRouter, use_replica
+
+# В тестах replica — отдельная in-memory база SQLite, default в неё не
+# реплицируется: данные, видимые только в default, показывают, куда ушло чтение.
+BOTH = {"transaction": True, "databases": ["default", "replica"]}
+
+
+@pytest.fixture
+def replica(settings):
+    settings.REPLICA_DATABASE = "replica"
+    User.objects.using("replica").create(username="from_replica")
+    return "replica"
+
+
+@pytest.mark.django_db(**BOTH)
+def test_use_replica_routes_reads_only(replica):
+    User.objects.create(username="from_primary")
+
+    with use_replica():
+        assert list(User.objects.values_list("username", flat=True)) == ["from_replica"]
+        User.objects.create(username="written_inside")
+
+    assert User.objects.filter(username="written_inside").exists()
+    assert not User.objects.using("replica").filter(username="written_inside").exists()
+
+
+@pytest.mark.django_db(**BOTH)
+def test_list_endpoints_read_from_replica(client, replica):
+    athlete = User.objects.create(username="primary_athlete")
+    Challenge.objects.create(athlete=athlete, full_name=Challenge.TEN_RUNS)
+
+    users = client.get("/api/users/").json()
+    assert [user["username"] for user in users] == ["from_replica"]
+    assert client.get("/api/challenges_summary/").json() == []
+
+    # detail и забеги остаются на основной базе
+    assert client.get(f"/api/users/{athlete.id}/").status_code == 200
+
+
+@pytest.mark.django_db(**BOTH)
+def test_client_reads_own_writes_after_write(client, replica):
+    coach = User.objects.create(username="coach", is_staff=True)
+    athlete = User.objects.create(username="athlete")
+
+    response = client.post(
+        f"/api/subscribe_to_coach/{coach.id}/", {"athlete": athlete.id}
+    )
+
+    assert response.status_code == 200
+    assert response.cookies["db_primary"]["max-age"] == 10
+    usernames = {user["username"] for user in client.get("/api/users/").json()}
+    assert usernames == {"coach", "athlete"}
+    assert Subscribe.objects.filter(athlete=athlete).exists()
+
+
+@pytest.mark.django_db(**BOTH)
+def test_without_replica_alias_everything_reads_primary(client, settings):
+    settings.REPLICA_DATABASE = "missing"
+    User.objects.create(username="primary_only")
+
+    users = client.get("/api/users/").json()
+
+    assert [user["username"] for user in users] == ["primary_only"]
+
+
+def test_database_cache_is_read_from_primary(settings):
+    settings.REPLICA_DATABASE = "replica"
+    cache_model = DatabaseCache("django_cache", {}).cache_model_class
+
+    with use_replica():
+        assert ReplicaRouter().db_for_read(cache_model) is None
+        assert ReplicaRouter().db_for_read(User) == "replica"
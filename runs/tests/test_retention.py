@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from runs.models import Position, Run
+from runs.retention import simplify
+
+START = datetime(2020, 5, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def test_simplify_keeps_corners_only():
+    # на север 4 точки по ~11 м, затем поворот на восток
+    line = [(55.75 + n * 0.0001, 37.61) for n in range(5)]
+    corner = line + [(55.7504, 37.6102), (55.7504, 37.6104)]
+
+    assert simplify(line, tolerance_m=5) == [0, 4]
+    assert simplify(corner, tolerance_m=5) == [0, 4, 6]
+    assert simplify(corner[:2], tolerance_m=5) == [0, 1]
+
+
+def make_run(athlete, days_ago):
+    run = Run.objects.create(athlete=athlete, distance=0.07, speed=2.5)
+    Position.objects.bulk_create(
+        Position(
+            run=run,
+            latitude=f"{55.75 + n * 0.0001:.4f}",
+            longitude="37.6100",
+            distance=n * 0.011,
+            date_time=START + timedelta(seconds=n * 5),
+        )
+        for n in range(7)
+    )
+    Run.objects.filter(pk=run.pk).update(
+        status=Run.Status.FINISHED,
+        created_at=datetime.now(timezone.utc) - timedelta(days=days_ago),
+        run_time_seconds=30,
+    )
+    return run
+
+
+@pytest.fixture
+def runs():
+    athlete = User.objects.create(username="athlete")
+    return make_run(athlete, days_ago=800), make_run(athlete, days_ago=10)
+
+
+@pytest.mark.django_db
+def test_simplify_tracks_removes_old_points_only(runs, capsys):
+    old, recent = runs
+
+    call_command("simplify_tracks", "--days", "365")
+
+    assert "Удалено точек: 5 из 7" in capsys.readouterr().out
+    kept = old.positions.order_by("date_time")
+    assert [p.distance for p in kept] == [0, pytest.approx(0.066)]
+    assert recent.positions.count() == 7
+
+    old.refresh_from_db()
+    assert (old.distance, old.run_time_seconds, old.speed) == (0.07, 30, 2.5)
+    assert old.simplified_at is not None
+
+    # прореженный забег больше не трогают ни повторный запуск, ни backfill
+    call_command("simplify_tracks", "--days", "365")
+    call_command("backfill_runs", "--workers", "1")
+    old.refresh_from_db()
+    assert old.distance == 0.07
+    assert "Забегов: 1, точек: 7" in capsys.readouterr().out  # только recent
+
+
+@pytest.mark.django_db
+def test_simplify_tracks_dry_run(runs, capsys):
+    call_command("simplify_tracks", "--days", "1", "--dry-run")
+
+    assert "Было бы удалено точек: 10 из 14" in capsys.readouterr().out
+    assert Position.objects.count() == 14
+    assert not Run.objects.filter(simplified_at__isnull=False).exists()
@@ -0,0 +1,101 @@
+import pytest
+from django.contrib.auth.models import User
+
+from runs.models import OutboxEvent, Subscribe
+
+
+@pytest.fixture
+def club():
+    coach = User.objects.create(username="coach", is_staff=True)
+    other = User.objects.create(username="other_coach", is_staff=True)
+    athletes = [User.objects.create(username=f"athlete{n}") for n in range(3)]
+    Subscribe.objects.create(coach=coach, athlete=athletes[0], rating=2)
+    return coach, other, athletes
+
+
+@pytest.mark.django_db
+def test_bulk_subscribe_reports_each_athlete(client, club):
+    coach, other, (old, new, newer) = club
+
+    response = client.post(
+        f"/api/subscribe_to_coach/{coach.id}/bulk/",
+        {"athletes": [old.id, new.id, newer.id, new.id, other.id, 999]},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"athlete": old.id, "error": "Already subscribed"},
+        {"athlete": new.id, "status": "ok"},
+        {"athlete": newer.id, "status": "ok"},
+        {"athlete": other.id, "error": "User is not an athlete"},
+        {"athlete": 999, "error": "Athlete not found"},
+    ]
+    assert set(coach.subscribers.values_list("athlete_id", flat=True)) == {
+        old.id,
+        new.id,
+        newer.id,
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_rate_updates_subscribed_only(client, club):
+    coach, _, (rated, unsubscribed, _) = club
+
+    response = client.post(
+        f"/api/rate_coach/{coach.id}/bulk/",
+        {
+            "ratings": [
+                {"athlete": rated.id, "rating": 3},
+                {"athlete": unsubscribed.id, "rating": 4},
+                {"athlete": rated.id, "rating": 5},
+            ]
+        },
+        content_type="application/json",
+    )
+
+    assert response.json()["results"] == [
+        {"athlete": rated.id, "status": "ok"},
+        {
+            "athlete": unsubscribed.id,
+            "error": "Athlete is not subscribed to this coach",
+        },
+    ]
+    assert Subscribe.objects.get(athlete=rated).rating == 5
+    event = OutboxEvent.objects.get(topic=OutboxEvent.COACH_RATED)
+    assert (event.key, event.payload["rating"], event.payload["previous"]) == (
+        rated.id,
+        5,
+        2,
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_endpoints_validate_coach_and_body(client, club):
+    coach, _, athletes = club
+    athlete = athletes[0]
+
+    not_coach = client.post(
+        f"/api/subscribe_to_coach/{athlete.id}/bulk/",
+        {"athletes": [athlete.id]},
+        content_type="application/json",
+    )
+    assert not_coach.status_code == 400
+    assert not_coach.json() == {"error": "User is not a coach"}
+
+    missing = client.post(
+        "/api/rate_coach/999/bulk/",
+        {"ratings": [{"athlete": athlete.id, "rating": 5}]},
+        content_type="application/json",
+    )
+    assert missing.status_code == 404
+
+    for url, body in [
+        (f"/api/subscribe_to_coach/{coach.id}/bulk/", {"athletes": []}),
+        (
+            f"/api/rate_coach/{coach.id}/bulk/",
+            {"ratings": [{"athlete": 1, "rating": 9}]},
+        ),
+    ]:
+        response = client.post(url, body, content_type="application/json")
+        assert response.status_code == 400
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+
+from runs.models import Position, Run
+
+
+@pytest.fixture
+def run_with_positions():
+    athlete = User.objects.create_user(username="stream1", password="pass")
+    run = Run.objects.create(athlete=athlete, comment="stream")
+    Position.objects.bulk_create(
+        Position(
+            run=run,
+            latitude=55.7 + i / 10000,
+            longitude=37.6,
+            date_time=f"2024-10-12T14:30:{i:02d}.000001Z",
+            speed=1.5,
+            distance=i / 100,
+        )
+        for i in range(30)
+    )
+    return run
+
+
+def consume(response):
+    assert isinstance(response, StreamingHttpResponse)
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_positions_stream_matches_regular_list(client, run_with_positions):
+    url = f"/api/positions/?run={run_with_positions.id}"
+    regular = client.get(url)
+    streamed = client.get(url + "&stream=1")
+
+    assert streamed["Content-Type"] == "application/json"
+    assert consume(streamed) == regular.content
+
+
+@pytest.mark.django_db
+def test_runs_ndjson_stream(client, run_with_positions):
+    Run.objects.create(athlete=run_with_positions.athlete, comment="second")
+
+    response = client.get(
+        "/api/runs/?ordering=created_at", HTTP_ACCEPT="application/x-ndjson"
+    )
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = consume(response).splitlines()
+    assert [json.loads(line)["comment"] for line in lines] == ["stream", "second"]
+
+
+@pytest.mark.django_db
+def test_empty_stream_is_valid_json(client):
+    response = client.get("/api/runs/?stream=1")
+
+    assert json.loads(consume(response)) == []
+
+
+@pytest.mark.django_db
+def test_paginated_runs_are_not_streamed(client, run_with_positions):
+    response = client.get("/api/runs/?size=1&stream=1&ordering=created_at")
+
+    assert response.json()["count"] == 1
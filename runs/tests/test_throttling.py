@@ -0,0 +1,123 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from runs.metrics import registry
+from runs.models import Run
+from runs.throttling import BucketStore, CacheStore, MemoryStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("store_class", [MemoryStore, CacheStore])
+def test_token_bucket_refills_at_rate(store_class):
+    cache.clear()
+    store = store_class()
+    store.clock = FakeClock()
+
+    assert [store.take("bucket", rate=2, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert store.take("bucket", rate=2, burst=3) == pytest.approx(0.5)
+
+    store.clock.now += 1  # +2 токена
+    assert store.take("bucket", rate=2, burst=3) == 0
+    assert store.take("bucket", rate=2, burst=3) == 0
+    assert store.take("bucket", rate=2, burst=3) > 0
+    assert store.take("other", rate=2, burst=3) == 0
+
+
+@pytest.mark.parametrize("store_class", [MemoryStore, CacheStore])
+def test_rejected_request_takes_no_tokens(store_class):
+    cache.clear()
+    store = store_class()
+    store.clock = FakeClock()
+    buckets = [("run", 1, 2), ("athlete", 1, 1)]
+
+    assert store.take_all(buckets) == [0, 0]
+    assert store.take_all(buckets) == [0, pytest.approx(1)]
+    # ведро забега не потратилось на отклонённый запрос
+    assert store.take("run", rate=1, burst=2) == 0
+
+
+def test_incomplete_store_fails_on_creation():
+    class NoSet(BucketStore):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        NoSet()
+
+
+def post_position(client, run, second):
+    return client.post(
+        "/api/positions/",
+        {
+            "run": run.id,
+            "latitude": round(55.75 + second / 10_000, 4),
+            "longitude": 37.61,
+            "date_time": f"2024-10-12T14:30:{second:02d}.000000",
+        },
+    )
+
+
+@pytest.mark.django_db
+def test_positions_throttled_per_run(client, settings):
+    settings.INGEST_RUN_RATE = 0.5
+    settings.INGEST_RUN_BURST = 2
+    registry.reset()
+    athlete = User.objects.create(username="athlete")
+    run = Run.objects.create(athlete=athlete, status=Run.Status.IN_PROGRESS)
+    other = Run.objects.create(athlete=athlete, status=Run.Status.IN_PROGRESS)
+
+    statuses = [post_position(client, run, second).status_code for second in (0, 5)]
+    throttled = post_position(client, run, 10)
+
+    assert statuses == [201, 201]
+    assert throttled.status_code == 429
+    assert throttled["Retry-After"] == "2"
+    assert post_position(client, other, 0).status_code == 201
+    assert client.get(f"/api/positions/?run={run.id}").status_code == 200
+    assert 'throttled_requests_total{scope="run"} 1' in registry.render()
+
+
+@pytest.mark.django_db
+def test_positions_non_object_body_is_bad_request(client):
+    for body in ([{"run": 1}], 5):
+        response = client.post("/api/positions/", body, content_type="application/json")
+        assert response.status_code == 400, body
+
+
+@pytest.mark.django_db
+def test_positions_throttled_per_athlete(client, settings):
+    settings.INGEST_ATHLETE_RATE = 0.1
+    settings.INGEST_ATHLETE_BURST = 2
+    athlete = User.objects.create(username="athlete")
+    runs = [
+        Run.objects.create(athlete=athlete, status=Run.Status.IN_PROGRESS)
+        for _ in range(3)
+    ]
+
+    statuses = [post_position(client, run, 0).status_code for run in runs]
+
+    assert statuses == [201, 201, 429]
+
+
+@pytest.mark.django_db
+def test_athlete_throttle_keeps_run_tokens(client, settings):
+    settings.INGEST_RUN_RATE = 0.01
+    settings.INGEST_RUN_BURST = 2
+    settings.INGEST_ATHLETE_RATE = 0.01
+    settings.INGEST_ATHLETE_BURST = 1
+    athlete = User.objects.create(username="athlete")
+    run = Run.objects.create(athlete=athlete, status=Run.Status.IN_PROGRESS)
+
+    assert post_position(client, run, 0).status_code == 201
+    assert post_position(client, run, 5).status_code == 429
+
+    settings.INGEST_ATHLETE_RATE = 0
+    assert post_position(client, run, 10).status_code == 201
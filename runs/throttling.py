@@ -0,0 +1,168 @@
+"""
+Ограничение частоты приёма точек (token bucket).
+
+У каждого забега и каждого атлета своё ведро: оно пополняется rate
+токенами в секунду до burst, запрос берёт один токен. Пустое ведро — 429
+с Retry-After, через сколько появится токен. Состояние вёдер хранится в
+INGEST_THROTTLE_STORE: MemoryStore — в памяти процесса, CacheStore — в
+кэше Django (общий для процессов, если общий кэш).
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+from .models import Run
+
+
+class BucketStore(ABC):
+    """
+    Хранилище вёдер: take_all() атомарно пополняет вёдра и берёт по токену
+    из каждого — из всех сразу или ни из одного.
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key):
+        """Состояние ведра (tokens, stamp) или None."""
+
+    @abstractmethod
+    def set(self, key, state, ttl):
+        """Сохраняет состояние ведра на ttl секунд."""
+
+    def take(self, key, rate, burst):
+        """Секунды до следующего токена: 0 — токен взят, запрос проходит."""
+        return self.take_all([(key, rate, burst)])[0]
+
+    def take_all(self, buckets):
+        """
+        buckets — [(key, rate, burst)]. Секунды до токена по каждому ведру;
+        токены списываются, только если все ожидания 0: запрос, отклонённый
+        одним ведром, не тратит остальные.
+        """
+
+        with self._lock:
+            now = self.clock()
+            levels = []
+            for key, rate, burst in buckets:
+                tokens, stamp = self.get(key) or (burst, now)
+                levels.append(min(burst, tokens + (now - stamp) * rate))
+            waits = [
+                0.0 if tokens >= 1 else (1 - tokens) / rate
+                for tokens, (_, rate, _) in zip(levels, buckets)
+            ]
+            if not any(waits):
+                for tokens, (key, rate, burst) in zip(levels, buckets):
+                    # за ttl ведро пополнится до burst — дальше запись не нужна
+                    self.set(key, (tokens - 1, now), ttl=burst / rate + 1)
+            return waits
+
+
+class MemoryStore(BucketStore):
+    """Вёдра в памяти процесса; лишние полные вёдра вычищаются."""
+
+    max_keys = 10_000
+
+    def __init__(self):
+        super().__init__()
+        self._buckets = {}
+
+    def get(self, key):
+        state = self._buckets.get(key)
+        return state[0] if state else None
+
+    def set(self, key, state, ttl):
+        if len(self._buckets) >= self.max_keys and key not in self._buckets:
+            now = self.clock()
+            self._buckets = {k: v for k, v in self._buckets.items() if v[1] > now}
+        self._buckets[key] = (state, self.clock() + ttl)
+
+    def reset(self):
+        self._buckets.clear()
+
+
+class CacheStore(BucketStore):
+    """
+    Вёдра в кэше Django. Блокировка только внутри процесса: при общем
+    кэше параллельные процессы изредка пропустят лишний запрос.
+    """
+
+    clock = staticmethod(time.time)
+
+    def get(self, key):
+        return cache.get(key)
+
+    def set(self, key, state, ttl):
+        cache.set(key, state, ttl)
+
+
+@lru_cache
+def get_store(path):
+    return import_string(path)()
+
+
+class IngestThrottle(BaseThrottle):
+    """
+    Троттлинг POST точек по забегу и по атлету забега.
+    Пределы — INGEST_{RUN,ATHLETE}_RATE (токенов в секунду, 0 — без
+    ограничения) и INGEST_{RUN,ATHLETE}_BURST.
+    """
+
+    def __init__(self):
+        self._wait = None
+
+    def scopes(self, request):
+        if not isinstance(request.data, Mapping):
+            return []  # не объект — 400 от сериализатора
+        run_id = str(request.data.get("run", ""))
+        if not run_id.isdigit():
+            return []  # забег проверит сериализатор
+        athlete_id = (
+            Run.objects.filter(pk=run_id).values_list("athlete_id", flat=True).first()
+        )
+
+        scopes = [("run", run_id)]
+        if athlete_id is not None:
+            scopes.append(("athlete", athlete_id))
+        return scopes
+
+    def allow_request(self, request, view):
+        if request.method != "POST":
+            return True
+
+        scopes, buckets = [], []
+        for scope, ident in self.scopes(request):
+            rate = getattr(settings, f"INGEST_{scope.upper()}_RATE")
+            if not rate:
+                continue
+            burst = getattr(settings, f"INGEST_{scope.upper()}_BURST")
+            scopes.append(scope)
+            buckets.append((f"ingest:{scope}:{ident}", rate, burst))
+        if not buckets:
+            return True
+
+        store = get_store(settings.INGEST_THROTTLE_STORE)
+        waits = store.take_all(buckets)
+        if not any(waits):
+            return True
+        # Retry-After — пока токен появится во всех вёдрах
+        self._wait = max(waits)
+        for scope, wait in zip(scopes, waits):
+            if wait:
+                registry.increment("throttled_requests_total", scope=scope)
+        return False
+
+    def wait(self):
+        return self._wait
@@ -10,6 +10,10 @@ from .views import (
     challenges_summary,
     rate_coach,
     analytics_for_coach,
+    heatmap_view,
+    leaderboard,
+    bulk_subscribe_to_coach,
+    bulk_rate_coach,
 )
 
 router = DefaultRouter()
@@ -21,7 +25,11 @@ urlpatterns = [
     path("upload_file/", UploadCollectibleFile.as_view()),
     path("subscribe_to_coach/<int:id>/", subscribe_to_coach),
     path("challenges_summary/", challenges_summary),
+    path("subscribe_to_coach/<int:id>/bulk/", bulk_subscribe_to_coach),
     path("rate_coach/<int:coach_id>/", rate_coach),
+    path("rate_coach/<int:coach_id>/bulk/", bulk_rate_coach),
     path("analytics_for_coach/<int:coach_id>/", analytics_for_coach),
+    path("heatmap/", heatmap_view),
+    path("leaderboards/<str:kind>/", leaderboard),
     path("", include(router.urls)),
 ]
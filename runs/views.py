@@ -1,13 +1,17 @@
 """API представления и ViewSet-ы бегового трекера."""
 
+from datetime import date
+
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Min, Max, Q, Count, Avg, Sum
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from xml.etree.ElementTree import ParseError
 
-from geopy.distance import geodesic
 from django_filters.rest_framework import DjangoFilterBackend
-from openpyxl import load_workbook
 
 from rest_framework import viewsets, generics
 from rest_framework import serializers
@@ -24,6 +28,8 @@ from .models import (
     Challenge,
     Position,
     CollectibleItem,
+    LeaderboardEntry,
+    OutboxEvent,
     Subscribe,
 )
 from .serializers import (
@@ -32,12 +38,52 @@ from .serializers import (
     ChallengeSerializer,
     PositionSerializer,
     CollectibleItemSerializer,
+    CollectibleItemDistanceSerializer,
+    CollectibleItemImportSerializer,
     UserBaseSerializer,
     AthleteDetailSerializer,
     CoachDetailSerializer,
     RateCoachSerializer,
+    BulkRateCoachSerializer,
+    BulkSubscribeSerializer,
+)
+from .exports import (
+    CONTENT_TYPES,
+    export_athlete_runs,
+    export_filename,
+    export_run,
+)
+from .fast_serializers import position_rows, run_rows, user_rows
+from .fieldsets import selected, wants
+from .collectibles import (
+    COLLECT_RADIUS_M,
+    MAX_NEAR_RADIUS_M,
+    bbox_center,
+    by_distance,
+    in_bbox,
+    near,
+    parse_bbox,
+    parse_point,
 )
-from .pagination import CustomPageNumberPagination
+from .compact import encode_track
+from .compare import cached_compare
+from .geo import segment_meters, segment_metrics
+from .heatmap import MAX_ZOOM, WORLD, heatmap
+from .imports import import_gpx
+from .leaderboards import rank_of, top
+from .ingest import PositionFilter, record_dropped
+from .metrics import database_stats, registry, timer
+from .pagination import CustomPageNumberPagination, ViewportPagination
+from .renderers import (
+    CompactRenderer,
+    CSVRenderer,
+    GPXRenderer,
+    NDJSONRenderer,
+    ZipRenderer,
+)
+from .routers import replica_reads
+from .streaming import StreamingListMixin
+from .throttling import IngestThrottle
 
 
 @api_view(["GET"])
@@ -50,6 +96,18 @@ def company_details(request):
     return Response(data)
 
 
+def metrics(request):
+    """Метрики процесса в текстовом формате Prometheus: GET /metrics"""
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def db_stats(request):
+    """Пул и постоянные соединения с БД в этом процессе: GET /metrics/db"""
+    return JsonResponse(database_stats())
+
+
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def subscribe_to_coach(request, id):
@@ -89,6 +147,84 @@ def subscribe_to_coach(request, id):
     return Response({"status": "ok"}, status=200)
 
 
+def roster(coach_id, athlete_ids):
+    """
+    Тренер и атлеты одним запросом (in_bulk). Тренера нет — 404.
+    Возвращает (тренер или None, если это не тренер; {id: атлет или текст ошибки}).
+    """
+
+    users = User.objects.in_bulk([coach_id, *athlete_ids])
+    coach = users.get(coach_id)
+    if coach is None:
+        raise Http404("Coach not found")
+    if not coach.is_staff:
+        return None, {}
+
+    athletes = {}
+    for athlete_id in athlete_ids:
+        athlete = users.get(athlete_id)
+        if athlete is None:
+            athletes[athlete_id] = "Athlete not found"
+        elif athlete.is_staff:
+            athletes[athlete_id] = "User is not an athlete"
+        else:
+            athletes[athlete_id] = athlete
+    return coach, athletes
+
+
+def roster_results(athletes):
+    """Ответ bulk-эндпойнтов: "ok" или текст ошибки по каждому атлету."""
+    return [
+        (
+            {"athlete": athlete_id, "status": "ok"}
+            if isinstance(result, User)
+            else {"athlete": athlete_id, "error": result}
+        )
+        for athlete_id, result in athletes.items()
+    ]
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def bulk_subscribe_to_coach(request, id):
+    """
+    Подписывает на тренера сразу список атлетов.
+    POST /api/subscribe_to_coach/<coach_id>/bulk/
+    body: {"athletes": [<athlete_id>, ...]}
+    Ответ — результат по каждому атлету: {"athlete", "status": "ok"} или
+    {"athlete", "error"} с теми же текстами, что у subscribe_to_coach.
+    """
+
+    serializer = BulkSubscribeSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    athlete_ids = list(dict.fromkeys(serializer.validated_data["athletes"]))
+
+    coach, athletes = roster(id, athlete_ids)
+    if coach is None:
+        return Response({"error": "User is not a coach"}, status=400)
+
+    found = [a_id for a_id, athlete in athletes.items() if isinstance(athlete, User)]
+    subscribed = set(
+        Subscribe.objects.filter(coach=coach, athlete_id__in=found).values_list(
+            "athlete_id", flat=True
+        )
+    )
+    for athlete_id in subscribed:
+        athletes[athlete_id] = "Already subscribed"
+
+    # уникальность (athlete, coach) защищает от гонки с параллельной подпиской
+    Subscribe.objects.bulk_create(
+        [
+            Subscribe(athlete_id=athlete_id, coach=coach)
+            for athlete_id in found
+            if athlete_id not in subscribed
+        ],
+        ignore_conflicts=True,
+    )
+    return Response({"results": roster_results(athletes)})
+
+
+@replica_reads
 @api_view(["GET"])
 def challenges_summary(request):
     """
@@ -163,13 +299,144 @@ def rate_coach(request, coach_id):
             {"error": "Athlete is not subscribed to this coach"}, status=400
         )
 
-    # 4. Ставим или обновляем рейтинг
-    sub.rating = rating
-    sub.save(update_fields=["rating"])
+    # 4. Ставим или обновляем рейтинг (вместе с событием для outbox)
+    previous = sub.rating
+    with transaction.atomic():
+        sub.rating = rating
+        sub.save(update_fields=["rating"])
+        OutboxEvent.emit(
+            OutboxEvent.COACH_RATED,
+            athlete.id,
+            coach=coach.id,
+            athlete=athlete.id,
+            rating=rating,
+            previous=previous,
+        )
 
     return Response({"status": "ok", "rating": rating})
 
 
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def bulk_rate_coach(request, coach_id):
+    """
+    Оценки тренера от нескольких атлетов одним запросом.
+    POST /api/rate_coach/<coach_id>/bulk/
+    body: {"ratings": [{"athlete": <id>, "rating": 1..5}, ...]}
+    Ответ — результат по каждому атлету, как у bulk_subscribe_to_coach.
+    """
+
+    serializer = BulkRateCoachSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    # повтор атлета в списке — действует последняя оценка
+    ratings = {
+        row["athlete"]: row["rating"] for row in serializer.validated_data["ratings"]
+    }
+
+    coach, athletes = roster(coach_id, list(ratings))
+    if coach is None:
+        return Response({"error": "User is not a coach"}, status=400)
+
+    found = [a_id for a_id, athlete in athletes.items() if isinstance(athlete, User)]
+    subs = {
+        sub.athlete_id: sub
+        for sub in Subscribe.objects.filter(coach=coach, athlete_id__in=found)
+    }
+    events = []
+    for athlete_id, athlete in athletes.items():
+        if not isinstance(athlete, User):
+            continue
+        sub = subs.get(athlete_id)
+        if sub is None:
+            athletes[athlete_id] = "Athlete is not subscribed to this coach"
+            continue
+        previous, sub.rating = sub.rating, ratings[athlete_id]
+        events.append(
+            OutboxEvent(
+                topic=OutboxEvent.COACH_RATED,
+                key=athlete_id,
+                payload={
+                    "coach": coach.id,
+                    "athlete": athlete_id,
+                    "rating": sub.rating,
+                    "previous": previous,
+                },
+            )
+        )
+
+    # оценки и события — одной транзакцией, как в rate_coach
+    if subs:
+        with transaction.atomic():
+            Subscribe.objects.bulk_update(subs.values(), ["rating"])
+            OutboxEvent.objects.bulk_create(events)
+    return Response({"results": roster_results(athletes)})
+
+
+@replica_reads
+@api_view(["GET"])
+def heatmap_view(request):
+    """
+    Тепловая карта точек атлетов тренера: ?coach=<id>&zoom=<0..18>&bbox=...
+    Ответ — ячейки [lat, lon, count] с центрами ячеек.
+    """
+
+    coach_id = request.query_params.get("coach")
+    if not coach_id or not coach_id.isdigit():
+        return Response({"error": "coach обязателен"}, status=400)
+    get_object_or_404(User, pk=coach_id, is_staff=True)
+
+    try:
+        zoom = int(request.query_params.get("zoom", 10))
+        if not 0 <= zoom <= MAX_ZOOM:
+            raise ValueError(f"zoom: от 0 до {MAX_ZOOM}")
+        bbox = request.query_params.get("bbox")
+        data = heatmap(int(coach_id), zoom, parse_bbox(bbox) if bbox else WORLD)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    return Response(data)
+
+
+@replica_reads
+@api_view(["GET"])
+def leaderboard(request, kind):
+    """
+    Таблица лидеров kind (distance, runs, items):
+    ?period=week|month&date=YYYY-MM-DD&size=10&athlete=<id>.
+    С athlete в ответе есть его место в поле me.
+    """
+
+    params = request.query_params
+    period = params.get("period", LeaderboardEntry.Period.WEEK)
+    if kind not in LeaderboardEntry.Kind.values:
+        return Response({"error": f"Неизвестная таблица: {kind}"}, status=400)
+    if period not in LeaderboardEntry.Period.values:
+        return Response({"error": "period: week или month"}, status=400)
+
+    try:
+        day = date.fromisoformat(params["date"]) if "date" in params else None
+        size = int(params.get("size", 10))
+        if not 1 <= size <= 100:
+            raise ValueError("size: от 1 до 100")
+        athlete = params.get("athlete")
+        if athlete is not None and not athlete.isdigit():
+            raise ValueError("athlete должен быть числом")
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    day = day or timezone.localdate()
+    return Response(
+        {
+            "kind": kind,
+            "period": period,
+            "period_start": LeaderboardEntry.start_of(period, day),
+            "top": top(kind, period, day, size),
+            "me": rank_of(kind, period, int(athlete), day) if athlete else None,
+        }
+    )
+
+
+@replica_reads
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def analytics_for_coach(request, coach_id):
@@ -220,7 +487,7 @@ def analytics_for_coach(request, coach_id):
     return Response(data)
 
 
-class RunViewSet(viewsets.ModelViewSet):
+class RunViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """API для управления забегами атлетов."""
 
     serializer_class = RunSerializer
@@ -230,7 +497,9 @@ class RunViewSet(viewsets.ModelViewSet):
     pagination_class = None
 
     def get_queryset(self):
-        qs = Run.objects.select_related("athlete")
+        qs = Run.objects.all()
+        if wants(self.request, "athlete_data"):
+            qs = qs.select_related("athlete")
         athlete_id = self.request.query_params.get("athlete_id")
         if athlete_id:
             qs = qs.filter(athlete_id=athlete_id)
@@ -268,17 +537,86 @@ class RunViewSet(viewsets.ModelViewSet):
                 status=400,
             )
 
+        # Время и средняя скорость считаются до save(), чтобы переход
+        # в finished и челленджи обработались одним сохранением
         run.status = Run.Status.FINISHED
-        run.save()
-
-        # После завершения — считаем время и среднюю скорость
         self.calculate_run_time(run)
+        run.save()
         return Response({"status": run.status})
 
+    @action(
+        detail=True,
+        methods=["get"],
+        renderer_classes=[GPXRenderer, CSVRenderer, NDJSONRenderer],
+    )
+    def export(self, request, pk=None):
+        """
+        Выгружает трек забега потоком.
+        GET /api/runs/<id>/export/?format=gpx|csv|ndjson
+        """
+        run = self.get_object()
+        export_format = request.accepted_renderer.format
+
+        response = StreamingHttpResponse(
+            export_run(run, export_format),
+            content_type=CONTENT_TYPES[export_format],
+        )
+        filename = export_filename(run, export_format)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=True, methods=["get"], url_path=r"compare/(?P<other_id>\d+)")
+    def compare(self, request, pk=None, other_id=None):
+        """
+        Сравнивает забег с другим по дистанции («забег с тенью»).
+        GET /api/runs/<id>/compare/<other_id>/?step=100
+        """
+        run = self.get_object()
+        other = get_object_or_404(Run, pk=other_id)
+
+        step = request.query_params.get("step", "100")
+        if not step.isdigit() or not 10 <= int(step) <= 10_000:
+            return Response({"error": "step: от 10 до 10000 метров"}, status=400)
+
+        try:
+            data = cached_compare(run, other, int(step))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(data)
+
+    @action(detail=False, methods=["post"])
+    def import_gpx(self, request):
+        """
+        Импортирует завершённые забеги из GPX-файлов (по забегу на каждый <trk>).
+        POST /api/runs/import_gpx/
+        form-data: athlete=<athlete_id>, file=<gpx> (можно несколько)
+        """
+        athlete_id = request.data.get("athlete")
+        if athlete_id is None:
+            return Response({"error": "Field 'athlete' is required"}, status=400)
+
+        athlete = User.objects.filter(pk=athlete_id).first()
+        if athlete is None:
+            return Response({"error": "Athlete not found"}, status=400)
+        if athlete.is_staff:
+            return Response({"error": "User is not an athlete"}, status=400)
+
+        files = request.FILES.getlist("file")
+        if not files:
+            return Response({"error": "Файл не передан"}, status=400)
+
+        try:
+            imported = import_gpx(athlete, [(file.name, file) for file in files])
+        except (ParseError, KeyError, ValueError):
+            return Response({"error": "Неверный формат файла"}, status=400)
+
+        return Response({"runs": [track.as_dict() for track in imported]}, status=201)
+
     def list(self, request, *args, **kwargs):
         """
         Если есть ?size=... → включаем пагинацию.
-        Иначе отдаём весь список.
+        Если есть ?stream=1 или Accept: application/x-ndjson → отдаём потоком.
+        Иначе отдаём весь список через быстрый values()-сериализатор.
         """
         queryset = self.filter_queryset(self.get_queryset())
 
@@ -288,17 +626,22 @@ class RunViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return paginator.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        if self.wants_stream(request):
+            return self.stream_response(request, queryset, run_rows)
+
+        fields = selected(request, run_rows.field_names)
+        return Response(run_rows.serialize(queryset, fields))
 
     def calculate_run_time(self, run: Run):
         """
         Время забега = max(date_time) - min(date_time) по позициям.
         Заодно считаем среднюю скорость по Position.speed.
+        Одним запросом; сохраняет забег вызывающий код.
         """
         agg = run.positions.aggregate(
             min_dt=Min("date_time"),
             max_dt=Max("date_time"),
+            avg_speed=Avg("speed"),
         )
         min_dt = agg["min_dt"]
         max_dt = agg["max_dt"]
@@ -308,21 +651,14 @@ class RunViewSet(viewsets.ModelViewSet):
 
         run.run_time_seconds = int((max_dt - min_dt).total_seconds())
 
-        positions = run.positions.exclude(speed__isnull=True)
-        if positions.exists():
-            avg_speed = round(
-                sum(p.speed for p in positions) / positions.count(),
-                2,
-            )
-            run.speed = avg_speed
-
-        # Вызов save() триггерит нашу бизнес-логику в models.Run.save()
-        run.save(update_fields=["run_time_seconds", "speed"])
+        if agg["avg_speed"] is not None:
+            run.speed = round(agg["avg_speed"], 2)
 
 
 class UserViewSet(ReadOnlyModelViewSet):
     """API для просмотра пользователей приложения."""
 
+    replica_actions = ("list",)
     filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ["first_name", "last_name"]
     ordering_fields = ["date_joined"]
@@ -337,11 +673,25 @@ class UserViewSet(ReadOnlyModelViewSet):
         elif user_type == "athlete":
             qs = qs.filter(is_staff=False)
 
+        # аннотации с JOIN-ами — только под запрошенные поля
+        annotations = {
+            "runs_finished": Count("run", filter=Q(run__status=Run.Status.FINISHED)),
+            "rating": Avg("subscribers__rating"),
+        }
         return qs.annotate(
-            runs_finished=Count("run", filter=Q(run__status=Run.Status.FINISHED)),
-            rating=Avg("subscribers__rating"),
+            **{
+                name: expression
+                for name, expression in annotations.items()
+                if wants(self.request, name)
+            }
         )
 
+    def get_object(self):
+        # get_serializer_class и retrieve запрашивают пользователя дважды
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
     def get_serializer_class(self):
         # /api/users/  → базовый сериализатор без coach/athletes
         if self.action == "list":
@@ -356,6 +706,33 @@ class UserViewSet(ReadOnlyModelViewSet):
 
         return UserBaseSerializer
 
+    @action(detail=True, methods=["get"], renderer_classes=[ZipRenderer])
+    def export(self, request, pk=None):
+        """
+        Zip-архив со всеми забегами атлета (трек каждого забега — отдельный файл).
+        GET /api/users/<id>/export/?tracks=gpx|csv|ndjson
+        """
+        athlete = get_object_or_404(User, pk=pk)
+
+        export_format = request.query_params.get("tracks", "gpx")
+        if export_format not in CONTENT_TYPES:
+            return Response({"error": "Неизвестный формат треков"}, status=400)
+
+        response = StreamingHttpResponse(
+            export_athlete_runs(athlete, export_format),
+            content_type=ZipRenderer.media_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="athlete_{athlete.pk}_runs.zip"'
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Список без пагинации — через быстрый values()-сериализатор."""
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = selected(request, user_rows.field_names)
+        return Response(user_rows.serialize(queryset, fields))
+
 
 # --------------------------------------------------------------------
 #                       ATHLETE INFO
@@ -377,7 +754,7 @@ class AthleteInfoView(APIView):
         if error:
             return error
 
-        serializer = AthleteInfoSerializer(athlete_info)
+        serializer = AthleteInfoSerializer(athlete_info, context={"request": request})
         return Response(serializer.data)
 
     def put(self, request, user_id):
@@ -400,6 +777,7 @@ class AthleteInfoView(APIView):
 class ChallengeViewSet(viewsets.ReadOnlyModelViewSet):
     """API для просмотра выполненных челленджей."""
 
+    replica_actions = ("list",)
     queryset = Challenge.objects.all()
     serializer_class = ChallengeSerializer
 
@@ -411,11 +789,12 @@ class ChallengeViewSet(viewsets.ReadOnlyModelViewSet):
         return qs
 
 
-class PositionViewSet(viewsets.ModelViewSet):
+class PositionViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """API для работы с позициями атлетов."""
 
     queryset = Position.objects.all()
     serializer_class = PositionSerializer
+    throttle_classes = [IngestThrottle]
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -424,10 +803,45 @@ class PositionViewSet(viewsets.ModelViewSet):
             qs = qs.filter(run_id=run_id)
         return qs
 
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == "list":
+            renderers.append(CompactRenderer())
+        return renderers
+
+    def list(self, request, *args, **kwargs):
+        """
+        ?stream=1 или Accept: application/x-ndjson → отдаём точки потоком,
+        ?format=compact → столбцами с разностным кодированием.
+        """
+        if request.accepted_renderer.format == CompactRenderer.format:
+            queryset = self.filter_queryset(self.get_queryset())
+            return Response(encode_track(queryset))
+        if self.wants_stream(request):
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.stream_response(request, queryset, position_rows)
+        return super().list(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Как в ModelViewSet, но точку может отбросить фильтр (runs/ingest.py):
+        тогда ответ 200 с причиной вместо 201 с позицией.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reason = self.perform_create(serializer)
+        if reason is not None:
+            return Response({"dropped": True, "reason": reason}, status=200)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=201, headers=headers)
+
+    @transaction.atomic
     def perform_create(self, serializer):
         """
         Сохраняет позицию, рассчитывает скорость и дистанцию,
         а также выполняет сбор ближайших предметов.
+        Всё — одной транзакцией с событием position.recorded.
+        Возвращает причину, если точка отброшена фильтром, иначе None.
         """
 
         run = serializer.validated_data["run"]
@@ -438,55 +852,104 @@ class PositionViewSet(viewsets.ModelViewSet):
                 "Run must be in progress to record positions"
             )
 
-        # 2. Сохраняем позицию
-        position = serializer.save()
+        # 2. Фильтр дребезга и выбросов относительно последней точки
+        data = serializer.validated_data
+        point = (data["latitude"], data["longitude"], data["date_time"])
+        prev = Position.objects.filter(run=run).order_by("-date_time").first()
+        prev_point = prev and (prev.latitude, prev.longitude, prev.date_time)
 
-        prev = (
-            Position.objects.filter(run=run)
-            .exclude(pk=position.pk)
-            .order_by("-date_time")
-            .first()
-        )
+        reason = PositionFilter().check(prev_point, point)
+        if reason is not None:
+            record_dropped(run.id, [reason])
+            return reason
 
+        # 3. Сохраняем позицию сразу со скоростью и дистанцией
         if prev is None:
             # первая точка
-            position.speed = 0.0
-            position.distance = 0.0
+            speed, distance = 0.0, 0.0
         else:
-            prev_point = (float(prev.latitude), float(prev.longitude))
-            curr_point = (float(position.latitude), float(position.longitude))
-
-            segment_m = geodesic(prev_point, curr_point).meters
-
-            if position.date_time and prev.date_time:
-                delta = (position.date_time - prev.date_time).total_seconds()
-            else:
-                delta = 0
-
-            speed = segment_m / delta if delta > 0 else 0.0
-            distance_km = (prev.distance or 0.0) + (segment_m / 1000.0)
-
-            position.speed = round(speed, 2)
-            position.distance = round(distance_km, 2)
+            with timer("position.distance"):
+                speed, distance = segment_metrics(prev_point, point, prev.distance)
 
-        position.save(update_fields=["speed", "distance"])
+        position = serializer.save(speed=speed, distance=distance)
 
-        # 3. Сбор предметов (Collectible Items)
+        # 4. Сбор предметов (Collectible Items)
         user = run.athlete
-        for item in CollectibleItem.objects.all():
-            dist = geodesic(
-                (position.latitude, position.longitude),
-                (item.latitude, item.longitude),
-            ).meters
-            if dist <= 100:
-                item.collected_by.add(user)
+        point = (position.latitude, position.longitude)
+        with timer("position.collectibles"):
+            items = CollectibleItem.objects.values_list("id", "latitude", "longitude")
+            nearby = [
+                item_id
+                for item_id, latitude, longitude in items
+                if segment_meters(point, (latitude, longitude)) <= COLLECT_RADIUS_M
+            ]
+            # в событие и таблицы лидеров — только ещё не собранные предметы
+            if nearby:
+                owned = set(
+                    user.items.filter(id__in=nearby).values_list("id", flat=True)
+                )
+                nearby = [item_id for item_id in nearby if item_id not in owned]
+            # одна вставка в through-таблицу вместо add() на каждый предмет
+            if nearby:
+                user.items.add(*nearby)
+
+        OutboxEvent.emit(
+            OutboxEvent.POSITION_RECORDED,
+            run.athlete_id,
+            run=run.id,
+            position=position.id,
+            latitude=float(position.latitude),
+            longitude=float(position.longitude),
+            date_time=position.date_time,
+            speed=position.speed,
+            distance=position.distance,
+            collected=nearby,
+        )
+        return None
 
 
 class CollectibleItemView(generics.ListAPIView):
-    """API для получения списка коллекционных предметов."""
+    """
+    API для получения списка коллекционных предметов.
+    ?bbox=min_lon,min_lat,max_lon,max_lat — предметы в рамке карты,
+    ?near=lat,lon&radius=м — в радиусе от точки (с distance), ближайшие первыми.
+    С фильтром ответ постраничный (size, по умолчанию 100), без — весь каталог.
+    """
 
     queryset = CollectibleItem.objects.all()
     serializer_class = CollectibleItemSerializer
+    pagination_class = ViewportPagination
+
+    def list(self, request, *args, **kwargs):
+        bbox = request.query_params.get("bbox")
+        point = request.query_params.get("near")
+        if bbox is None and point is None:
+            # без фильтра — прежний ответ списком
+            serializer = self.get_serializer(self.get_queryset(), many=True)
+            return Response(serializer.data)
+
+        try:
+            if point is not None:
+                radius = float(request.query_params.get("radius", 1000))
+                if not 0 < radius <= MAX_NEAR_RADIUS_M:
+                    raise ValueError(f"radius: от 0 до {MAX_NEAR_RADIUS_M} м")
+                queryset = near(self.get_queryset(), *parse_point(point), radius)
+                self.serializer_class = CollectibleItemDistanceSerializer
+            else:
+                min_lon, min_lat, max_lon, max_lat = parse_bbox(bbox)
+                queryset = in_bbox(
+                    self.get_queryset(), min_lon, min_lat, max_lon, max_lat
+                )
+                # от центра рамки к краям: при обрезке страницей теряются края
+                queryset = by_distance(
+                    queryset, *bbox_center(min_lon, min_lat, max_lon, max_lat)
+                )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class UploadCollectibleFile(APIView):
@@ -497,14 +960,17 @@ class UploadCollectibleFile(APIView):
         if not file:
             return Response({"error": "Файл не передан"}, status=400)
 
+        # openpyxl нужен только здесь — не грузим его на холодном старте
+        from openpyxl import load_workbook
+
         try:
             wb = load_workbook(file)
             sheet = wb.active
         except Exception:
             return Response({"error": "Неверный формат файла"}, status=400)
 
-        invalid_rows = []
-
+        # 1. Валидируем строки без обращений к БД
+        rows = []
         for row in sheet.iter_rows(min_row=2, values_only=True):
             if all(v is None for v in row):
                 continue
@@ -512,7 +978,7 @@ class UploadCollectibleFile(APIView):
             # Name, UID, Value, Latitude, Longitude, URL
             name, uid, value, lat, lon, picture = row
 
-            serializer = CollectibleItemSerializer(
+            serializer = CollectibleItemImportSerializer(
                 data={
                     "name": name,
                     "uid": uid,
@@ -522,10 +988,30 @@ class UploadCollectibleFile(APIView):
                     "picture": picture,
                 }
             )
+            rows.append(
+                (row, serializer.validated_data if serializer.is_valid() else None)
+            )
 
-            if serializer.is_valid():
-                serializer.save()
-            else:
-                invalid_rows.append(list(row))
+        # 2. Уникальность uid — одним запросом на весь файл
+        uids = [data["uid"] for _, data in rows if data is not None]
+        taken = set(
+            CollectibleItem.objects.filter(uid__in=uids).values_list("uid", flat=True)
+        )
 
+        invalid_rows = []
+        items = []
+        for row, data in rows:
+            if data is None or data["uid"] in taken:
+                invalid_rows.append(list(row))
+                continue
+            taken.add(data["uid"])
+            items.append(CollectibleItem(**data))
+
+        # предметы сопоставляются с историей точек в фоне (runs.handlers)
+        with transaction.atomic():
+            CollectibleItem.objects.bulk_create(items)
+            if items:
+                OutboxEvent.emit(
+                    OutboxEvent.ITEMS_UPLOADED, 0, items=[item.pk for item in items]
+                )
         return Response(invalid_rows, status=200)